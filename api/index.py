@@ -1,28 +1,86 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import yfinance as yf
-from googletrans import Translator
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
-from functools import lru_cache
-import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from rate_limiter import limiter, YAHOO_QUERY_HOST
+from resilience import (REQUEST_DEADLINE, CircuitOpenError, DeadlineExceeded, acquire, resilience, timeout_for,
+                        unavailable_status, with_deadline)
+from shared_cache import shared_cache
+from translation_service import translation_service
+from cache_headers import cacheable
+from search_index import symbol_index
+from metrics import instrument, registry, stage, timed
 
 app = Flask(__name__)
 CORS(app)
-translator = Translator()
+instrument(app)
+
+# Cache lifetimes in the cache shared by all gunicorn workers (seconds)
+INFO_TTL = 15 * 60
+HISTORY_TTL = 60 * 60
+# Per-attempt timeout of a history download, cut to the request deadline
+YFINANCE_TIMEOUT = 10
 
-# Add caching to reduce API calls
-@lru_cache(maxsize=100)
 def translate_text(text, dest_lang='en'):
     if not text or dest_lang == 'en':
         return text
+    return translation_service.translate(text, dest_lang)
+
+registry.add_stats('rate_limiter', 'Rate limiter state per upstream host', limiter.stats, 'host')
+registry.add_stats('upstream', 'Retries and circuit breaker state per upstream host', resilience.stats, 'host')
+registry.add_stats('shared_cache', 'Shared cache counters', shared_cache.stats)
+registry.add_stats('translation', 'Translation service counters', lambda: translation_service.stats)
+
+def call_yahoo(func):
+    """Run a yfinance call under the shared Yahoo query rate limit, retried by the resilience policy."""
+    def attempt():
+        acquire(YAHOO_QUERY_HOST)
+        try:
+            result = func()
+        except Exception as e:
+            limiter.report_error(YAHOO_QUERY_HOST, e)
+            raise
+        limiter.report(YAHOO_QUERY_HOST, 200)
+        return result
+    return resilience.call(YAHOO_QUERY_HOST, attempt)
+
+# Downloads are retried and fail fast while Yahoo is down (see resilience.py)
+@timed('info')
+def get_ticker_info(symbol):
+    return shared_cache.get_or_load(
+        f"yfinance:info:{symbol.upper()}", lambda: call_yahoo(lambda: yf.Ticker(symbol).info or None), INFO_TTL)
+
+@timed('history')
+def get_ticker_history(symbol, period='1y'):
+    """Price history, empty when Yahoo has none.
+
+    Download errors are raised inside call_yahoo so that they are retried and
+    counted by the breaker; DeadlineExceeded and CircuitOpenError reach the
+    endpoint, which answers 504 or 503.
+    """
+    def load():
+        history = call_yahoo(lambda: yf.Ticker(symbol).history(period=period, raise_errors=True,
+                                                               timeout=timeout_for(YFINANCE_TIMEOUT)))
+        # Not cached when empty, so that the next request asks Yahoo again
+        return history if not history.empty else None
     try:
-        time.sleep(0.5)
-        return translator.translate(text, dest=dest_lang).text
-    except:
-        return text
+        history = shared_cache.get_or_load(f"yfinance:history:{symbol.upper()}:{period}", load, HISTORY_TTL)
+    except (DeadlineExceeded, CircuitOpenError):
+        raise
+    except Exception as e:
+        print(f"Error fetching historical data for {symbol}: {str(e)}")
+        history = None
+    return history if history is not None else pd.DataFrame()
 
 @app.route('/api/search', methods=['GET'])
+@cacheable(max_age=INFO_TTL, stale_while_revalidate=HISTORY_TTL)
+@with_deadline(REQUEST_DEADLINE)
 def search_company():
     query = request.args.get('query', '')
     lang = request.args.get('lang', 'en')
@@ -31,13 +89,16 @@ def search_company():
         return jsonify({'error': 'No query provided'}), 400
     
     try:
-        ticker = yf.Ticker(query)
-        info = ticker.info
+        # A company name ('samsung electronics', '삼성전자') is resolved to its ticker locally
+        symbol = symbol_index.resolve(query) or query.strip().upper()
+        info = get_ticker_info(symbol)
         
         if not info:
             return jsonify({'error': 'Company not found'}), 404
+        symbol_index.add([{'symbol': symbol, 'name': info.get('longName') or info.get('shortName'),
+                           'exchange': info.get('exchange'), 'type': info.get('quoteType')}])
             
-        history = ticker.history(period='1y')
+        history = get_ticker_history(symbol, period='1y')
         if not history.empty:
             prices = history['Close'].tolist()
             dates = history.index.strftime('%Y-%m-%d').tolist()
@@ -45,21 +106,28 @@ def search_company():
             prices = []
             dates = []
             
-        analysis = generate_analysis_summary(info, history, lang)
+        # Description and summary go to the translator in one batch
+        description, analysis = translation_service.translate_many(
+            [info.get('longBusinessSummary', ''), generate_analysis_summary(info, history)], lang)
         
-        return jsonify({
-            'symbol': query.upper(),
-            'name': info.get('longName', ''),
-            'description': translate_text(info.get('longBusinessSummary', ''), lang),
-            'prices': prices,
-            'dates': dates,
-            'analysis': analysis
-        })
+        with stage('serialization'):
+            return jsonify({
+                'symbol': symbol,
+                'name': info.get('longName', ''),
+                'description': description,
+                'prices': prices,
+                'dates': dates,
+                'analysis': analysis
+            })
         
+    except (DeadlineExceeded, CircuitOpenError) as e:
+        return jsonify({'error': str(e)}), unavailable_status(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/analyze', methods=['GET'])
+@cacheable(max_age=INFO_TTL, stale_while_revalidate=HISTORY_TTL)
+@with_deadline(REQUEST_DEADLINE)
 def analyze_company():
     symbol = request.args.get('symbol', '')
     lang = request.args.get('lang', 'en')
@@ -68,27 +136,45 @@ def analyze_company():
         return jsonify({'error': 'No symbol provided'}), 400
         
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
+        info = get_ticker_info(symbol)
         
         if not info:
             return jsonify({'error': 'Company not found'}), 404
             
-        history = ticker.history(period='1y')
+        history = get_ticker_history(symbol, period='1y')
         analysis = generate_analysis_summary(info, history, lang)
         
         return jsonify({
             'analysis': analysis
         })
         
+    except (DeadlineExceeded, CircuitOpenError) as e:
+        return jsonify({'error': str(e)}), unavailable_status(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/rate-limits', methods=['GET'])
+def rate_limits():
+    return jsonify(limiter.stats())
+
+@app.route('/api/upstreams', methods=['GET'])
+def upstream_stats():
+    return jsonify(resilience.stats())
+
+@app.route('/api/shared-cache', methods=['GET'])
+def shared_cache_stats():
+    return jsonify(shared_cache.stats())
+
+@app.route('/api/translations', methods=['GET'])
+def translation_stats():
+    return jsonify(translation_service.stats)
+
+@timed('summary')
 def generate_analysis_summary(info, history, lang='en'):
     if history.empty:
         return translate_text("Insufficient data for analysis", lang)
         
-    current_price = history['Close'][-1]
+    current_price = history['Close'].iloc[-1]
     year_high = np.max(history['High'])
     year_low = np.min(history['Low'])
     
@@ -0,0 +1,113 @@
+"""Serialization time and payload size of the /api/analyze price history.
+
+Builds a synthetic daily history (default 11,000 rows, about what period=max
+returns for an old listing) and encodes it the way the endpoint used to, with
+iterrows() and Flask's JSON provider, and with each layout and encoding of
+serialization.py. Formatting (string dates, rounding) is timed separately
+because it runs once per download, not once per request.
+
+    python benchmarks/bench_history_format.py --rows 11000 --rounds 20
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import serialization
+from serialization import format_dates, history_columns, history_records
+
+def synthetic_history(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('1980-12-12', periods=rows, freq='B', tz='America/New_York')
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    return pd.DataFrame({
+        'Open': close * rng.uniform(0.98, 1.02, rows),
+        'High': close * rng.uniform(1.0, 1.04, rows),
+        'Low': close * rng.uniform(0.96, 1.0, rows),
+        'Close': close,
+        'Volume': rng.integers(10 ** 5, 10 ** 8, rows),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=index)
+
+def format_rowwise(hist):
+    """format_history before the change."""
+    hist.index = hist.index.strftime('%Y-%m-%d')
+    for col in hist.columns:
+        if hist[col].dtype in ['float64', 'float32']:
+            hist[col] = hist[col].round(2)
+    return hist
+
+def format_vectorized(hist):
+    hist.index = format_dates(hist.index)
+    floats = hist.select_dtypes(include=['float64', 'float32']).columns
+    hist[floats] = hist[floats].round(2)
+    return hist
+
+def records_iterrows(hist):
+    """The per-row conversion analyze_company used before the change."""
+    records = []
+    for date, row in hist.iterrows():
+        records.append({
+            'Date': date,
+            'Open': float(row['Open']),
+            'High': float(row['High']),
+            'Low': float(row['Low']),
+            'Close': float(row['Close']),
+            'Volume': int(row['Volume'])
+        })
+    return records
+
+def flask_json(document):
+    # Flask's default provider: sorted keys, compact separators
+    return json.dumps(document, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def timed(func, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=11000)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    raw = synthetic_history(args.rows)
+    print(f"{args.rows} rows, best of {args.rounds} rounds")
+    print(f"{'format':<36}{'ms':>10}")
+    for name, func in (('strftime + per-column loop (before)', format_rowwise),
+                       ('datetime64 + one round()', format_vectorized)):
+        seconds, _ = timed(lambda: func(raw.copy()), args.rounds)
+        print(f"{name:<36}{seconds * 1000:>10.2f}")
+
+    hist = format_vectorized(raw.copy())
+    cases = [
+        ('iterrows + json (before)', lambda: flask_json({'stock_history': records_iterrows(hist)})),
+        ('records + ' + ('orjson' if serialization.orjson else 'json'),
+         lambda: serialization.encode_json({'stock_history': history_records(history_columns(hist))})),
+        ('columns + ' + ('orjson' if serialization.orjson else 'json'),
+         lambda: serialization.encode_json({'stock_history': history_columns(hist)})),
+    ]
+    if serialization.msgpack is not None:
+        cases.append(('columns + msgpack', lambda: serialization.encode_msgpack({'stock_history': history_columns(hist)})))
+    if serialization.pa is not None:
+        cases.append(('columns + arrow ipc', lambda: serialization.encode_arrow({'stock_history': history_columns(hist)})))
+
+    print(f"\n{'serialize':<36}{'ms':>10}{'bytes':>12}{'gzip bytes':>12}")
+    for name, func in cases:
+        seconds, body = timed(func, args.rounds)
+        print(f"{name:<36}{seconds * 1000:>10.2f}{len(body):>12}{len(gzip.compress(body, 6)):>12}")
+
+if __name__ == '__main__':
+    main()
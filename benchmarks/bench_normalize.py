@@ -0,0 +1,102 @@
+"""Compare per-cell clean_numeric with the vectorized normalize module.
+
+Builds a synthetic frame of display strings (default 10,000 companies by 60
+fields) in the formats the scraper produces, then converts it both ways. The
+per-cell path mirrors the analysis scripts before normalize.py: Series.apply of
+clean_numeric, with an extra lambda stripping '%' on percentage columns.
+
+    python benchmarks/bench_normalize.py --companies 10000 --fields 60
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from normalize import clean_numeric_frame
+
+def clean_numeric(value):
+    """The per-cell helper formerly defined in both analysis scripts."""
+    if isinstance(value, str):
+        value = value.replace('$', '').replace(',', '').replace('%', '')
+        if 'T' in value:
+            value = float(value.replace('T', '')) * 1e12
+        elif 'B' in value:
+            value = float(value.replace('B', '')) * 1e9
+        elif 'M' in value:
+            value = float(value.replace('M', '')) * 1e6
+        else:
+            try:
+                value = float(value)
+            except:
+                value = None
+    return value
+
+FORMATS = ('amount', 'percent', 'ratio', 'dollars', 'missing', 'date')
+
+def synthetic_frame(companies, fields, seed=0):
+    """Display strings with a format chosen per column, plus some missing cells."""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i in range(fields):
+        kind = FORMATS[i % len(FORMATS)]
+        values = rng.uniform(-50, 500, companies)
+        if kind == 'amount':
+            suffixes = rng.choice(['T', 'B', 'M'], companies)
+            cells = [f"{v:.2f}{s}" for v, s in zip(values, suffixes)]
+        elif kind == 'percent':
+            cells = [f"{v:.2f}%" for v in values]
+        elif kind == 'ratio':
+            cells = [f"{v:.2f}" for v in values]
+        elif kind == 'dollars':
+            cells = [f"${v * 1000:,.2f}" for v in values]
+        elif kind == 'date':
+            cells = [f"{1 + int(v) % 12}/{1 + int(v) % 28}/2024" for v in values]
+        else:
+            cells = [f"{v:.2f}" if v > 200 else '--' for v in values]
+        columns[f"{kind}_{i}"] = cells
+    return pd.DataFrame(columns, index=[f"SYM{i:05d}" for i in range(companies)])
+
+def per_cell(frame):
+    result = {}
+    for column in frame.columns:
+        if column.startswith('percent'):
+            result[column] = frame[column].apply(lambda x: clean_numeric(x.replace('%', '')))
+        else:
+            result[column] = frame[column].apply(clean_numeric)
+    return pd.DataFrame(result, index=frame.index)
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=10000)
+    parser.add_argument('--fields', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frame = synthetic_frame(args.companies, args.fields)
+    cells = frame.size
+    legacy_time, legacy = best_of(args.repeat, per_cell, frame)
+    vector_time, vector = best_of(args.repeat, clean_numeric_frame, frame)
+
+    legacy_values = legacy.astype('float64').to_numpy()
+    same = np.allclose(legacy_values, vector.to_numpy(), equal_nan=True, rtol=1e-12, atol=0)
+
+    print(f"{args.companies} companies x {args.fields} fields = {cells:,} cells")
+    print(f"per-cell apply   {legacy_time * 1000:10.1f} ms  {cells / legacy_time / 1e6:8.2f} M cells/s")
+    print(f"vectorized       {vector_time * 1000:10.1f} ms  {cells / vector_time / 1e6:8.2f} M cells/s")
+    print(f"speedup          {legacy_time / vector_time:10.1f}x   identical values: {same}")
+
+if __name__ == '__main__':
+    main()
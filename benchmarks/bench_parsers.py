@@ -0,0 +1,103 @@
+"""Parse-only benchmark of the page parser backends over saved page fixtures.
+
+Each backend runs in its own subprocess so peak memory is not polluted by the
+others. Python heap peaks come from tracemalloc; the RSS growth also covers
+memory allocated inside lxml and lexbor. Every backend's output is compared with
+the full-tree html.parser reference after timing.
+
+    python benchmarks/bench_parsers.py --rounds 20
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+import page_parser
+
+FIXTURE_DIR = os.path.join(HERE, 'fixtures', 'pages')
+
+def load_fixtures(directory):
+    """Return {symbol: {kind: html}} for every saved fixture page."""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        symbol, kind = os.path.basename(path)[:-len('.html')].split('_', 1)
+        with open(path, 'r', encoding='utf-8') as f:
+            fixtures.setdefault(symbol, {})[kind] = f.read()
+    return fixtures
+
+def parse_all(parser, fixtures):
+    results = {}
+    for symbol, pages in fixtures.items():
+        data = {}
+        parser.parse_quote(pages['quote'], symbol, data)
+        parser.parse_statistics(pages['key-statistics'], data)
+        parser.parse_profile(pages['profile'], data)
+        results[symbol] = data
+    return results
+
+def max_rss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return usage / 1024 if sys.platform == 'darwin' else usage
+
+def run_backend(name, directory, rounds):
+    """Benchmark one backend in this process and return its measurements."""
+    fixtures = load_fixtures(directory)
+    parser = page_parser.get_parser(name)
+
+    rss_before = max_rss_kb()
+    pages = sum(len(p) for p in fixtures.values()) * rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parse_all(parser, fixtures)
+    elapsed = time.perf_counter() - start
+    rss_growth = max_rss_kb() - rss_before
+
+    tracemalloc.start()
+    parse_all(parser, fixtures)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    reference = parse_all(page_parser.get_parser('html.parser'), fixtures)
+    identical = json.dumps(parse_all(parser, fixtures)) == json.dumps(reference)
+
+    return {
+        'backend': name,
+        'identical': identical,
+        'pages': pages,
+        'ms_per_page': elapsed * 1000 / pages,
+        'python_peak_kb': peak / 1024,
+        'rss_growth_kb': rss_growth,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help='Directory of <symbol>_<kind>.html pages')
+    parser.add_argument('--rounds', type=int, default=10, help='Passes over the fixture set per backend')
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.fixtures, args.rounds)))
+        return
+
+    print(f"{'backend':<12} {'identical':>9} {'ms/page':>9} {'py peak KB':>11} {'RSS +KB':>9}")
+    for name in reversed(page_parser.available_parsers()):
+        output = subprocess.check_output([
+            sys.executable, __file__, '--backend', name,
+            '--fixtures', args.fixtures, '--rounds', str(args.rounds),
+        ])
+        result = json.loads(output)
+        print(f"{name:<12} {str(result['identical']):>9} {result['ms_per_page']:>9.3f} "
+              f"{result['python_peak_kb']:>11.0f} {result['rss_growth_kb']:>9.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Compare the serial scrape loop with the concurrent async engine.
+
+Both run against a local stub server that serves the three Yahoo Finance pages
+with a fixed artificial latency, so the numbers reflect scheduling rather than
+the network.
+
+    python benchmarks/bench_scraper.py --symbols 200 --latency 0.1 --concurrency 16
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+import time
+
+import requests
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import company_scraper
+import scrape_pipeline
+from rate_limiter import limiter
+from http_cache import response_cache
+from stub_pages import StubPages
+
+def start_stub_server(latency, pages=None):
+    """Start the stub page server on a background thread and return its base URL."""
+    pages = pages or StubPages()
+    started = threading.Event()
+    state = {}
+
+    async def handle(request):
+        await asyncio.sleep(latency)
+        symbol = request.match_info['symbol']
+        kind = request.match_info.get('kind', 'quote')
+        body = pages.page(kind, symbol)
+        etag = '"%s"' % hashlib.sha1(body.encode('utf-8')).hexdigest()
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=body, content_type='text/html', headers={'ETag': etag})
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get('/quote/{symbol}', handle)
+        app.router.add_get('/quote/{symbol}/{kind}', handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        state['port'] = site._server.sockets[0].getsockname()[1]
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{state['port']}"
+
+def serial_scrape(symbols, base_url, delay):
+    """The pre-async main() loop: three blocking GETs per symbol, then a fixed sleep."""
+    all_data = {}
+    for symbol in symbols:
+        data = {}
+        quote_url, stats_url, profile_url = company_scraper.page_urls(symbol, base_url)
+        company_scraper.parse_quote_page(requests.get(quote_url, headers=company_scraper.HEADERS).text, symbol, data)
+        company_scraper.parse_statistics_page(requests.get(stats_url, headers=company_scraper.HEADERS).text, data)
+        company_scraper.parse_profile_page(requests.get(profile_url, headers=company_scraper.HEADERS).text, data)
+        all_data[symbol] = data
+        if delay:
+            time.sleep(delay)
+    return all_data
+
+def timed(label, symbols, func):
+    start = time.perf_counter()
+    results = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44} {len(symbols):>6} symbols  {elapsed:8.2f}s  {len(symbols) / elapsed:8.2f} symbols/s")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=100, help='Number of symbols to scrape')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub server latency per page in seconds')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32],
+                        help='Concurrency limits to benchmark for the async engine')
+    parser.add_argument('--serial-delay', type=float, default=0,
+                        help='Sleep between symbols in the serial loop (main() used 2s)')
+    parser.add_argument('--rate', type=float, default=1e6,
+                        help='Rate limit (requests/s) applied to the stub host by the async engine')
+    parser.add_argument('--pipeline-workers', type=int, default=0,
+                        help='Also run the fetch/parse pipeline with this many parser processes')
+    parser.add_argument('--skip-serial', action='store_true', help='Only benchmark the async engine')
+    args = parser.parse_args()
+
+    base_url = start_stub_server(args.latency)
+    limiter.configure(base_url, args.rate, max(1, int(args.rate)))
+    # Measure fetching, not the response cache
+    response_cache.mode = 'off'
+    symbols = [f"SYM{i:05d}" for i in range(args.symbols)]
+
+    serial = None
+    if not args.skip_serial:
+        serial = timed('serial loop', symbols, lambda: serial_scrape(symbols, base_url, args.serial_delay))
+
+    for concurrency in args.concurrency:
+        results = timed(f'async (concurrency={concurrency})', symbols,
+                        lambda: company_scraper.scrape_companies(symbols, concurrency, base_url=base_url))
+        if serial is not None and results != serial:
+            print("  warning: async results differ from the serial loop")
+
+    if args.pipeline_workers:
+        concurrency = max(args.concurrency)
+        results = {}
+        stats = timed(f'pipeline (concurrency={concurrency}, workers={args.pipeline_workers})', symbols,
+                      lambda: asyncio.run(scrape_pipeline.run_pipeline(
+                          symbols, results.__setitem__, concurrency, args.pipeline_workers, base_url=base_url)))
+        scrape_pipeline.print_stats(stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Latency of /api/screen queries over the indexed metrics table.
+
+Builds a synthetic scrape run of --companies companies with the display
+strings the scraper stores ('23.97%', '--' for missing values), loads it into
+the screener's MetricsTable, and times screens with a page of 50 results against:
+
+- pandas: a boolean mask over a DataFrame of the same float columns, then sort_values
+- loop: converting each company's strings and testing them one by one, which
+  is what screening through get_company_data per symbol amounts to locally
+
+    python benchmarks/bench_screener.py --companies 20000 --rounds 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+
+from screener import SCREEN_FIELDS, MetricsTable, parse_screen_args
+
+SOURCE_FIELDS = {field: names[0] for field, names in SCREEN_FIELDS.items()}
+# field -> (mean, spread) of the synthetic values
+DISTRIBUTIONS = {
+    'profit_margin': (10, 15), 'revenue_growth': (8, 20), 'operating_margin': (15, 12), 'roe': (12, 20),
+    'price_change_pct': (10, 35), 'dividend_yield': (1.5, 1.5), 'pe_ratio': (25, 15),
+}
+QUERIES = {
+    'example': [('profit_margin', 'gt:20'), ('revenue_growth', 'gt:10'), ('pe_ratio', 'lt:30'), ('sort', '-roe')],
+    'one range': [('operating_margin', 'between:15,25'), ('sort', 'pe_ratio')],
+    'selective': [('roe', 'gt:60'), ('dividend_yield', 'gt:3'), ('sort', '-dividend_yield')],
+    'sort only': [('sort', '-price_change_pct')],
+}
+OPERATIONS = {
+    'gt': lambda values, bound: values > bound,
+    'gte': lambda values, bound: values >= bound,
+    'lt': lambda values, bound: values < bound,
+    'lte': lambda values, bound: values <= bound,
+    'eq': lambda values, bound: values == bound,
+    'between': lambda values, bounds: (values >= bounds[0]) & (values <= bounds[1]),
+}
+
+def synthetic_run(companies, seed=0):
+    """{symbol: {snapshot field: display string}} with about 5% of the values missing."""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for field, (mean, spread) in DISTRIBUTIONS.items():
+        values = rng.normal(mean, spread, companies)
+        suffix = '' if field == 'pe_ratio' else '%'
+        text = [f'{value:.2f}{suffix}' for value in values]
+        for i in np.flatnonzero(rng.random(companies) < 0.05):
+            text[i] = '--'
+        columns[SOURCE_FIELDS[field]] = text
+    return {f'S{i:05d}': {source: columns[source][i] for source in columns} for i in range(companies)}
+
+def screen_pandas(frame, conditions, sort, descending, limit):
+    mask = np.ones(len(frame), dtype=bool)
+    for field, op, value in conditions:
+        mask &= OPERATIONS[op](frame[field].to_numpy(), value)
+    result = frame[mask]
+    if sort:
+        result = result.sort_values(sort, ascending=not descending, na_position='last', kind='stable')
+    return len(result), list(result.index[:limit])
+
+def screen_loop(data, conditions, sort, descending, limit):
+    matches = []
+    for symbol, fields in data.items():
+        metrics = {}
+        for field, source in SOURCE_FIELDS.items():
+            try:
+                metrics[field] = float(fields[source].strip('%'))
+            except ValueError:
+                metrics[field] = None
+        if all(metrics[field] is not None and OPERATIONS[op](metrics[field], value)
+               for field, op, value in conditions):
+            matches.append((symbol, metrics))
+    if sort:
+        present = [match for match in matches if match[1][sort] is not None]
+        present.sort(key=lambda match: match[1][sort], reverse=descending)
+        matches = present + [match for match in matches if match[1][sort] is None]
+    return len(matches), [symbol for symbol, _ in matches[:limit]]
+
+def best_of(rounds, func):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    data = synthetic_run(args.companies)
+    started = time.perf_counter()
+    table = MetricsTable.from_companies(data)
+    print(f"{len(table)} companies, table and indexes built in {(time.perf_counter() - started) * 1000:.0f} ms")
+    frame = pd.DataFrame(table.columns, index=table.symbols)
+
+    print(f"{'query':<12}{'matches':>9}{'index ms':>11}{'pandas ms':>11}{'loop ms':>10}")
+    for name, query in QUERIES.items():
+        conditions, sort, descending, offset, limit = parse_screen_args(query)
+
+        def indexed():
+            rows = table.ordered(table.select(conditions), sort, descending)
+            return len(rows), [record['symbol'] for record in table.records(rows[offset:offset + limit])]
+
+        total, page = indexed()
+        assert (total, page) == screen_pandas(frame, conditions, sort, descending, limit)
+        assert (total, page) == screen_loop(data, conditions, sort, descending, limit)
+        index_time = best_of(args.rounds, indexed)
+        pandas_time = best_of(args.rounds, lambda: screen_pandas(frame, conditions, sort, descending, limit))
+        loop_time = best_of(max(args.rounds // 10, 1), lambda: screen_loop(data, conditions, sort, descending, limit))
+        print(f"{name:<12}{total:>9}{index_time * 1000:>11.3f}{pandas_time * 1000:>11.3f}{loop_time * 1000:>10.1f}")
+
+if __name__ == '__main__':
+    main()
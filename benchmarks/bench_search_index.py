@@ -0,0 +1,69 @@
+"""Query latency of the local symbol index behind /api/search.
+
+Loads the ticker master file, pads it with synthetic listings up to --size
+companies, and times typeahead queries (symbol prefixes, English words,
+Korean substrings) against the index and against a linear scan over all
+names, which is what a search without the index would have to do locally.
+The upstream search it replaces takes 200-800 ms per request.
+
+    python benchmarks/bench_search_index.py --size 20000 --rounds 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from search_index import MASTER_PATH, SearchIndex, squash
+
+QUERIES = ['A', 'AAP', 'MSFT', '005930', 'apple', 'coca co', 'bank of', 'micro', 'LG',
+           '삼성', '하이닉스', '현대차', '카카오']
+WORDS = ['global', 'holdings', 'energy', 'systems', 'capital', 'bio', 'tech', 'motors',
+         'foods', 'pacific', 'digital', 'materials', 'health', 'networks', 'realty']
+SYLLABLES = '가나다라마바사아자차카타파하한국제일신대성동서남북'
+
+def synthetic_rows(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 3)))
+        name_ko = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 6)))
+        yield {'symbol': f'S{i:05d}', 'name': f'{name} {i}', 'name_ko': name_ko,
+               'exchange': 'NMS', 'type': 'EQUITY'}
+
+def linear_search(index, query, limit=10):
+    text = squash(query)
+    upper = query.strip().upper()
+    matches = [entry for entry, names in zip(index.entries, index.squashed)
+               if entry['symbol'].startswith(upper) or any(text in name for name in names)]
+    return matches[:limit]
+
+def time_queries(search, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in QUERIES:
+            search(query)
+    return (time.perf_counter() - started) / (rounds * len(QUERIES))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000, help='companies in the index')
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = SearchIndex.from_files(MASTER_PATH, None)
+    index.add(synthetic_rows(max(args.size - len(index), 0)), persist=False)
+    build = time.perf_counter() - started
+    print(f"{len(index)} companies, index built in {build * 1000:.0f} ms")
+
+    indexed = time_queries(index.search, args.rounds)
+    linear = time_queries(lambda query: linear_search(index, query), max(args.rounds // 20, 1))
+    print(f"{'index':<14}{indexed * 1e6:>10.1f} us/query")
+    print(f"{'linear scan':<14}{linear * 1e6:>10.1f} us/query")
+    for query in ('LG', '삼성', 'coca co'):
+        print(f"  {query!r}: {[entry['symbol'] for entry in index.search(query, limit=3)]}")
+
+if __name__ == '__main__':
+    main()
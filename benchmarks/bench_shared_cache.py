@@ -0,0 +1,86 @@
+"""Hit rate of per-process vs shared caches as the number of workers grows.
+
+Each worker process serves its share of a skewed (Zipf) stream of lookups, the
+way gunicorn workers split requests. A miss costs one simulated upstream call.
+With a per-process lru_cache every worker warms up on its own, so upstream calls
+grow with the worker count; with the shared backends they should stay flat.
+
+    python benchmarks/bench_shared_cache.py --workers 1 2 4 8 --requests 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from multiprocessing import Pool
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared_cache import SharedCache, backend_from_url
+from stub_redis import start_stub_redis
+
+UPSTREAM_SECONDS = 0.0005
+VALUE = {'summary': 'x' * 2000, 'prices': list(range(250))}
+
+def upstream(key):
+    time.sleep(UPSTREAM_SECONDS)
+    return dict(VALUE, key=key)
+
+def run_worker(task):
+    url, keys = task
+    loads = 0
+
+    def load(key):
+        nonlocal loads
+        loads += 1
+        return upstream(key)
+
+    if url == 'lru':
+        cached = lru_cache(maxsize=100)(load)
+        for key in keys:
+            cached(key)
+    else:
+        cache = SharedCache(backend_from_url(url), namespace='bench')
+        for key in keys:
+            cache.get_or_load(key, lambda: load(key), ttl=3600)
+    return loads
+
+def run(url, workers, requests, distinct, seed):
+    rng = np.random.default_rng(seed)
+    keys = (rng.zipf(1.2, requests) % distinct).astype(str).tolist()
+    shares = [(url, keys[i::workers]) for i in range(workers)]
+    if url != 'lru':
+        backend_from_url(url).clear()
+    started = time.perf_counter()
+    with Pool(workers) as pool:
+        loads = sum(pool.map(run_worker, shares))
+    return loads, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--keys', type=int, default=2000, help='Number of distinct keys')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    backends = {
+        'lru_cache(100)': 'lru',
+        'sqlite': 'sqlite:///' + os.path.join(tmp, 'shared_cache.sqlite'),
+        'redis (stub)': start_stub_redis(),
+    }
+
+    print(f"{args.requests} lookups over {args.keys} keys (Zipf 1.2)")
+    print(f"{'backend':<16}{'workers':>8}{'upstream':>10}{'hit rate':>10}{'seconds':>10}")
+    for name, url in backends.items():
+        for workers in args.workers:
+            loads, elapsed = run(url, workers, args.requests, args.keys, args.seed)
+            print(f"{name:<16}{workers:>8}{loads:>10}{1 - loads / args.requests:>10.1%}{elapsed:>10.2f}")
+
+if __name__ == '__main__':
+    main()
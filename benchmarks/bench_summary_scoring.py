@@ -0,0 +1,114 @@
+"""Time summary scoring one company at a time against one table for all of them.
+
+Builds --companies synthetic company_data dicts in the formats
+load_company_data produces, with values placed on every threshold and a share
+of edge cases: 'N/A' metrics, a missing Industry, an unknown sector, 'nan%'
+values, empty, missing and zero-priced histories. Row-for-row equality with
+the old per-company code is checked by tests/test_summary_scoring.py.
+
+Timed are generate_company_summary per company, the batch from company_data
+dicts (summary_columns + company_summaries, as /api/analyze/batch scores),
+and score_companies alone over a table that is already columnar, as a nightly
+ranking job would hold it.
+
+    python benchmarks/bench_summary_scoring.py --companies 20000 --rounds 5
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+os.environ.setdefault('HTTP_CACHE_MODE', 'off')
+os.environ.setdefault('TRANSLATOR', 'stub')
+
+import numpy as np
+import pandas as pd
+
+from summary_scoring import (INSIGHT_BANDS, PERCENT_FIELDS, SCORE_THRESHOLDS, company_summaries, score_companies,
+                             summary_columns)
+
+HISTORY_ROWS = 252
+SECTORS = [('Technology', 'Semiconductors'), ('Healthcare', 'Biotechnology'), ('N/A', 'N/A')]
+# Values on and around every threshold, so that > and >= would disagree
+THRESHOLDS = sorted({t for thresholds, _ in INSIGHT_BANDS.values() for t in thresholds} | set(SCORE_THRESHOLDS.values()))
+EDGE_VALUES = [f'{t + d:.2f}%' for t in THRESHOLDS for d in (-0.01, 0, 0.01)] + ['N/A', 'nan%', '-0.00%']
+
+def synthetic_companies(companies, seed=0):
+    """(company_data dicts, stock histories) with about 5% edge cases."""
+    rng = np.random.default_rng(seed)
+    data, histories = [], []
+    for i in range(companies):
+        sector, industry = SECTORS[i % len(SECTORS)]
+        company = {'symbol': f'S{i:05d}', 'Sector': sector, 'Industry': industry,
+                   'Trailing P/E': float(rng.normal(25, 15))}
+        for field in PERCENT_FIELDS:
+            value = rng.normal(12, 15) if rng.random() > 0.1 else 0.0
+            company[field] = f'{value:.2f}%'
+            if rng.random() < 0.05:
+                company[field] = EDGE_VALUES[rng.integers(len(EDGE_VALUES))]
+        edge = rng.random()
+        if edge < 0.01:
+            company['Trailing P/E'] = 'N/A'
+        elif edge < 0.02:
+            del company['Industry']
+        elif edge < 0.03:
+            company['Sector'] = None
+
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, HISTORY_ROWS))).round(2)
+        hist = pd.DataFrame({'Close': closes, 'Volume': rng.integers(10 ** 5, 10 ** 8, HISTORY_ROWS)})
+        edge = rng.random()
+        if edge < 0.01:
+            hist = hist.iloc[:0]
+        elif edge < 0.02:
+            hist = None
+        elif edge < 0.03:
+            hist.loc[0, 'Close'] = 0.0
+        elif edge < 0.04:
+            # Exactly 10% and 20% up, on the score and insight thresholds
+            hist.loc[HISTORY_ROWS - 1, 'Close'] = hist.loc[0, 'Close'] * (1.1 if edge < 0.035 else 1.2)
+        data.append(company)
+        histories.append(hist)
+    return data, histories
+
+def best_of(rounds, func):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    from app import generate_company_summary
+
+    companies, histories = synthetic_companies(args.companies)
+
+    def single():
+        return [generate_company_summary(company, hist) for company, hist in zip(companies, histories)]
+
+    def batch():
+        return company_summaries(summary_columns(companies, histories))
+
+    table = summary_columns(companies, histories)
+    # Both print a line per company without enough data
+    with contextlib.redirect_stdout(io.StringIO()):
+        single_time = best_of(max(args.rounds // 5, 1), single)
+        batch_time = best_of(args.rounds, batch)
+    score_time = best_of(args.rounds, lambda: score_companies(table))
+    print(f"{args.companies} companies, {np.count_nonzero(~table['valid'])} with insufficient data")
+    print(f"{'generate_company_summary per company':<40}{single_time * 1000:>10.1f} ms")
+    print(f"{'summary_columns + company_summaries':<40}{batch_time * 1000:>10.1f} ms")
+    print(f"{'score_companies on a columnar table':<40}{score_time * 1000:>10.1f} ms")
+
+if __name__ == '__main__':
+    main()
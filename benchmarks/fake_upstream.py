@@ -0,0 +1,299 @@
+"""Local stand-in for the Yahoo Finance and Google Translate endpoints the apps call.
+
+One aiohttp server answers for every upstream host; upstream_redirect.py
+points the apps' HTTPS traffic at it and keeps the original Host header, which
+the server uses to count calls per host and endpoint.
+
+    fc.yahoo.com                /                                  consent cookie
+    query1/query2.finance...    /v1/test/getcrumb                  crumb
+                                /v10/finance/quoteSummary/{sym}    Ticker.info
+                                /ws/fundamentals-timeseries/...    Ticker.info (complementary fields)
+                                /v8/finance/chart/{sym}            Ticker.history
+                                /v1/finance/search                 company search
+    finance.yahoo.com           /quote/{sym}[/{kind}]              scraped HTML pages (stub_pages.py)
+    translate.google.com        /_/TranslateWebserverUi/data/batchexecute
+                                                                   googletrans RPC, '[ko] text' output
+
+Companies are the canned info dicts of fixtures/ticker_info.json; any other
+symbol borrows one of them under its own ticker, so any universe size works.
+Every call waits a latency drawn from --latency and fails with a 503 or a 429
+(with Retry-After) at the injected rates. --payload-scale multiplies the
+description and page filler sizes. Other paths, such as the guce.yahoo.com
+consent flow yfinance falls back to when it gets no crumb, answer 404 and are
+counted as 'unmatched'. GET /_fake/stats returns the call counts;
+POST /_fake/reset clears them.
+
+    python benchmarks/fake_upstream.py --port 8900 --latency lognormal:0.08,0.5 --error-rate 0.02 --throttle-rate 0.01
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import time
+import zlib
+
+from aiohttp import web
+
+from stub_pages import StubPages
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+INFO_FIXTURE = os.path.join(BENCH_DIR, 'fixtures', 'ticker_info.json')
+TICKER_MASTER = os.path.join(ROOT, 'data', 'tickers.csv')
+
+CRUMB = 'fakeCrumb0123'
+# Trading days in a chart range; 'max' and 'ytd' are approximated
+RANGE_DAYS = {'1d': 1, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126, 'ytd': 200, '1y': 252, '2y': 504,
+              '5y': 1260, '10y': 2520, 'max': 5040}
+INTERVAL_DAYS = {'1d': 1, '5d': 5, '1wk': 5, '1mo': 21, '3mo': 63}
+# quoteSummary modules the string fields of an info dict are served in; numbers go to financialData
+PROFILE_FIELDS = ('sector', 'industry', 'longBusinessSummary')
+QUOTE_TYPE_FIELDS = ('symbol', 'shortName', 'longName', 'quoteType', 'exchange', 'currency')
+
+class Latency:
+    """Upstream latency distribution parsed from 'fixed:S', 'uniform:LO,HI', 'lognormal:MEDIAN,SIGMA' or 'off'."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        kind, _, params = spec.partition(':')
+        values = [float(value) for value in params.split(',')] if params else []
+        if kind == 'off':
+            self.sample = lambda rng: 0.0
+        elif kind == 'fixed' and len(values) == 1:
+            self.sample = lambda rng: values[0]
+        elif kind == 'uniform' and len(values) == 2:
+            self.sample = lambda rng: rng.uniform(*values)
+        elif kind == 'lognormal' and len(values) == 2:
+            self.sample = lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+        else:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+class FakeUpstream:
+    def __init__(self, latency='fixed:0.05', error_rate=0.0, throttle_rate=0.0, payload_scale=1, seed=0):
+        self.latency = Latency(latency)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.payload_scale = payload_scale
+        self.rng = random.Random(seed)
+        self.pages = StubPages(filler_blocks=40 * payload_scale)
+        with open(INFO_FIXTURE, encoding='utf-8') as f:
+            self.infos = json.load(f)
+        self.templates = list(self.infos.values())
+        with open(TICKER_MASTER, encoding='utf-8') as f:
+            self.listings = list(csv.DictReader(f))
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.calls = {}      # 'host endpoint' -> count
+        self.statuses = {}   # status -> count
+
+    def config(self):
+        return {'latency': self.latency.spec, 'error_rate': self.error_rate,
+                'throttle_rate': self.throttle_rate, 'payload_scale': self.payload_scale}
+
+    def stats(self):
+        return {
+            'since': self.started,
+            'config': self.config(),
+            'total': sum(self.calls.values()),
+            'calls': dict(sorted(self.calls.items())),
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+
+    def info(self, symbol):
+        """The info dict served for a symbol: its fixture, or a template renamed to it."""
+        symbol = symbol.upper()
+        if symbol in self.infos:
+            info = dict(self.infos[symbol])
+        else:
+            template = self.templates[zlib.crc32(symbol.encode()) % len(self.templates)]
+            info = dict(template, symbol=symbol, shortName=f"{symbol} {template['shortName']}",
+                        longName=f"{symbol} {template['longName']}")
+        info['longBusinessSummary'] = ' '.join([info['longBusinessSummary']] * self.payload_scale)
+        return info
+
+    # Middleware: call accounting, latency and fault injection
+
+    @web.middleware
+    async def upstream_behaviour(self, request, handler):
+        if request.path.startswith('/_fake/'):
+            return await handler(request)
+        route = request.match_info.route.name or 'unmatched'
+        key = f"{request.host.split(':')[0]} {route}"
+        self.calls[key] = self.calls.get(key, 0) + 1
+        await asyncio.sleep(self.latency.sample(self.rng))
+        roll = self.rng.random()
+        if roll < self.throttle_rate:
+            response = web.Response(status=429, text='Too Many Requests', headers={'Retry-After': '1'})
+        elif roll < self.throttle_rate + self.error_rate:
+            response = web.Response(status=503, text='Service Unavailable')
+        else:
+            try:
+                response = await handler(request)
+            except web.HTTPException as e:
+                response = e
+        self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+        return response
+
+    # Yahoo Finance query APIs
+
+    async def cookie(self, request):
+        response = web.Response(text='')
+        response.set_cookie('A3', 'd=fake&S=fake', max_age=365 * 24 * 3600)
+        return response
+
+    async def crumb(self, request):
+        return web.Response(text=CRUMB)
+
+    async def quote_summary(self, request):
+        info = self.info(request.match_info['symbol'])
+        modules = {
+            'quoteType': {key: info[key] for key in QUOTE_TYPE_FIELDS if key in info},
+            'assetProfile': {key: info[key] for key in PROFILE_FIELDS if key in info},
+            'financialData': {key: value for key, value in info.items() if isinstance(value, (int, float))},
+            'summaryDetail': {'maxAge': 1},
+            'defaultKeyStatistics': {'maxAge': 1},
+        }
+        return web.json_response({'quoteSummary': {'result': [modules], 'error': None}})
+
+    async def timeseries(self, request):
+        symbol = request.match_info['symbol'].upper()
+        series = {'meta': {'symbol': [symbol], 'type': ['trailingPegRatio']}, 'timestamp': [int(time.time())]}
+        peg = self.info(symbol).get('pegRatio')
+        if peg is not None:
+            series['trailingPegRatio'] = [{'asOfDate': time.strftime('%Y-%m-%d'), 'reportedValue': {'raw': peg}}]
+        return web.json_response({'timeseries': {'result': [series], 'error': None}})
+
+    async def chart(self, request):
+        symbol = request.match_info['symbol'].upper()
+        info = self.info(symbol)
+        days = RANGE_DAYS.get(request.query.get('range', '1mo'), 21)
+        step = INTERVAL_DAYS.get(request.query.get('interval', '1d'), 1)
+        # Business days back from today at the 09:30 New York open
+        today = int(time.time() // 86400) * 86400 + 13 * 3600 + 1800
+        timestamps = []
+        day = today
+        while len(timestamps) < max(1, days // step):
+            if (day // 86400 + 3) % 7 < 5:
+                timestamps.append(day)
+            day -= 86400 * step if step > 1 else 86400
+        timestamps.reverse()
+        rng = random.Random(zlib.crc32(symbol.encode()))
+        price = info.get('currentPrice', 100.0)
+        closes = []
+        for _ in timestamps:
+            closes.append(round(price, 4))
+            price *= math.exp(rng.gauss(0, 0.015))
+        opens = [round(close * rng.uniform(0.99, 1.01), 4) for close in closes]
+        quote = {
+            'open': opens,
+            'high': [round(max(pair) * rng.uniform(1.0, 1.02), 4) for pair in zip(opens, closes)],
+            'low': [round(min(pair) * rng.uniform(0.98, 1.0), 4) for pair in zip(opens, closes)],
+            'close': closes,
+            'volume': [rng.randint(10 ** 5, 10 ** 8) for _ in closes],
+        }
+        meta = {
+            'currency': info.get('currency', 'USD'), 'symbol': symbol, 'exchangeName': info.get('exchange', 'NMS'),
+            'instrumentType': info.get('quoteType', 'EQUITY'), 'firstTradeDate': 345479400,
+            'regularMarketTime': timestamps[-1], 'gmtoffset': -14400, 'timezone': 'EDT',
+            'exchangeTimezoneName': 'America/New_York', 'regularMarketPrice': closes[-1],
+            'chartPreviousClose': closes[0], 'priceHint': 2,
+            'currentTradingPeriod': {
+                name: {'timezone': 'EDT', 'start': timestamps[-1] + offset, 'end': timestamps[-1] + offset + length,
+                       'gmtoffset': -14400}
+                for name, offset, length in (('pre', -19800, 19800), ('regular', 0, 23400), ('post', 23400, 14400))
+            },
+            'dataGranularity': request.query.get('interval', '1d'), 'range': request.query.get('range', '1mo'),
+            'validRanges': list(RANGE_DAYS),
+        }
+        result = {'meta': meta, 'timestamp': timestamps, 'events': {},
+                  'indicators': {'quote': [quote], 'adjclose': [{'adjclose': closes}]}}
+        return web.json_response({'chart': {'result': [result], 'error': None}})
+
+    async def search(self, request):
+        query = request.query.get('q', '').strip()
+        limit = int(request.query.get('quotesCount', 10))
+        needle = query.upper()
+        quotes = [
+            {'symbol': row['symbol'], 'shortname': row['name'], 'longname': row['name'],
+             'exchange': row['exchange'], 'quoteType': row['type']}
+            for row in self.listings
+            if row['symbol'].startswith(needle) or needle in row['name'].upper()
+        ][:limit]
+        if not quotes and needle.isalnum():
+            info = self.info(needle)
+            quotes = [{'symbol': needle, 'shortname': info['shortName'], 'longname': info['longName'],
+                       'exchange': info['exchange'], 'quoteType': info['quoteType']}]
+        return web.json_response({'count': len(quotes), 'quotes': quotes, 'news': []})
+
+    # finance.yahoo.com pages
+
+    async def page(self, request):
+        kind = request.match_info.get('kind', 'quote')
+        try:
+            body = self.pages.page(kind, request.match_info['symbol'])
+        except ValueError:
+            raise web.HTTPNotFound()
+        return web.Response(text=body, content_type='text/html')
+
+    # Google Translate
+
+    async def translate(self, request):
+        form = await request.post()
+        rpc = json.loads(form['f.req'])[0][0]
+        text, _, dest, _ = json.loads(rpc[1])[0]
+        # One part: googletrans joins parts with spaces, which would lose the line structure of a batch
+        translated = '\n'.join(f'[{dest}] {line}' for line in text.split('\n'))
+        parsed = [[None, None, 'en'],
+                  [[[None, None, None, True, None, [[translated, None]]]], dest, 1, 'en', [text, 'auto', dest, True]],
+                  'en']
+        envelope = json.dumps([['wrb.fr', rpc[0], json.dumps(parsed), None, None, None, 'generic']])
+        return web.Response(text=f")]}}'\n\n{len(envelope)}\n{envelope}\n", content_type='application/json')
+
+    # Control endpoints
+
+    async def get_stats(self, request):
+        return web.json_response(self.stats())
+
+    async def post_reset(self, request):
+        self.reset()
+        return web.json_response(self.stats())
+
+    def application(self):
+        app = web.Application(middlewares=[self.upstream_behaviour])
+        app.router.add_get('/', self.cookie, name='cookie')
+        app.router.add_get('/v1/test/getcrumb', self.crumb, name='crumb')
+        app.router.add_get('/v10/finance/quoteSummary/{symbol}', self.quote_summary, name='quoteSummary')
+        app.router.add_get('/ws/fundamentals-timeseries/v1/finance/timeseries/{symbol}', self.timeseries,
+                           name='timeseries')
+        app.router.add_get('/v8/finance/chart/{symbol}', self.chart, name='chart')
+        app.router.add_get('/v1/finance/search', self.search, name='search')
+        app.router.add_get('/quote/{symbol}', self.page, name='page')
+        app.router.add_get('/quote/{symbol}/{kind}', self.page, name='page_kind')
+        app.router.add_post('/_/TranslateWebserverUi/data/batchexecute', self.translate, name='translate')
+        app.router.add_get('/_fake/stats', self.get_stats)
+        app.router.add_post('/_fake/reset', self.post_reset)
+        return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', default='fixed:0.05',
+                        help="fixed:S, uniform:LO,HI, lognormal:MEDIAN,SIGMA or off (seconds)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of calls answered with a 503')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of calls answered with a 429')
+    parser.add_argument('--payload-scale', type=int, default=1, help='Multiplier of description and page sizes')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(args.latency, args.error_rate, args.throttle_rate, args.payload_scale, args.seed)
+    print(f"Fake upstream on http://{args.host}:{args.port} {upstream.config()}", flush=True)
+    web.run_app(upstream.application(), host=args.host, port=args.port, access_log=None, print=None)
+
+if __name__ == '__main__':
+    main()
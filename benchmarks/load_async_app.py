@@ -0,0 +1,143 @@
+"""Load test of the sync Flask app against the async aiohttp app.
+
+Both apps run under gunicorn (sync workers and aiohttp.GunicornWebWorker) with
+the yfinance calls replaced by stubs that sleep for a fixed latency and return
+synthetic data; a share of history downloads fails to exercise the retries.
+Every request asks for a different symbol, so each one goes "upstream". A
+driver keeps --clients requests in flight and reports throughput and latency
+percentiles.
+
+    python benchmarks/load_async_app.py --clients 200 --requests 1000 --workers 2
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+INFO_LATENCY = float(os.environ.get('LOAD_INFO_LATENCY', 0.1))
+HISTORY_LATENCY = float(os.environ.get('LOAD_HISTORY_LATENCY', 0.15))
+HISTORY_FAILURE_RATE = float(os.environ.get('LOAD_HISTORY_FAILURE_RATE', 0.1))
+
+def stub_info(symbol):
+    time.sleep(INFO_LATENCY)
+    return {
+        'shortName': f'{symbol} Corp', 'currentPrice': 100.0, 'marketCap': 2.5e11,
+        'trailingPE': 21.0, 'forwardPE': 18.0, 'profitMargins': 0.22, 'operatingMargins': 0.28,
+        'returnOnEquity': 0.31, 'revenueGrowth': 0.12, 'dividendYield': 0.011,
+        'sector': 'Technology', 'industry': 'Software', 'longBusinessSummary': 'Makes software. ' * 40,
+    }
+
+def stub_history(symbol, period, interval='1d'):
+    time.sleep(HISTORY_LATENCY)
+    if random.random() < HISTORY_FAILURE_RATE:
+        raise ConnectionError('Stubbed upstream failure')
+    index = pd.date_range('2024-01-02', periods=252, freq='B', tz='America/New_York')
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(len(symbol)).normal(0, 0.01, 252)))
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': np.full(252, 10 ** 6), 'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+
+def install_stubs():
+    os.environ.setdefault('HTTP_CACHE_MODE', 'off')
+    os.environ.setdefault('TRANSLATOR', 'stub')
+    import app
+    # Stubbed below the retry policy, so failed downloads are retried as in production
+    app.fetch_ticker_info = lambda symbol: app.call_yahoo(lambda: stub_info(symbol))
+    app.fetch_ticker_history = lambda symbol, period, interval='1d': app.call_yahoo(
+        lambda: stub_history(symbol, period, interval))
+    return app
+
+def stubbed_flask_app():
+    """gunicorn entry point: 'load_async_app:stubbed_flask_app()'."""
+    return install_stubs().app
+
+def stubbed_async_app():
+    """gunicorn entry point: 'load_async_app:stubbed_async_app()'."""
+    install_stubs()
+    import async_app
+    return async_app.create_app()
+
+SERVERS = {
+    'flask (sync workers)': ('stubbed_flask_app()', 'sync'),
+    'aiohttp (async)': ('stubbed_async_app()', 'aiohttp.GunicornWebWorker'),
+}
+
+def start_server(entry, worker_class, workers, port):
+    command = [sys.executable, '-m', 'gunicorn', f'load_async_app:{entry}', '--chdir', BENCH_DIR,
+               '--worker-class', worker_class, '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+               '--backlog', '2048', '--timeout', '120', '--log-level', 'warning']
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+async def wait_until_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f'{base_url}/api/rate-limits') as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not start')
+
+async def drive(base_url, clients, requests):
+    """Keep `clients` requests in flight until `requests` have completed."""
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def client(session):
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                async with session.get(f'{base_url}/api/analyze/SYM{i}') as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=300)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return np.array(latencies), errors, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes per app')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests from {args.clients} clients, {args.workers} workers; "
+          f"stub latency info {INFO_LATENCY}s, history {HISTORY_LATENCY}s, "
+          f"{HISTORY_FAILURE_RATE:.0%} history failures")
+    print(f"{'server':<22}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name, (entry, worker_class) in SERVERS.items():
+        server = start_server(entry, worker_class, args.workers, args.port)
+        try:
+            base_url = f'http://127.0.0.1:{args.port}'
+            asyncio.run(wait_until_ready(base_url))
+            latencies, errors, elapsed = asyncio.run(drive(base_url, args.clients, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        print(f"{name:<22}{args.requests / elapsed:>8.1f}{p50:>9.0f}{p95:>9.0f}{p99:>9.0f}{errors:>8}")
+
+if __name__ == '__main__':
+    main()
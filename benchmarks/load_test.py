@@ -0,0 +1,238 @@
+"""End-to-end load test of src/app.py and api/index.py against the fake upstream.
+
+Starts fake_upstream.py, then each selected app under gunicorn with its
+upstream traffic redirected to it (upstream_redirect.py) and empty caches in a
+scratch directory. A driver keeps --clients requests in flight over a fixed,
+seeded request mix: analyses of symbols drawn from a --symbols universe with
+Zipf popularity (--skew 0 is uniform), a --search-share of company searches,
+and a --translate-share asking for Korean. Reported per app:
+
+- throughput and latency percentiles of the client requests
+- non-2xx responses by status
+- upstream call amplification: calls the fake upstream received per client
+  request, in total and per host and endpoint
+
+    python benchmarks/load_test.py --apps app index --clients 32 --requests 2000 --workers 4
+    python benchmarks/load_test.py --latency lognormal:0.1,0.6 --error-rate 0.02 --throttle-rate 0.01
+    python benchmarks/load_test.py --upstream-rate 1000 --json load.json   # without the apps' rate limits
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+import aiohttp
+import numpy as np
+
+# module name under --pythonpath, and the request mix of each app
+APPS = {
+    'app': {
+        'module': 'app',
+        'analyze': '/api/analyze/{symbol}?lang={lang}',
+        'search': '/api/search?q={query}',
+    },
+    'index': {
+        'module': 'index',
+        'analyze': '/api/analyze?symbol={symbol}&lang={lang}',
+        'search': '/api/search?query={query}&lang={lang}',
+    },
+}
+FIXTURE_SYMBOLS = ('AAPL', 'MSFT', 'GOOGL', 'NVDA', 'META')
+
+def redirected_app(module):
+    """gunicorn entry point: 'load_test:redirected_app("app")', run in each worker."""
+    import importlib
+    import upstream_redirect
+    upstream_redirect.install(os.environ['FAKE_UPSTREAM_URL'])
+    import yfinance as yf
+    yf.set_tz_cache_location(os.path.join(os.environ['LOAD_TEST_DIR'], 'yfinance'))
+    rate = os.environ.get('LOAD_UPSTREAM_RATE')
+    if rate:
+        from rate_limiter import limiter, TRANSLATION_HOST, YAHOO_FINANCE_HOST, YAHOO_QUERY_HOST
+        for host in (YAHOO_FINANCE_HOST, YAHOO_QUERY_HOST, TRANSLATION_HOST):
+            limiter.configure(host, float(rate), max(1, int(float(rate))))
+    return importlib.import_module(module).app
+
+def request_mix(app, args):
+    """The paths of one run, the same for every app given the same arguments."""
+    rng = np.random.default_rng(args.seed)
+    universe = list(FIXTURE_SYMBOLS) + [f'T{i:05d}' for i in range(max(args.symbols - len(FIXTURE_SYMBOLS), 0))]
+    weights = 1.0 / np.arange(1, len(universe) + 1) ** args.skew
+    picks = rng.choice(len(universe), size=args.requests, p=weights / weights.sum())
+    searches = rng.random(args.requests) < args.search_share
+    korean = rng.random(args.requests) < args.translate_share
+    routes = APPS[app]
+    paths = []
+    for pick, search, ko in zip(picks, searches, korean):
+        symbol = universe[pick]
+        lang = 'ko' if ko else 'en'
+        template = routes['search'] if search else routes['analyze']
+        paths.append(template.format(symbol=symbol, query=symbol, lang=lang))
+    return paths
+
+def server_env(args, scratch, upstream_url):
+    env = dict(os.environ)
+    env.update({
+        'FAKE_UPSTREAM_URL': upstream_url,
+        'LOAD_TEST_DIR': scratch,
+        'TRANSLATOR': 'google',
+        'HTTP_CACHE_MODE': 'normal',
+        'HTTP_CACHE_PATH': os.path.join(scratch, 'http_cache.sqlite'),
+        'SHARED_CACHE_URL': f"sqlite:///{os.path.join(scratch, 'shared_cache.sqlite')}",
+        'TRANSLATION_STORE_PATH': os.path.join(scratch, 'translations.sqlite'),
+        'TICKER_LEARNED_PATH': os.path.join(scratch, 'tickers_learned.csv'),
+        'HISTORY_DB_PATH': os.path.join(scratch, 'history.sqlite'),
+    })
+    if args.upstream_rate:
+        env['LOAD_UPSTREAM_RATE'] = str(args.upstream_rate)
+    return env
+
+def start_upstream(args):
+    command = [sys.executable, os.path.join(BENCH_DIR, 'fake_upstream.py'), '--port', str(args.upstream_port),
+               '--latency', args.latency, '--error-rate', str(args.error_rate),
+               '--throttle-rate', str(args.throttle_rate), '--payload-scale', str(args.payload_scale)]
+    return subprocess.Popen(command, cwd=BENCH_DIR, stdout=subprocess.DEVNULL)
+
+def start_app(app, args, env):
+    command = [sys.executable, '-m', 'gunicorn', f'load_test:redirected_app("{APPS[app]["module"]}")',
+               '--pythonpath', ','.join([BENCH_DIR, os.path.join(ROOT, 'src'), os.path.join(ROOT, 'api')]),
+               '--chdir', ROOT, '--worker-class', args.worker_class, '--workers', str(args.workers),
+               '--threads', str(args.threads), '--bind', f'127.0.0.1:{args.port}', '--backlog', '2048',
+               '--timeout', '60', '--log-level', 'warning']
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+
+async def wait_until_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'{url} did not come up')
+
+async def upstream_control(upstream_url, action):
+    async with aiohttp.ClientSession() as session:
+        method = session.post if action == 'reset' else session.get
+        async with method(f'{upstream_url}/_fake/{action}') as response:
+            return await response.json()
+
+async def drive(base_url, paths, clients):
+    """Keep `clients` requests in flight until every path has been requested."""
+    latencies, statuses = [], {}
+    pending = iter(paths)
+
+    async def client(session):
+        for path in pending:
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url + path) as response:
+                    await response.read()
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return np.array(latencies), statuses, elapsed
+
+def run_app(app, args, upstream_url):
+    with tempfile.TemporaryDirectory(prefix=f'load-{app}-') as scratch:
+        server = start_app(app, args, server_env(args, scratch, upstream_url))
+        base_url = f'http://127.0.0.1:{args.port}'
+        try:
+            asyncio.run(wait_until_ready(f'{base_url}/api/rate-limits'))
+            if args.warmup:
+                asyncio.run(drive(base_url, request_mix(app, args)[:args.warmup], args.clients))
+            asyncio.run(upstream_control(upstream_url, 'reset'))
+            latencies, statuses, elapsed = asyncio.run(drive(base_url, request_mix(app, args), args.clients))
+            upstream = asyncio.run(upstream_control(upstream_url, 'stats'))
+        finally:
+            server.terminate()
+            server.wait()
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        'app': app,
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(p50, 1),
+        'p95_ms': round(p95, 1),
+        'p99_ms': round(p99, 1),
+        'max_ms': round(latencies.max() * 1000, 1),
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'upstream_calls': upstream['total'],
+        'amplification': round(upstream['total'] / len(latencies), 3),
+        'upstream': upstream,
+    }
+
+def report(results):
+    print(f"{'app':<8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'non-2xx':>9}{'upstream':>10}{'per req':>9}")
+    for result in results:
+        failed = sum(count for status, count in result['statuses'].items() if not status.startswith('2'))
+        print(f"{result['app']:<8}{result['throughput']:>8.1f}{result['p50_ms']:>9.0f}{result['p95_ms']:>9.0f}"
+              f"{result['p99_ms']:>9.0f}{failed:>9}{result['upstream_calls']:>10}{result['amplification']:>9.2f}")
+    for result in results:
+        print(f"\n{result['app']}: responses {result['statuses']}, upstream statuses {result['upstream']['statuses']}")
+        for endpoint, count in result['upstream']['calls'].items():
+            print(f"  {endpoint:<48}{count:>7}{count / result['requests']:>8.2f}/req")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apps', nargs='+', choices=sorted(APPS), default=sorted(APPS))
+    parser.add_argument('--clients', type=int, default=16, help='Requests kept in flight')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=0, help='Requests sent before measuring (same mix)')
+    parser.add_argument('--symbols', type=int, default=200, help='Size of the symbol universe')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of symbol popularity')
+    parser.add_argument('--search-share', type=float, default=0.2)
+    parser.add_argument('--translate-share', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--worker-class', default='sync')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--upstream-port', type=int, default=8900)
+    parser.add_argument('--upstream-rate', type=float,
+                        help="Replace the apps' per-host rate limits with this many requests per second")
+    parser.add_argument('--latency', default='lognormal:0.08,0.5', help='Fake upstream latency distribution')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--payload-scale', type=int, default=1)
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    upstream_url = f'http://127.0.0.1:{args.upstream_port}'
+    upstream = start_upstream(args)
+    try:
+        asyncio.run(wait_until_ready(f'{upstream_url}/_fake/stats'))
+        print(f"{args.requests} requests from {args.clients} clients over {args.symbols} symbols "
+              f"(skew {args.skew}), {args.workers} {args.worker_class} workers x {args.threads} threads; "
+              f"upstream latency {args.latency}, {args.error_rate:.0%} errors, {args.throttle_rate:.0%} throttled")
+        results = [run_app(app, args, upstream_url) for app in args.apps]
+    finally:
+        upstream.terminate()
+        upstream.wait()
+
+    report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'arguments': vars(args), 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Deterministic stand-ins for the Yahoo Finance quote, key-statistics and profile pages.
+
+Pages are rendered from a recorded scrape in data/ so that parsing them yields the
+same fields the real scraper produced. Symbols that are not in the recording reuse
+a template company under their own ticker, which lets benchmarks scale to any
+universe size.
+"""
+import glob
+import html
+import json
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_GLOB = os.path.join(ROOT, 'data', 'company_data_*.json')
+
+# Markup that surrounds the interesting nodes on the real pages
+FILLER_BLOCK = (
+    '<div class="nav-item"><a href="/markets/">Markets</a><span class="badge">Live</span>'
+    '<ul><li><a href="/quote/%5EGSPC">S&amp;P 500</a></li><li><a href="/quote/%5EDJI">Dow 30</a></li>'
+    '<li><a href="/quote/%5EIXIC">Nasdaq</a></li></ul></div>'
+    '<!-- <table><tr><td>commented</td><td>out</td></tr></table> -->'
+    '<script>window.__stub = {"section": "nav", "html": "<table><tr><td>x</td></tr></table>"};</script>\n'
+)
+
+def load_recorded_companies():
+    """Return the most recent recorded scrape as {symbol: data}."""
+    paths = sorted(glob.glob(DATA_GLOB))
+    with open(paths[-1], 'r') as f:
+        return json.load(f)
+
+class StubPages:
+    """Render quote, key-statistics and profile HTML for any symbol."""
+
+    def __init__(self, companies=None, filler_blocks=40):
+        self.companies = companies or load_recorded_companies()
+        self.template_symbol = next(iter(self.companies))
+        self.filler = FILLER_BLOCK * filler_blocks
+
+    def company(self, symbol):
+        return self.companies.get(symbol, self.companies[self.template_symbol])
+
+    def _page(self, title, body):
+        return (
+            f'<!DOCTYPE html><html><head><title>{html.escape(title)}</title></head><body>'
+            f'<header>{self.filler}</header><main>{body}</main><footer>{self.filler}</footer>'
+            '</body></html>'
+        )
+
+    def quote(self, symbol):
+        data = self.company(symbol)
+        body = (
+            f'<h1>{html.escape(symbol)}</h1>'
+            f'<fin-streamer data-symbol="{html.escape(symbol)}" data-field="regularMarketChange">+1.05</fin-streamer>'
+            f'<fin-streamer data-symbol="{html.escape(symbol)}" data-field="regularMarketPrice">'
+            f'{html.escape(data.get("current_price", ""))}</fin-streamer>'
+        )
+        return self._page(f'{symbol} Stock Price', body)
+
+    def statistics(self, symbol):
+        data = self.company(symbol)
+        skipped = ('current_price', 'company_description', 'employees')
+        rows = ''.join(
+            f'<tr><td><span>{html.escape(key)}</span> <!-- note --></td>\n  <td> {html.escape(value)} </td></tr>'
+            for key, value in data.items() if key not in skipped
+        )
+        body = (
+            '<table class="layout"><tr><th>Summary</th></tr><tr><td>Statistics &amp; ratios</td></tr></table>'
+            '<section><h2>Valuation Measures</h2>'
+            f'<table><thead><tr><th>Metric</th><th>Value</th></tr></thead><tbody>{rows}</tbody></table>'
+            '</section>'
+        )
+        return self._page(f'{symbol} Key Statistics', body)
+
+    def profile(self, symbol):
+        data = self.company(symbol)
+        description = data.get('company_description', f"{symbol} is a stub company served for offline benchmarks.")
+        body = (
+            '<section><div><span>Sector(s)</span>: <span>Technology</span></div>'
+            '<div><span>Full Time Employees</span>: '
+            f'<span>{html.escape(data.get("employees", "1,000"))}</span></div>'
+            f'<p class="Mt(15px) Lh(1.6)">{html.escape(description)}</p></section>'
+        )
+        return self._page(f'{symbol} Profile', body)
+
+    def page(self, kind, symbol):
+        """Render a page by kind: 'quote', 'key-statistics' or 'profile'."""
+        if kind == 'quote':
+            return self.quote(symbol)
+        if kind == 'key-statistics':
+            return self.statistics(symbol)
+        if kind == 'profile':
+            return self.profile(symbol)
+        raise ValueError(f"Unknown page kind: {kind}")
+
+PAGE_KINDS = ('quote', 'key-statistics', 'profile')
+
+def write_fixtures(directory, symbols=None, filler_blocks=40):
+    """Save rendered pages as <symbol>_<kind>.html for parse-only benchmarks."""
+    pages = StubPages(filler_blocks=filler_blocks)
+    os.makedirs(directory, exist_ok=True)
+    for symbol in symbols or pages.companies:
+        for kind in PAGE_KINDS:
+            with open(os.path.join(directory, f"{symbol}_{kind}.html"), 'w', encoding='utf-8') as f:
+                f.write(pages.page(kind, symbol))
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Write stub pages to a fixture directory.')
+    parser.add_argument('directory', nargs='?', default=os.path.join(ROOT, 'benchmarks', 'fixtures', 'pages'))
+    parser.add_argument('--filler-blocks', type=int, default=40)
+    args = parser.parse_args()
+    write_fixtures(args.directory, filler_blocks=args.filler_blocks)
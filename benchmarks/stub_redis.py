@@ -0,0 +1,99 @@
+"""In-memory stand-in for a Redis server, for trying the shared cache's redis backend locally.
+
+Speaks enough of the Redis protocol for shared_cache.RedisBackend: PING, AUTH,
+SELECT, GET, SET (with EX/PX), DEL, DBSIZE and FLUSHDB. Keys expire lazily.
+
+    python benchmarks/stub_redis.py --port 6390
+    SHARED_CACHE_URL=redis://127.0.0.1:6390/0 python src/app.py
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+class StubRedis:
+    def __init__(self):
+        self.data = {}  # key -> (value, expires_at or None)
+
+    def _alive(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, args):
+        command = args[0].upper()
+        if command in (b'PING', b'AUTH', b'SELECT'):
+            return b'+PONG\r\n' if command == b'PING' else b'+OK\r\n'
+        if command == b'GET':
+            entry = self._alive(args[1])
+            if entry is None:
+                return b'$-1\r\n'
+            return b'$%d\r\n%s\r\n' % (len(entry[0]), entry[0])
+        if command == b'SET':
+            expires_at = None
+            options = [arg.upper() for arg in args[3:]]
+            for unit, scale in ((b'EX', 1.0), (b'PX', 0.001)):
+                if unit in options:
+                    expires_at = time.monotonic() + int(args[3 + options.index(unit) + 1]) * scale
+            self.data[args[1]] = (args[2], expires_at)
+            return b'+OK\r\n'
+        if command == b'DEL':
+            removed = 0
+            for key in args[1:]:
+                if self._alive(key) is not None:
+                    del self.data[key]
+                    removed += 1
+            return b':%d\r\n' % removed
+        if command == b'DBSIZE':
+            return b':%d\r\n' % sum(1 for key in list(self.data) if self._alive(key) is not None)
+        if command == b'FLUSHDB':
+            self.data.clear()
+            return b'+OK\r\n'
+        return b'-ERR unknown command\r\n'
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self.execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(port, ready=None):
+    stub = StubRedis()
+    server = await asyncio.start_server(stub.handle, '127.0.0.1', port)
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+def start_stub_redis(port=0):
+    """Start the stand-in on a background thread and return its redis:// URL."""
+    started = threading.Event()
+    state = {}
+
+    def ready(bound_port):
+        state['port'] = bound_port
+        started.set()
+
+    threading.Thread(target=lambda: asyncio.run(serve(port, ready)), daemon=True).start()
+    started.wait()
+    return f"redis://127.0.0.1:{state['port']}/0"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+    print(f"Stub Redis listening on redis://127.0.0.1:{args.port}/0")
+    asyncio.run(serve(args.port))
@@ -0,0 +1,299 @@
+"""Micro-benchmarks of the parsing, formatting and summary hot paths, with JSON results.
+
+Every case runs at each --sizes value, a number of companies from 5 to 10,000.
+Inputs are built from recorded fixtures before the clock starts: the saved
+Yahoo pages in fixtures/pages and the yfinance info dicts in
+fixtures/ticker_info.json, cycled and perturbed with a fixed seed, plus
+seeded one-year price histories.
+
+    scrape_parse        company_scraper page extraction (quote, statistics, profile)
+    company_data        field formatting of app.load_company_data from a canned info dict
+    company_summary     app.generate_company_summary
+    company_summary_batch  summary_scoring over the same companies, table building included
+    analysis_summary    api/index.generate_analysis_summary
+    history_records     formatting and JSON of the price history, as /api/analyze sends it
+    history_columns     the same with history=columns
+    clean_numeric       normalize.clean_numeric_frame over companies x 60 display strings
+    charts              analysis_charts.render_charts (four PNGs)
+
+A case repeats until it has run for --min-time seconds (at least once, at most
+--max-rounds times). Results go to benchmarks/results/<commit>.json; compare
+two runs with --compare, which exits with status 1 when a case got slower by
+more than --threshold.
+
+    python benchmarks/suite.py --sizes 5 100 1000 10000
+    python benchmarks/suite.py --cases company_summary history_records --sizes 10000
+    python benchmarks/suite.py --compare benchmarks/results/a1b2c3d.json benchmarks/results/e4f5a6b.json
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+# Nothing here may touch the network or the on-disk caches
+os.environ.setdefault('HTTP_CACHE_MODE', 'off')
+os.environ.setdefault('TRANSLATOR', 'stub')
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+
+from bench_normalize import synthetic_frame
+from bench_parsers import FIXTURE_DIR, load_fixtures
+
+INFO_FIXTURE = os.path.join(BENCH_DIR, 'fixtures', 'ticker_info.json')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_SIZES = [5, 100, 1000]
+HISTORY_ROWS = 252
+
+CASES = {}
+
+def case(name):
+    """Register a case: setup(size) builds the inputs and returns the function to time."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+def canned_infos(size, seed=0):
+    """size info dicts cycled from the fixture, numbers scaled by up to +-20%."""
+    with open(INFO_FIXTURE, encoding='utf-8') as f:
+        fixtures = list(json.load(f).values())
+    rng = np.random.default_rng(seed)
+    infos = {}
+    for i in range(size):
+        info = copy.deepcopy(fixtures[i % len(fixtures)])
+        for key, value in info.items():
+            if isinstance(value, float):
+                info[key] = value * rng.uniform(0.8, 1.2)
+        info['symbol'] = f"{info['symbol']}{i}"
+        infos[info['symbol']] = info
+    return infos
+
+def synthetic_history(seed, rows=HISTORY_ROWS):
+    """One year of daily prices as yfinance returns them (tz-aware index, float prices)."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-02', periods=rows, freq='B', tz='America/New_York')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, rows)))
+    return pd.DataFrame({
+        'Open': close * rng.uniform(0.99, 1.01, rows),
+        'High': close * rng.uniform(1.0, 1.03, rows),
+        'Low': close * rng.uniform(0.97, 1.0, rows),
+        'Close': close,
+        'Volume': rng.integers(10 ** 5, 10 ** 8, rows),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=index)
+
+def formatted_companies(size):
+    """(company_data, formatted history) pairs as the analyze endpoint has them."""
+    import app
+    infos = canned_infos(size)
+    app.fetch_ticker_info = infos.__getitem__
+    companies = [app.load_company_data(symbol) for symbol in infos]
+    histories = [app.format_history(synthetic_history(i)) for i in range(size)]
+    return list(zip(companies, histories))
+
+@case('scrape_parse')
+def scrape_parse(size):
+    import company_scraper
+    fixtures = list(load_fixtures(FIXTURE_DIR).items())
+    pages = [fixtures[i % len(fixtures)] for i in range(size)]
+
+    def run():
+        for symbol, page in pages:
+            data = {}
+            company_scraper.parse_quote_page(page['quote'], symbol, data)
+            company_scraper.parse_statistics_page(page['key-statistics'], data)
+            company_scraper.parse_profile_page(page['profile'], data)
+    return run
+
+@case('company_data')
+def company_data(size):
+    import app
+    infos = canned_infos(size)
+    # With HTTP_CACHE_MODE=off memoize calls the loader, which returns the canned dict
+    app.fetch_ticker_info = infos.__getitem__
+    symbols = list(infos)
+
+    def run():
+        for symbol in symbols:
+            app.load_company_data(symbol)
+    return run
+
+@case('company_summary')
+def company_summary(size):
+    import app
+    pairs = formatted_companies(size)
+
+    def run():
+        for company, hist in pairs:
+            app.generate_company_summary(company, hist)
+    return run
+
+@case('company_summary_batch')
+def company_summary_batch(size):
+    from summary_scoring import company_summaries, summary_columns
+    companies, histories = zip(*formatted_companies(size))
+
+    def run():
+        company_summaries(summary_columns(companies, histories))
+    return run
+
+@case('analysis_summary')
+def analysis_summary(size):
+    import index
+    pairs = [(info, synthetic_history(i)) for i, info in enumerate(canned_infos(size).values())]
+
+    def run():
+        for info, hist in pairs:
+            index.generate_analysis_summary(info, hist)
+    return run
+
+def history_case(columnar):
+    def setup(size):
+        import app
+        from serialization import encode_json, history_columns, history_records
+        raw = [synthetic_history(i) for i in range(size)]
+
+        def run():
+            for hist in raw:
+                columns = history_columns(app.format_history(hist.copy()))
+                encode_json(columns if columnar else history_records(columns))
+        return run
+    return setup
+
+case('history_records')(history_case(columnar=False))
+case('history_columns')(history_case(columnar=True))
+
+@case('clean_numeric')
+def clean_numeric(size):
+    from normalize import clean_numeric_frame
+    frame = synthetic_frame(size, 60)
+    return lambda: clean_numeric_frame(frame)
+
+@case('charts')
+def charts(size):
+    import analysis_charts
+    infos = canned_infos(size)
+    df = pd.DataFrame({
+        'Market Cap': [info['marketCap'] for info in infos.values()],
+        'Revenue (TTM)': [info['totalRevenue'] for info in infos.values()],
+        'Operating Margin': [info['operatingMargins'] * 100 for info in infos.values()],
+        'P/E Ratio': [info['trailingPE'] for info in infos.values()],
+        'Total Cash': [info['freeCashflow'] for info in infos.values()],
+        'Total Debt': [info['enterpriseValue'] - info['marketCap'] for info in infos.values()],
+        'ROE': [info['returnOnEquity'] * 100 for info in infos.values()],
+    }, index=list(infos))
+    output_dir = tempfile.mkdtemp(prefix='bench-charts-')
+    return lambda: analysis_charts.render_charts(df, output_dir)
+
+def measure(func, min_time, max_rounds):
+    timings = []
+    while not timings or (sum(timings) < min_time and len(timings) < max_rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD'], cwd=ROOT).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+def run(cases, sizes, min_time, max_rounds):
+    results = []
+    print(f"{'case':<22}{'size':>7}{'rounds':>8}{'median ms':>12}{'min ms':>10}{'us/company':>12}")
+    for name in cases:
+        for size in sizes:
+            func = CASES[name](size)
+            func()  # warm-up: imports, caches, first-call allocations
+            timings = measure(func, min_time, max_rounds)
+            median = statistics.median(timings)
+            result = {
+                'case': name,
+                'size': size,
+                'rounds': len(timings),
+                'median_s': median,
+                'min_s': min(timings),
+                'mean_s': statistics.fmean(timings),
+                'us_per_company': median * 1e6 / size,
+            }
+            results.append(result)
+            print(f"{name:<22}{size:>7}{len(timings):>8}{median * 1000:>12.2f}{min(timings) * 1000:>10.2f}"
+                  f"{result['us_per_company']:>12.1f}")
+    return results
+
+def compare(base_path, head_path, threshold):
+    """Print per-case timing ratios of two result files; returns the number of regressions."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+    base_results = {(r['case'], r['size']): r for r in base['results']}
+    print(f"{base['commit']} -> {head['commit']}")
+    print(f"{'case':<22}{'size':>7}{'base ms':>11}{'head ms':>11}{'ratio':>8}")
+    regressions = 0
+    for result in head['results']:
+        before = base_results.get((result['case'], result['size']))
+        if before is None:
+            continue
+        ratio = result['median_s'] / before['median_s']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  slower'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = '  faster'
+        print(f"{result['case']:<22}{result['size']:>7}{before['median_s'] * 1000:>11.2f}"
+              f"{result['median_s'] * 1000:>11.2f}{ratio:>8.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help='Numbers of companies to run each case with (5 to 10000)')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds to repeat each case for')
+    parser.add_argument('--max-rounds', type=int, default=50)
+    parser.add_argument('--output', help='Result file (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help='Compare two result files')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    commit = git_revision()
+    results = run(args.cases, args.sizes, args.min_time, args.max_rounds)
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'results': results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == '__main__':
+    main()
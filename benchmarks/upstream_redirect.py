@@ -0,0 +1,52 @@
+"""Send the apps' upstream HTTPS traffic to a local fake upstream (fake_upstream.py).
+
+yfinance and googletrans have no setting for their base URLs, so install()
+rewrites requests at the transport level instead: every request that requests
+(yfinance, http_cache) or httpx (googletrans) sends to a Yahoo or Google
+Translate host goes to the fake server over plain HTTP, with the original Host
+header kept. Rate limiting, retries and circuit breakers still see the real
+host names. Only for load tests; nothing in src/ imports this.
+"""
+from urllib.parse import urlsplit
+
+REDIRECTED_DOMAINS = ('yahoo.com', 'translate.google.com', 'translate.googleapis.com')
+
+def redirect_target(url, base_url):
+    """(new URL, original host) for a URL of a redirected host, else (None, None)."""
+    parts = urlsplit(str(url))
+    host = parts.hostname or ''
+    if not any(host == domain or host.endswith('.' + domain) for domain in REDIRECTED_DOMAINS):
+        return None, None
+    path = parts.path or '/'
+    return f"{base_url}{path}{'?' + parts.query if parts.query else ''}", host
+
+def install(base_url):
+    """Patch requests and httpx so that upstream calls go to base_url ('http://127.0.0.1:8900')."""
+    base_url = base_url.rstrip('/')
+    import requests.adapters
+
+    send = requests.adapters.HTTPAdapter.send
+
+    def redirected_send(self, request, *args, **kwargs):
+        url, host = redirect_target(request.url, base_url)
+        if url:
+            request.url = url
+            request.headers['Host'] = host
+        return send(self, request, *args, **kwargs)
+
+    requests.adapters.HTTPAdapter.send = redirected_send
+
+    try:
+        import httpx
+    except ImportError:
+        return
+    client_send = httpx.Client.send
+
+    def redirected_client_send(self, request, *args, **kwargs):
+        url, host = redirect_target(request.url, base_url)
+        if url:
+            request.url = httpx.URL(url)
+            request.headers['Host'] = host
+        return client_send(self, request, *args, **kwargs)
+
+    httpx.Client.send = redirected_client_send
@@ -1,3 +1,6 @@
+// Search and analysis responses carry ETags and Cache-Control, so the browser's HTTP
+// cache serves repeat views and revalidates them with If-None-Match on its own.
+// Streams and translation jobs change while they are read and bypass the cache.
 class API {
     constructor() {
         this.baseUrl = CONFIG.API_BASE_URL;
@@ -16,16 +19,118 @@ class API {
         }
     }
 
-    async analyzeCompany(symbol, language = 'en') {
+    // With onTranslated, the analysis comes back in English right away and
+    // onTranslated(fields) is called once the translations are ready
+    async analyzeCompany(symbol, language = 'en', onTranslated = null) {
         try {
-            const response = await fetch(`${this.baseUrl}${CONFIG.ENDPOINTS.ANALYZE}/${symbol}?lang=${language}`);
+            const background = onTranslated && language !== 'en';
+            const mode = background ? '&translate=async' : '';
+            const response = await fetch(`${this.baseUrl}${CONFIG.ENDPOINTS.ANALYZE}/${symbol}?lang=${language}&history=columns${mode}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
-            return await response.json();
+            const data = await response.json();
+            if (background && data.translation && data.translation.status === 'pending') {
+                this.followTranslation(data.translation, onTranslated);
+            }
+            return data;
         } catch (error) {
             console.error('Analysis error:', error);
             throw error;
         }
     }
+
+    static canStream() {
+        return typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined';
+    }
+
+    // Streamed analysis: onSection is called with each {section, data} or
+    // {section, error} line as the server sends it
+    async analyzeCompanyStream(symbol, language, onSection) {
+        const response = await fetch(`${this.baseUrl}${CONFIG.ENDPOINTS.ANALYZE}/${symbol}/stream?lang=${language}`, { cache: 'no-store' });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let ended = false;
+        while (true) {
+            const { value, done } = await reader.read();
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (!line) continue;
+                const message = JSON.parse(line);
+                if (message.section === 'end') {
+                    ended = true;
+                } else {
+                    onSection(message);
+                }
+            }
+            if (done) break;
+        }
+        if (!ended) {
+            throw new Error('The analysis stream ended early');
+        }
+    }
+
+    followTranslation(job, onTranslated) {
+        if (typeof EventSource === 'undefined') {
+            this.pollTranslation(job, onTranslated);
+            return;
+        }
+        const source = new EventSource(`${this.baseUrl}${job.events}`);
+        source.addEventListener('translation', event => {
+            source.close();
+            onTranslated(JSON.parse(event.data).fields);
+        });
+        // The server ends the stream after a while; polling takes over
+        source.addEventListener('timeout', () => {
+            source.close();
+            this.pollTranslation(job, onTranslated);
+        });
+        source.onerror = () => {
+            source.close();
+            this.pollTranslation(job, onTranslated);
+        };
+    }
+
+    async pollTranslation(job, onTranslated, attempts = 30) {
+        for (let attempt = 0; attempt < attempts; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, CONFIG.TRANSLATION_POLL_MS));
+            try {
+                const response = await fetch(`${this.baseUrl}${job.url}`, { cache: 'no-store' });
+                if (!response.ok) {
+                    return;
+                }
+                const result = await response.json();
+                if (result.status !== 'pending') {
+                    onTranslated(result.fields);
+                    return;
+                }
+            } catch (error) {
+                console.error('Translation polling error:', error);
+            }
+        }
+    }
+
+    // Fill translated fields ({'company_data.Sector': ..., 'summary.insights.0': ...}) into an analysis
+    static applyTranslations(data, fields) {
+        Object.entries(fields).forEach(([path, text]) => {
+            const dot = path.indexOf('.');
+            const section = path.slice(0, dot);
+            const key = path.slice(dot + 1);
+            if (section === 'company_data') {
+                data.company_data[key] = text;
+            } else if (key === 'overall') {
+                data.summary.overall = text;
+            } else {
+                data.summary.insights[parseInt(key.split('.')[1], 10)] = text;
+            }
+        });
+        return data;
+    }
 }
@@ -14,6 +14,9 @@ const CONFIG = {
         modeBarButtonsToRemove: ['lasso2d', 'select2d']
     },
     
+    // How often to ask for background translations when server-sent events are unavailable
+    TRANSLATION_POLL_MS: 1000,
+
     // Language settings
     DEFAULT_LANGUAGE: 'en',
     TRANSLATIONS: {
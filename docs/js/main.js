@@ -22,42 +22,60 @@ $(document).ready(function() {
         }
     });
 
-    function displayCompanyInfo(data) {
-        chartData = data.stock_history;
+    function renderCompanyData(companyData) {
+        $('#companyDescription').text(companyData['Company Description']);
+        
+        $('#profitMargin').text(companyData['Profit Margin']);
+        $('#peRatio').text(companyData['Trailing P/E'] === 'N/A' ? 'N/A' : parseFloat(companyData['Trailing P/E']).toFixed(2));
+        $('#marketCap').text(companyData['Market Cap']);
+        $('#revenueGrowth').text(companyData['Quarterly Revenue Growth  (yoy)']);
 
-        $('#companyDescription').text(data.company_data['Company Description']);
+        const translations = CONFIG.TRANSLATIONS[currentLanguage];
+        let tableHtml = '<table class="table table-striped">';
+        tableHtml += `<thead><tr><th>${translations.METRIC_LABEL}</th><th>${translations.VALUE_LABEL}</th></tr></thead><tbody>`;
+        
+        Object.entries(companyData).forEach(([key, value]) => {
+            if (key !== 'Company Description') {
+                tableHtml += `<tr><td>${key}</td><td>${value}</td></tr>`;
+            }
+        });
         
-        $('#profitMargin').text(data.company_data['Profit Margin']);
-        $('#peRatio').text(data.company_data['Trailing P/E'] === 'N/A' ? 'N/A' : parseFloat(data.company_data['Trailing P/E']).toFixed(2));
-        $('#marketCap').text(data.company_data['Market Cap']);
-        $('#revenueGrowth').text(data.company_data['Quarterly Revenue Growth  (yoy)']);
+        tableHtml += '</tbody></table>';
+        $('#financialDetails').html(tableHtml);
+    }
 
-        $('#overallSummary').text(data.summary);
+    function renderSummary(summary) {
+        $('#overallSummary').text(summary.overall || summary);
         
         const insightsList = $('#insights');
         insightsList.empty();
-        if (data.summary.insights) {
-            data.summary.insights.forEach(insight => {
+        if (summary.insights) {
+            summary.insights.forEach(insight => {
                 insightsList.append(`<li class="list-group-item">${insight}</li>`);
             });
         }
+    }
 
-        if (chartData && chartData.length > 0) {
-            const dates = chartData.map(item => item.Date);
-            const prices = chartData.map(item => item.Close);
+    function renderChart(stockHistory, name) {
+        chartData = stockHistory;
+
+        // stock_history comes in columns: one array per field
+        if (chartData && chartData.Date && chartData.Date.length > 0) {
+            const dates = chartData.Date;
+            const prices = chartData.Close;
 
             const trace = {
                 x: dates,
                 y: prices,
                 type: 'scatter',
                 mode: 'lines',
-                name: data.company_data.name || currentSymbol
+                name: name || currentSymbol
             };
 
             const translations = CONFIG.TRANSLATIONS[currentLanguage];
             const layout = {
                 title: {
-                    text: `${data.company_data.name || currentSymbol} ${translations.CHART_TITLE}`,
+                    text: `${name || currentSymbol} ${translations.CHART_TITLE}`,
                     font: { size: 18 }
                 },
                 xaxis: { 
@@ -77,19 +95,54 @@ $(document).ready(function() {
             const translations = CONFIG.TRANSLATIONS[currentLanguage];
             $('#stockChart').html(`<div class="alert alert-warning">${translations.NO_DATA}</div>`);
         }
+    }
 
-        const translations = CONFIG.TRANSLATIONS[currentLanguage];
-        let tableHtml = '<table class="table table-striped">';
-        tableHtml += `<thead><tr><th>${translations.METRIC_LABEL}</th><th>${translations.VALUE_LABEL}</th></tr></thead><tbody>`;
-        
-        Object.entries(data.company_data).forEach(([key, value]) => {
-            if (key !== 'Company Description') {
-                tableHtml += `<tr><td>${key}</td><td>${value}</td></tr>`;
+    function displayCompanyInfo(data) {
+        renderCompanyData(data.company_data);
+        renderSummary(data.summary);
+        renderChart(data.stock_history, data.company_data.name);
+    }
+
+    function showSectionError(message) {
+        $('#company-info').append(`<div class="alert alert-danger">${message}</div>`);
+    }
+
+    // Render each section of the streamed analysis as it arrives. Used when the
+    // complete analysis fails: the stream still shows the sections that load.
+    async function analyzeCompanyStreaming(symbol, language) {
+        const data = { company_data: null, stock_history: null, summary: null };
+        const isCurrent = () => currentSymbol === symbol && currentLanguage === language;
+
+        await api.analyzeCompanyStream(symbol, language, message => {
+            if (!isCurrent()) return;
+            if (message.error) {
+                showSectionError(message.error);
+                return;
+            }
+            switch (message.section) {
+                case 'company_data':
+                    data.company_data = message.data;
+                    $('#analysisContainer').show();
+                    hideLoading();
+                    renderCompanyData(data.company_data);
+                    break;
+                case 'stock_history':
+                    data.stock_history = message.data;
+                    $('#analysisContainer').show();
+                    hideLoading();
+                    renderChart(data.stock_history, data.company_data && data.company_data.name);
+                    break;
+                case 'summary':
+                    data.summary = message.data;
+                    renderSummary(data.summary);
+                    break;
+                case 'translation':
+                    if (data.company_data && data.summary) {
+                        displayCompanyInfo(API.applyTranslations(data, message.data.fields));
+                    }
+                    break;
             }
         });
-        
-        tableHtml += '</tbody></table>';
-        $('#financialDetails').html(tableHtml);
     }
 
     async function analyzeCompany(symbol) {
@@ -100,9 +153,23 @@ $(document).ready(function() {
         $('#company-info').empty();
 
         try {
-            const data = await api.analyzeCompany(symbol, currentLanguage);
+            const language = currentLanguage;
+            let data = null;
+            // The cacheable endpoint, so that the browser answers repeat views from its
+            // cache or with a 304. The English analysis is shown first; translated text
+            // replaces it when it arrives.
+            try {
+                data = await api.analyzeCompany(symbol, language, fields => {
+                    if (data && currentSymbol === symbol && currentLanguage === language) {
+                        displayCompanyInfo(API.applyTranslations(data, fields));
+                    }
+                });
+            } catch (error) {
+                if (!API.canStream()) throw error;
+                await analyzeCompanyStreaming(symbol, language);
+                return;
+            }
             if (data.error) {
-                const translations = CONFIG.TRANSLATIONS[currentLanguage];
                 $('#company-info').html(`<div class="alert alert-danger">${data.error}</div>`);
                 hideLoading();
                 return;
@@ -1,114 +1,106 @@
 import json
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from datetime import datetime
+from snapshot_format import find_snapshot, read_snapshot
+from normalize import clean_numeric_column
 
 # 한글 폰트 설정
 plt.rcParams['font.family'] = 'Malgun Gothic'
 plt.rcParams['axes.unicode_minus'] = False
 
-# JSON 데이터 로드
-with open('company_data_20241128_221849.json', 'r') as f:
-    data = json.load(f)
-
-# 데이터 전처리 함수
-def clean_numeric(value):
-    if isinstance(value, str):
-        value = value.replace('$', '').replace(',', '').replace('%', '')
-        if 'T' in value:
-            value = float(value.replace('T', '')) * 1e12
-        elif 'B' in value:
-            value = float(value.replace('B', '')) * 1e9
-        elif 'M' in value:
-            value = float(value.replace('M', '')) * 1e6
-        else:
-            try:
-                value = float(value)
-            except:
-                value = None
-    return value
-
-# 주요 지표 추출
-metrics = {
-    'Market Cap': [],
-    'Revenue (TTM)': [],
-    'Operating Margin': [],
-    'P/E Ratio': [],
-    'Total Cash': [],
-    'Total Debt': [],
-    'ROE': []
+DATA_FILE = 'company_data_20241128_221849.json'
+
+# 차트 지표 이름과 원본 컬럼
+SOURCE_COLUMNS = {
+    'Market Cap': 'Market Cap',
+    'Revenue (TTM)': 'Revenue  (ttm)',
+    'Operating Margin': 'Operating Margin  (ttm)',
+    'P/E Ratio': 'Trailing P/E',
+    'Total Cash': 'Total Cash  (mrq)',
+    'Total Debt': 'Total Debt  (mrq)',
+    'ROE': 'Return on Equity  (ttm)'
 }
 
-companies = []
-for company, company_data in data.items():
-    companies.append(company)
-    metrics['Market Cap'].append(clean_numeric(company_data.get('Market Cap')))
-    metrics['Revenue (TTM)'].append(clean_numeric(company_data.get('Revenue  (ttm)')))
-    metrics['Operating Margin'].append(clean_numeric(company_data.get('Operating Margin  (ttm)').replace('%', '')))
-    metrics['P/E Ratio'].append(clean_numeric(company_data.get('Trailing P/E')))
-    metrics['Total Cash'].append(clean_numeric(company_data.get('Total Cash  (mrq)')))
-    metrics['Total Debt'].append(clean_numeric(company_data.get('Total Debt  (mrq)')))
-    metrics['ROE'].append(clean_numeric(company_data.get('Return on Equity  (ttm)').replace('%', '')))
-
-df = pd.DataFrame(metrics, index=companies)
-
-# 1. 시가총액 비교
-plt.figure(figsize=(12, 6))
-plt.bar(companies, df['Market Cap'] / 1e12)
-plt.title('기업별 시가총액 (조 달러)')
-plt.xticks(rotation=45)
-plt.ylabel('시가총액 (조 달러)')
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-plt.savefig('market_cap_comparison.png')
-plt.close()
-
-# 2. 주요 재무비율 비교
-plt.figure(figsize=(12, 6))
-metrics_to_plot = ['Operating Margin', 'ROE']
-x = np.arange(len(companies))
-width = 0.35
-
-plt.bar(x - width/2, df['Operating Margin'], width, label='영업이익률 (%)')
-plt.bar(x + width/2, df['ROE'], width, label='자기자본이익률 (%)')
-plt.title('기업별 수익성 지표 비교')
-plt.xticks(x, companies, rotation=45)
-plt.legend()
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-plt.savefig('profitability_comparison.png')
-plt.close()
-
-# 3. 현금 및 부채 비교
-plt.figure(figsize=(12, 6))
-width = 0.35
-x = np.arange(len(companies))
-
-plt.bar(x - width/2, df['Total Cash'] / 1e9, width, label='현금 보유액')
-plt.bar(x + width/2, df['Total Debt'] / 1e9, width, label='총 부채')
-plt.title('기업별 현금 및 부채 비교 (십억 달러)')
-plt.xticks(x, companies, rotation=45)
-plt.legend()
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-plt.savefig('cash_debt_comparison.png')
-plt.close()
-
-# 4. P/E 비율 비교
-plt.figure(figsize=(12, 6))
-plt.bar(companies, df['P/E Ratio'])
-plt.title('기업별 P/E 비율')
-plt.xticks(rotation=45)
-plt.ylabel('P/E Ratio')
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-plt.savefig('pe_ratio_comparison.png')
-plt.close()
-
-# 상세 분석 리포트 생성
-report = f"""# 빅테크 기업 상세 재무 분석 리포트 ({datetime.now().strftime('%Y-%m-%d')})
+def load_metrics(data_file=DATA_FILE):
+    """Chart metrics as numbers, one row per company."""
+    # 주요 지표 추출: 타입 스냅샷(Arrow/Parquet)이 있으면 필요한 컬럼만 읽음
+    snapshot_path = find_snapshot(data_file)
+    if snapshot_path:
+        source = read_snapshot(snapshot_path, columns=list(SOURCE_COLUMNS.values()))
+    else:
+        with open(data_file, 'r') as f:
+            data = json.load(f)
+        source = pd.DataFrame.from_dict(data, orient='index')
+
+    # 컬럼 단위로 한 번에 숫자 변환
+    df = pd.DataFrame({name: clean_numeric_column(source[column]) for name, column in SOURCE_COLUMNS.items()})
+    return df
+
+def render_charts(df, output_dir='.'):
+    """Save the four comparison charts as PNG files."""
+    companies = list(df.index)
+
+    # 1. 시가총액 비교
+    plt.figure(figsize=(12, 6))
+    plt.bar(companies, df['Market Cap'] / 1e12)
+    plt.title('기업별 시가총액 (조 달러)')
+    plt.xticks(rotation=45)
+    plt.ylabel('시가총액 (조 달러)')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'market_cap_comparison.png'))
+    plt.close()
+
+    # 2. 주요 재무비율 비교
+    plt.figure(figsize=(12, 6))
+    metrics_to_plot = ['Operating Margin', 'ROE']
+    x = np.arange(len(companies))
+    width = 0.35
+
+    plt.bar(x - width/2, df['Operating Margin'], width, label='영업이익률 (%)')
+    plt.bar(x + width/2, df['ROE'], width, label='자기자본이익률 (%)')
+    plt.title('기업별 수익성 지표 비교')
+    plt.xticks(x, companies, rotation=45)
+    plt.legend()
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'profitability_comparison.png'))
+    plt.close()
+
+    # 3. 현금 및 부채 비교
+    plt.figure(figsize=(12, 6))
+    width = 0.35
+    x = np.arange(len(companies))
+
+    plt.bar(x - width/2, df['Total Cash'] / 1e9, width, label='현금 보유액')
+    plt.bar(x + width/2, df['Total Debt'] / 1e9, width, label='총 부채')
+    plt.title('기업별 현금 및 부채 비교 (십억 달러)')
+    plt.xticks(x, companies, rotation=45)
+    plt.legend()
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'cash_debt_comparison.png'))
+    plt.close()
+
+    # 4. P/E 비율 비교
+    plt.figure(figsize=(12, 6))
+    plt.bar(companies, df['P/E Ratio'])
+    plt.title('기업별 P/E 비율')
+    plt.xticks(rotation=45)
+    plt.ylabel('P/E Ratio')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'pe_ratio_comparison.png'))
+    plt.close()
+
+def build_report(df):
+    """The Markdown analysis report for the metrics."""
+    # 상세 분석 리포트 생성
+    return f"""# 빅테크 기업 상세 재무 분석 리포트 ({datetime.now().strftime('%Y-%m-%d')})
 
 ## 1. 시가총액 및 기업 가치
 ### 시가총액 순위
@@ -197,8 +189,16 @@ report = f"""# 빅테크 기업 상세 재무 분석 리포트 ({datetime.now().
 - 친환경 기술 투자 증가
 """
 
-# 리포트 저장
-with open('detailed_tech_analysis_kr.md', 'w', encoding='utf-8') as f:
-    f.write(report)
+def main():
+    df = load_metrics()
+    render_charts(df)
+    report = build_report(df)
 
-print("분석 완료! 차트 이미지와 상세 분석 리포트가 생성되었습니다.")
+    # 리포트 저장
+    with open('detailed_tech_analysis_kr.md', 'w', encoding='utf-8') as f:
+        f.write(report)
+
+    print("분석 완료! 차트 이미지와 상세 분석 리포트가 생성되었습니다.")
+
+if __name__ == '__main__':
+    main()
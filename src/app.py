@@ -1,25 +1,89 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, url_for
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import yfinance as yf
 import requests
 from bs4 import BeautifulSoup
-import time
-from googletrans import Translator
+from rate_limiter import limiter, YAHOO_QUERY_HOST
+from resilience import (REQUEST_DEADLINE, CircuitOpenError, DeadlineExceeded, acquire, deadline, resilience,
+                        timeout_for, unavailable_status, with_context, with_deadline)
+from http_cache import response_cache
+from ttl_cache import TTLCache
+from search_index import symbol_index
+from screener import screener
+from summary_scoring import company_summaries, summary_columns
+from translation_service import translation_service, translation_jobs
+from cache_headers import cacheable
+from metrics import instrument, registry, stage, timed
+from serialization import (ENCODERS, JSON_MIME, MSGPACK_MIME, available_mimetypes, encode_json, format_dates,
+                           history_columns, history_records)
 
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
-translator = Translator()
+# Request and stage timings, Server-Timing headers and GET /metrics
+instrument(app)
+
+# Batch analysis limits
+MAX_BATCH_SYMBOLS = 50
+BATCH_INFO_WORKERS = 8
+
+# Server-sent events for a translation job end after this long; clients poll after that
+TRANSLATION_EVENTS_TIMEOUT = 30
+TRANSLATION_EVENTS_INTERVAL = 0.25
+
+# Per-attempt timeout of yfinance downloads (yfinance's own default), cut to the request deadline
+YFINANCE_TIMEOUT = 10
+
+# In-process caches in front of the upstream lookups: fundamentals change slowly,
+# prices during the trading day. Stale entries are served while they refresh.
+company_cache = TTLCache('company_data', ttl=15 * 60, stale_ttl=60 * 60)
+stock_cache = TTLCache('stock_data', ttl=5 * 60, stale_ttl=30 * 60)
+
+registry.add_stats('rate_limiter', 'Rate limiter state per upstream host', limiter.stats, 'host')
+registry.add_stats('upstream', 'Retries and circuit breaker state per upstream host', resilience.stats, 'host')
+registry.add_stats('memory_cache', 'In-process cache counters',
+                   lambda: {cache.name: cache.stats() for cache in (company_cache, stock_cache)}, 'cache')
+registry.add_stats('http_cache', 'Response cache counters', lambda: response_cache.stats)
+registry.add_stats('translation', 'Translation service counters', lambda: translation_service.stats)
+
+SEARCH_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+def search_url(query):
+    return f"https://query2.finance.yahoo.com/v1/finance/search?q={query}&quotesCount=10&newsCount=0"
 
 def search_companies(query):
     """Search for companies using Yahoo Finance API."""
-    url = f"https://query2.finance.yahoo.com/v1/finance/search?q={query}&quotesCount=10&newsCount=0"
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    response = requests.get(url, headers=headers)
-    data = response.json()
-    
+    response = response_cache.get(search_url(query), SEARCH_HEADERS)
+    return parse_search_results(response.json())
+
+def local_search(query):
+    """Matches from the local symbol index, shaped like search_companies results."""
+    results = []
+    for entry in symbol_index.search(query):
+        result = {'symbol': entry['symbol'], 'name': entry['name'],
+                  'exchange': entry['exchange'], 'type': entry['type']}
+        if entry['name_ko']:
+            result['name_ko'] = entry['name_ko'].split('|')[0]
+        results.append(result)
+    return results
+
+def find_companies(query):
+    """Typeahead search: the local index first, the upstream search only when it has no match.
+
+    Upstream results are added to the index, so the next query for them is local.
+    """
+    results = local_search(query)
+    if not results:
+        results = search_companies(query)
+        symbol_index.add(results)
+    return results
+
+def parse_search_results(data):
+    """Equity quotes of a Yahoo Finance search response."""
     if 'quotes' in data:
         return [{
             'symbol': quote.get('symbol'),
@@ -29,17 +93,69 @@ def search_companies(query):
         } for quote in data['quotes'] if quote.get('quoteType') == 'EQUITY']
     return []
 
+def call_yahoo(func, tokens=1):
+    """Run a yfinance call under the shared Yahoo query rate limit, retried by the resilience policy.
+
+    func() is called once per attempt, so timeouts it computes with timeout_for()
+    fit what is left of the deadline.
+    """
+    def attempt():
+        for _ in range(tokens):
+            acquire(YAHOO_QUERY_HOST)
+        try:
+            result = func()
+        except Exception as e:
+            limiter.report_error(YAHOO_QUERY_HOST, e)
+            raise
+        limiter.report(YAHOO_QUERY_HOST, 200)
+        return result
+    return resilience.call(YAHOO_QUERY_HOST, attempt)
+
+def fetch_ticker_info(symbol):
+    """Download the yfinance info dict."""
+    return call_yahoo(lambda: yf.Ticker(symbol).info)
+
+def fetch_ticker_history(symbol, period, interval='1d'):
+    """Download yfinance price history; download errors are raised so that they can be retried."""
+    return call_yahoo(lambda: yf.Ticker(symbol).history(period=period, interval=interval, raise_errors=True,
+                                                        timeout=timeout_for(YFINANCE_TIMEOUT)))
+
+def fetch_ticker_histories(symbols, period, interval='1d'):
+    """Download price history for several symbols with one multi-ticker yf.download call.
+
+    Returns {symbol: DataFrame} with the same columns as Ticker.history; symbols
+    without data are left out.
+    """
+    # yf.download still requests each ticker's chart, so every symbol takes a token
+    frame = call_yahoo(lambda: yf.download(symbols, period=period, interval=interval, group_by='ticker',
+                                           auto_adjust=True, actions=True, progress=False,
+                                           threads=min(len(symbols), BATCH_INFO_WORKERS),
+                                           timeout=timeout_for(YFINANCE_TIMEOUT)),
+                       tokens=len(symbols))
+
+    if not isinstance(frame.columns, pd.MultiIndex):
+        frame = pd.concat({symbols[0]: frame}, axis=1)
+    histories = {}
+    for symbol in symbols:
+        if symbol in frame.columns.get_level_values(0):
+            hist = frame[symbol].dropna(how='all')
+            if not hist.empty:
+                histories[symbol] = hist.copy()
+    return histories
+
+@timed('info')
 def get_company_data(symbol):
-    """Get comprehensive company data using yfinance."""
+    """Get company data through the in-process cache; concurrent misses share one lookup."""
+    return company_cache.get(symbol, lambda: load_company_data(symbol))
+
+def load_company_data(symbol):
+    """Get comprehensive company data using yfinance.
+
+    None when the lookup fails; DeadlineExceeded and CircuitOpenError are raised
+    so that the caller can answer 504 or 503.
+    """
     try:
-        print(f"Fetching data for symbol: {symbol}")
-        stock = yf.Ticker(symbol)
-        
-        # Force info download with a small delay to avoid rate limits
-        time.sleep(1)
-        info = stock.info
-        
-        print(f"Raw info keys: {info.keys() if info else 'No info available'}")
+        info = response_cache.memoize(f"yfinance://info/{symbol}", lambda: fetch_ticker_info(symbol))
         
         if not info or len(info) == 0:
             print(f"No data found for symbol: {symbol}")
@@ -113,206 +229,333 @@ def get_company_data(symbol):
             'Company Description': info.get('longBusinessSummary', 'No description available.')
         })
         
-        print(f"Successfully processed data for {symbol}")
         return company_info
         
+    except (DeadlineExceeded, CircuitOpenError):
+        raise
     except Exception as e:
         print(f"Error fetching data for {symbol}: {str(e)}")
         import traceback
         traceback.print_exc()
         return None
 
+@timed('history')
 def get_stock_data(symbol, period='1y'):
+    """Get historical stock data through the in-process cache."""
+    return stock_cache.get((symbol, period), lambda: load_stock_data(symbol, period))
+
+def load_stock_data(symbol, period='1y'):
     """Get historical stock data."""
     try:
-        print(f"Fetching historical data for {symbol}")
-        stock = yf.Ticker(symbol)
-        
-        # Try to download with a small delay
-        time.sleep(1)
-        hist = stock.history(period=period, interval='1d')
+        hist = response_cache.memoize(f"yfinance://history/{symbol}?period={period}&interval=1d",
+                                      lambda: fetch_ticker_history(symbol, period))
         
         if hist.empty:
             print(f"No historical data found for symbol: {symbol}")
             return None
             
-        # Convert index to string dates
-        hist.index = hist.index.strftime('%Y-%m-%d')
-        
-        # Round values to 2 decimal places
-        for col in hist.columns:
-            if hist[col].dtype in ['float64', 'float32']:
-                hist[col] = hist[col].round(2)
-                
-        return hist
+        return format_history(hist)
+    except (DeadlineExceeded, CircuitOpenError):
+        raise
     except Exception as e:
         print(f"Error fetching historical data for {symbol}: {str(e)}")
         return None
 
-def generate_company_summary(company_data, stock_history):
-    """Generate a brief summary of company's financial health and performance."""
+def format_history(hist):
+    """Use string dates as the index and round prices to 2 decimal places."""
+    # Convert index to string dates
+    hist.index = format_dates(hist.index)
+    
+    # Round values to 2 decimal places
+    floats = hist.select_dtypes(include=['float64', 'float32']).columns
+    hist[floats] = hist[floats].round(2)
+            
+    return hist
+
+@timed('history')
+def get_stock_histories(symbols, period='1y'):
+    """Get historical stock data for several symbols; symbols without data map to None.
+
+    Shares cache entries with get_stock_data, so only uncached symbols are downloaded.
+    """
+    results = {symbol: stock_cache.peek((symbol, period)) for symbol in symbols}
+    pending = [symbol for symbol, hist in results.items() if hist is None]
+    if not pending:
+        return results
+
+    print(f"Fetching historical data for {len(pending)} symbols")
+    keys = {symbol: f"yfinance://history/{symbol}?period={period}&interval=1d" for symbol in pending}
     try:
-        # Extract key metrics
-        profit_margin = float(company_data['Profit Margin'].strip('%'))
-        pe_ratio = float(company_data['Trailing P/E']) if company_data['Trailing P/E'] != 0 else 0
-        revenue_growth = float(company_data['Quarterly Revenue Growth  (yoy)'].strip('%'))
-        operating_margin = float(company_data['Operating Margin  (ttm)'].strip('%'))
-        roe = float(company_data['Return on Equity  (ttm)'].strip('%'))
-        
-        # Calculate stock performance
-        if not stock_history.empty:
-            start_price = stock_history['Close'].iloc[0]
-            end_price = stock_history['Close'].iloc[-1]
-            price_change_pct = ((end_price - start_price) / start_price) * 100
-        else:
-            price_change_pct = 0
-        
-        # Generate summary insights
-        insights = []
-        
-        # Add company sector and industry
-        if company_data['Sector'] != 'N/A':
-            insights.append(f"Operating in {company_data['Sector']} sector, {company_data['Industry']} industry")
-        
-        # Profitability assessment
-        if profit_margin > 20:
-            insights.append("Highly profitable with strong profit margins")
-        elif profit_margin > 10:
-            insights.append("Good profitability")
-        else:
-            insights.append("Lower profit margins compared to industry standards")
-        
-        # Growth assessment
-        if revenue_growth > 20:
-            insights.append("Exceptional revenue growth")
-        elif revenue_growth > 10:
-            insights.append("Solid revenue growth")
-        elif revenue_growth > 0:
-            insights.append("Moderate revenue growth")
-        else:
-            insights.append("Declining revenue")
-        
-        # Efficiency assessment
-        if operating_margin > 25:
-            insights.append("Excellent operational efficiency")
-        elif operating_margin > 15:
-            insights.append("Good operational efficiency")
-        else:
-            insights.append("Room for operational improvement")
-        
-        # ROE assessment
-        if roe > 20:
-            insights.append("Strong return on equity")
-        elif roe > 10:
-            insights.append("Decent return on equity")
-        else:
-            insights.append("Below average return on equity")
-        
-        # Stock performance
-        if price_change_pct > 20:
-            insights.append(f"Strong stock performance (+{price_change_pct:.1f}% past year)")
-        elif price_change_pct > 0:
-            insights.append(f"Positive stock performance (+{price_change_pct:.1f}% past year)")
-        else:
-            insights.append(f"Declining stock value ({price_change_pct:.1f}% past year)")
-        
-        # Dividend information
-        dividend_yield = float(company_data['Forward Annual Dividend Yield'].strip('%'))
-        if dividend_yield > 0:
-            insights.append(f"Pays dividend with {dividend_yield:.2f}% yield")
-        
-        # Overall assessment
-        overall_score = 0
-        if profit_margin > 15: overall_score += 1
-        if revenue_growth > 10: overall_score += 1
-        if operating_margin > 20: overall_score += 1
-        if roe > 15: overall_score += 1
-        if price_change_pct > 10: overall_score += 1
-        
-        if overall_score >= 4:
-            overall = "Strong performer with excellent fundamentals"
-        elif overall_score >= 2:
-            overall = "Solid company with good potential"
-        else:
-            overall = "Shows some challenges, careful analysis recommended"
-        
-        return {
-            'insights': insights,
-            'overall': overall,
-            'metrics_summary': {
-                'profit_margin': profit_margin,
-                'revenue_growth': revenue_growth,
-                'operating_margin': operating_margin,
-                'roe': roe,
-                'price_change_pct': price_change_pct,
-                'dividend_yield': dividend_yield
-            }
-        }
+        histories = response_cache.memoize_many(keys, lambda missing: fetch_ticker_histories(missing, period))
     except Exception as e:
-        print(f"Error generating summary: {str(e)}")
-        return {
-            'insights': ["Insufficient data to generate complete analysis"],
-            'overall': "Limited data available",
-            'metrics_summary': {
-                'profit_margin': 0,
-                'revenue_growth': 0,
-                'operating_margin': 0,
-                'roe': 0,
-                'price_change_pct': 0,
-                'dividend_yield': 0
-            }
-        }
+        print(f"Error fetching batch historical data: {str(e)}")
+        histories = {}
+    for symbol in pending:
+        if symbol in histories:
+            results[symbol] = format_history(histories[symbol])
+            stock_cache.put((symbol, period), results[symbol])
+    return results
+
+@timed('summary')
+def generate_company_summary(company_data, stock_history):
+    """Generate a brief summary of company's financial health and performance."""
+    return company_summaries(summary_columns([company_data], [stock_history]))[0]
+
+@timed('summary')
+def generate_company_summaries(companies, histories):
+    """generate_company_summary of each (company_data, stock_history) pair, scored as one table."""
+    return company_summaries(summary_columns(companies, histories))
 
 def translate_text(text, target_lang='ko'):
     """Translate text to target language."""
     if not text or not isinstance(text, str):
         return text
-    try:
-        translation = translator.translate(text, dest=target_lang)
-        return translation.text
-    except Exception as e:
-        print(f"Translation error: {str(e)}")
-        return text
+    return translation_service.translate(text, target_lang)
 
-def translate_company_data(data, target_lang):
-    """Translate company data to target language."""
-    if not data:
-        return data
-        
-    translated_data = data.copy()
-    
-    # Translate text fields
-    text_fields = ['name', 'Company Description', 'Sector', 'Industry']
-    for field in text_fields:
-        if field in translated_data:
-            translated_data[field] = translate_text(translated_data[field], target_lang)
-            
-    return translated_data
+# Text fields of company data shown to the user
+TRANSLATED_FIELDS = ['name', 'Company Description', 'Sector', 'Industry']
+
+def translatable_texts(company_data, summary):
+    """Texts of an analysis shown to the user, keyed by their path in the response.
+
+    They are translated in one batch; repeated sectors and industries come from the store.
+    Paths look like 'company_data.Sector', 'summary.overall' and 'summary.insights.2'.
+    """
+    texts = {f'company_data.{field}': company_data[field] for field in TRANSLATED_FIELDS
+             if isinstance(company_data.get(field), str) and company_data[field].strip()}
+    if isinstance(summary.get('overall'), str):
+        texts['summary.overall'] = summary['overall']
+    for index, insight in enumerate(summary.get('insights', [])):
+        texts[f'summary.insights.{index}'] = insight
+    return texts
+
+def apply_translations(company_data, summary, translated):
+    """Copies of company_data and summary with {path: text} translations filled in."""
+    company_data = dict(company_data)
+    summary = dict(summary, insights=list(summary.get('insights', [])))
+    for path, text in translated.items():
+        section, key = path.split('.', 1)
+        if section == 'company_data':
+            company_data[key] = text
+        elif key == 'overall':
+            summary['overall'] = text
+        else:
+            summary['insights'][int(key.split('.')[1])] = text
+    return company_data, summary
+
+def translate_analysis(company_data, summary, target_lang, background=False):
+    """Translate the texts of an analysis; returns (company_data, summary, job).
+
+    In the background mode only translations already in the store are filled in;
+    the rest are handed to a translation job and the response goes out with the
+    English text. `job` describes that job, or is None when nothing is pending.
+    """
+    texts = translatable_texts(company_data, summary)
+    if not background:
+        translated = dict(zip(texts, translation_service.translate_many(list(texts.values()), target_lang)))
+        return (*apply_translations(company_data, summary, translated), None)
+
+    stored = dict(zip(texts, translation_service.lookup_many(list(texts.values()), target_lang)))
+    translated = {path: text for path, text in stored.items() if text is not None}
+    company_data, summary = apply_translations(company_data, summary, translated)
+    missing = {path: texts[path] for path, text in stored.items() if text is None}
+    if not missing:
+        return company_data, summary, None
+    job_id = translation_jobs.submit(missing, target_lang)
+    job = {
+        'job_id': job_id,
+        'lang': target_lang,
+        'status': 'pending',
+        'url': url_for('translation_job', job_id=job_id),
+        'events': url_for('translation_job_events', job_id=job_id),
+    }
+    return company_data, summary, job
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.errorhandler(DeadlineExceeded)
+@app.errorhandler(CircuitOpenError)
+def upstream_unavailable(e):
+    return jsonify({'error': str(e)}), unavailable_status(e)
+
 @app.route('/api/search')
+@cacheable(max_age=60 * 60, stale_while_revalidate=24 * 60 * 60)
+@with_deadline(REQUEST_DEADLINE)
 def search():
     query = request.args.get('q', '')
     if not query:
         return jsonify([])
-    results = search_companies(query)
+    results = find_companies(query)
     return jsonify(results)
 
+@app.route('/api/screen')
+@cacheable(max_age=5 * 60)
+def screen():
+    """Companies of the latest scrape run filtered and sorted by their metrics (see screener.py).
+
+    /api/screen?profit_margin=gt:20&revenue_growth=gt:10&pe_ratio=lt:30&sort=-roe
+    """
+    try:
+        with stage('screen'):
+            document = screener.screen(request.args.items(multi=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(document)
+
+@app.route('/api/rate-limits')
+def rate_limits():
+    return jsonify(limiter.stats())
+
+@app.route('/api/upstreams')
+def upstream_stats():
+    """Circuit breaker state and retry counters per upstream host."""
+    return jsonify(resilience.stats())
+
+@app.route('/api/http-cache')
+def http_cache_stats():
+    return jsonify({'mode': response_cache.mode, **response_cache.stats})
+
+@app.route('/api/memory-cache')
+def memory_cache_stats():
+    return jsonify({cache.name: cache.stats() for cache in (company_cache, stock_cache)})
+
+@app.route('/api/translations')
+def translation_stats():
+    return jsonify(translation_service.stats)
+
+@app.route('/api/translations/<job_id>')
+def translation_job(job_id):
+    """Status of a background translation and the translations finished so far."""
+    job = translation_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown translation job'}), 404
+    return jsonify(job)
+
+@app.route('/api/translations/<job_id>/events')
+def translation_job_events(job_id):
+    """Server-sent events: one 'translation' event with the job once it has finished.
+
+    The stream closes with a 'timeout' event after TRANSLATION_EVENTS_TIMEOUT
+    seconds; the client then polls /api/translations/<job_id> instead.
+    """
+    if translation_jobs.get(job_id) is None:
+        return jsonify({'error': 'Unknown translation job'}), 404
+
+    def events():
+        deadline = time.monotonic() + TRANSLATION_EVENTS_TIMEOUT
+        while time.monotonic() < deadline:
+            job = translation_jobs.get(job_id)
+            if job['status'] != 'pending':
+                yield f"event: translation\ndata: {json.dumps(job)}\n\n"
+                return
+            # A comment line keeps proxies from closing an idle stream
+            yield ': waiting\n\n'
+            time.sleep(TRANSLATION_EVENTS_INTERVAL)
+        yield f"event: timeout\ndata: {json.dumps({'job_id': job_id})}\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def localized_error(message, target_lang):
+    """Translate an error message unless the client asked for English."""
+    if target_lang != 'en':
+        return translate_text(message, target_lang)
+    return message
+
+def key_metrics(company_data):
+    return {
+        'profitability': float(company_data['Profit Margin'].strip('%')) if isinstance(company_data['Profit Margin'], str) else 0,
+        'pe_ratio': float(company_data['Trailing P/E']) if company_data['Trailing P/E'] != 'N/A' else 0,
+        'market_cap': company_data['Market Cap'],
+        'revenue_growth': float(company_data['Quarterly Revenue Growth  (yoy)'].strip('%')) if isinstance(company_data['Quarterly Revenue Growth  (yoy)'], str) else 0
+    }
+
+def build_analysis(company_data, hist, target_lang='en', background_translation=False, columnar=False,
+                   summary=None):
+    """Assemble the analysis response for one symbol; returns (body, status).
+
+    stock_history is a list of rows, or with columnar one list per field.
+    summary is generated here unless the caller scored it already.
+
+    With background_translation, text without a stored translation is returned in
+    English and the body gets a 'translation' entry pointing at the job that
+    translates it.
+    """
+    # Store company name for error messages
+    company_name = company_data.get('name', company_data.get('symbol'))
+
+    # Convert historical data to columns, and those to records unless columns were asked for
+    try:
+        hist_data = history_columns(hist)
+        if not columnar:
+            hist_data = history_records(hist_data)
+    except Exception as e:
+        print(f"Error converting historical data: {str(e)}")
+        return {'error': localized_error(f'Error processing historical data for {company_name}', target_lang)}, 500
+    
+    # Generate summary
+    try:
+        if summary is None:
+            summary = generate_company_summary(company_data, hist)
+    except Exception as e:
+        print(f"Error generating summary: {str(e)}")
+        return {'error': localized_error(f'Error generating analysis for {company_name}', target_lang)}, 500
+    
+    # Translate data if needed
+    job = None
+    if target_lang != 'en':
+        try:
+            company_data, summary, job = translate_analysis(
+                company_data, summary, target_lang, background_translation)
+        except Exception as e:
+            print(f"Translation error: {str(e)}")
+            # Continue with untranslated data if translation fails
+    
+    analysis = {
+        'company_data': company_data,
+        'stock_history': hist_data,
+        'key_metrics': key_metrics(company_data),
+        'summary': summary
+    }
+    if background_translation and target_lang != 'en':
+        analysis['translation'] = job or {'lang': target_lang, 'status': 'done'}
+    return analysis, 200
+
+def response_mimetype(choices):
+    """The best of the given encodings for the request's Accept header; JSON if none fits."""
+    return request.accept_mimetypes.best_match(choices, default=JSON_MIME)
+
+def encoded_response(document, status, mimetype):
+    with stage('serialization'):
+        body = ENCODERS[mimetype](document)
+    response = Response(body, status=status, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+# Prices are the fastest-changing part; browsers keep the response as long as stock_cache does
 @app.route('/api/analyze/<symbol>')
+@cacheable(max_age=stock_cache.ttl, stale_while_revalidate=stock_cache.stale_ttl)
+@with_deadline(REQUEST_DEADLINE)
 def analyze_company(symbol):
+    """Analysis of one symbol.
+
+    history=columns returns stock_history as one list per field instead of a
+    list of rows. The body is JSON unless the Accept header prefers MessagePack
+    or an Arrow IPC stream (see serialization.py); both carry the history in columns.
+    """
+    mimetype = response_mimetype(available_mimetypes())
+    columnar = mimetype != JSON_MIME or request.args.get('history') == 'columns'
     try:
         # Get target language from query parameter, default to English
         target_lang = request.args.get('lang', 'en')
+        # translate=async: answer in English now, translations follow from a background job
+        background_translation = request.args.get('translate') == 'async'
         
         # Validate symbol
         if not symbol or not isinstance(symbol, str):
-            error_msg = 'Invalid symbol'
-            if target_lang != 'en':
-                error_msg = translate_text(error_msg, target_lang)
-            return jsonify({'error': error_msg}), 400
+            return encoded_response({'error': localized_error('Invalid symbol', target_lang)}, 400, mimetype)
 
         # Clean the symbol
         symbol = symbol.strip().upper()
@@ -321,87 +564,213 @@ def analyze_company(symbol):
         company_data = get_company_data(symbol)
         if not company_data:
             error_msg = f'Unable to fetch data for {symbol}. Please verify the company symbol.'
-            if target_lang != 'en':
-                error_msg = translate_text(error_msg, target_lang)
-            return jsonify({'error': error_msg}), 404
-        
-        # Store company name for error messages
-        company_name = company_data.get('name', symbol)
+            return encoded_response({'error': localized_error(error_msg, target_lang)}, 404, mimetype)
         
-        # Get historical data with retry
-        max_retries = 3
-        hist = None
-        
-        for attempt in range(max_retries):
-            hist = get_stock_data(symbol)
-            if hist is not None:
-                break
-            print(f"Retry {attempt + 1} for historical data")
-            time.sleep(2)  # Wait before retry
-            
+        hist = get_stock_data(symbol)
         if hist is None:
-            error_msg = f'Unable to fetch historical data for {company_name}'
-            if target_lang != 'en':
-                error_msg = translate_text(error_msg, target_lang)
-            return jsonify({'error': error_msg}), 404
-            
-        # Convert historical data to list of records
-        hist_data = []
+            error_msg = f"Unable to fetch historical data for {company_data.get('name', symbol)}"
+            return encoded_response({'error': localized_error(error_msg, target_lang)}, 404, mimetype)
+        
+        analysis, status = build_analysis(company_data, hist, target_lang, background_translation, columnar)
+        response = encoded_response(analysis, status, mimetype)
+        if analysis.get('translation', {}).get('status') == 'pending':
+            # Parts are still in English: revalidate every time until the translations are in
+            response.cache_control.no_cache = True
+        return response
+    except (DeadlineExceeded, CircuitOpenError) as e:
+        print(f"Upstream unavailable for {symbol}: {str(e)}")
+        return encoded_response({'error': localized_error(str(e), target_lang)}, unavailable_status(e), mimetype)
+    except Exception as e:
+        print(f"Error in analyze_company: {str(e)}")
+        error_msg = f'An error occurred while analyzing {symbol}: {str(e)}'
+        return encoded_response({'error': localized_error(error_msg, target_lang)}, 500, mimetype)
+
+def stream_sections(symbol, target_lang):
+    """Yield the sections of an analysis as (name, payload) pairs as soon as each is ready.
+
+    The payload is {'data': ...} or {'error': ..., 'status': ...}; a failed
+    section does not end the stream. Company info and price history are fetched
+    in parallel. Translations come last, as {path: text} for the fields already
+    sent in English (see translatable_texts).
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        history_future = executor.submit(with_context(get_stock_data, symbol))
+
+        company_data, unavailable = None, None
+        try:
+            company_data = get_company_data(symbol)
+        except (DeadlineExceeded, CircuitOpenError) as e:
+            unavailable = e
+        if unavailable:
+            yield 'company_data', {'error': localized_error(str(unavailable), target_lang),
+                                   'status': unavailable_status(unavailable)}
+        elif company_data:
+            yield 'company_data', {'data': company_data}
+            try:
+                yield 'key_metrics', {'data': key_metrics(company_data)}
+            except Exception as e:
+                print(f"Error computing key metrics for {symbol}: {str(e)}")
+                yield 'key_metrics', {'error': localized_error(f'Error computing key metrics for {symbol}', target_lang),
+                                      'status': 500}
+        else:
+            error_msg = f'Unable to fetch data for {symbol}. Please verify the company symbol.'
+            yield 'company_data', {'error': localized_error(error_msg, target_lang), 'status': 404}
+        company_name = (company_data or {}).get('name', symbol)
+
+        hist, unavailable = None, None
         try:
-            for date, row in hist.iterrows():
-                hist_data.append({
-                    'Date': date,
-                    'Open': float(row['Open']),
-                    'High': float(row['High']),
-                    'Low': float(row['Low']),
-                    'Close': float(row['Close']),
-                    'Volume': int(row['Volume'])
-                })
+            hist = history_future.result()
+        except (DeadlineExceeded, CircuitOpenError) as e:
+            unavailable = e
+    if unavailable:
+        yield 'stock_history', {'error': localized_error(str(unavailable), target_lang),
+                                'status': unavailable_status(unavailable)}
+    elif hist is None:
+        error_msg = f"Unable to fetch historical data for {company_name}"
+        yield 'stock_history', {'error': localized_error(error_msg, target_lang), 'status': 404}
+    else:
+        try:
+            yield 'stock_history', {'data': history_columns(hist)}
         except Exception as e:
             print(f"Error converting historical data: {str(e)}")
             error_msg = f'Error processing historical data for {company_name}'
-            if target_lang != 'en':
-                error_msg = translate_text(error_msg, target_lang)
-            return jsonify({'error': error_msg}), 500
-        
-        # Generate summary
+            yield 'stock_history', {'error': localized_error(error_msg, target_lang), 'status': 500}
+
+    summary = {}
+    if company_data and hist is not None:
+        summary = generate_company_summary(company_data, hist)
+        yield 'summary', {'data': summary}
+    else:
+        error_msg = f'Not enough data to generate analysis for {company_name}'
+        yield 'summary', {'error': localized_error(error_msg, target_lang), 'status': 404}
+
+    if target_lang != 'en' and company_data:
+        texts = translatable_texts(company_data, summary)
         try:
-            summary = generate_company_summary(company_data, hist)
+            translated = translation_service.translate_many(list(texts.values()), target_lang)
+            yield 'translation', {'data': {'lang': target_lang, 'fields': dict(zip(texts, translated))}}
         except Exception as e:
-            print(f"Error generating summary: {str(e)}")
-            error_msg = f'Error generating analysis for {company_name}'
-            if target_lang != 'en':
-                error_msg = translate_text(error_msg, target_lang)
-            return jsonify({'error': error_msg}), 500
-        
-        # Translate data if needed
-        if target_lang != 'en':
+            print(f"Translation error: {str(e)}")
+            yield 'translation', {'error': str(e), 'status': 500}
+
+@app.route('/api/analyze/<symbol>/stream')
+def analyze_company_stream(symbol):
+    """Analysis of one symbol as newline-delimited JSON, one line per section.
+
+    Each line is {"section": name, "data": ...} or {"section": name, "error": ...,
+    "status": ...}, for the sections company_data, key_metrics, stock_history (in
+    columns), summary and, for languages other than English, translation. A final
+    {"section": "end"} line tells the client that nothing was cut off.
+    """
+    target_lang = request.args.get('lang', 'en')
+    symbol = symbol.strip().upper()
+
+    # The body is produced after the view returns, so the deadline is set around it
+    def lines():
+        try:
+            with deadline(REQUEST_DEADLINE):
+                for section, payload in stream_sections(symbol, target_lang):
+                    yield encode_json({'section': section, **payload}) + b'\n'
+        except Exception as e:
+            print(f"Error in analyze_company_stream: {str(e)}")
+            error_msg = f'An error occurred while analyzing {symbol}: {str(e)}'
+            yield encode_json({'section': 'error', 'error': localized_error(error_msg, target_lang), 'status': 500}) + b'\n'
+        yield encode_json({'section': 'end'}) + b'\n'
+
+    return Response(lines(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/analyze/batch', methods=['POST'])
+@with_deadline(REQUEST_DEADLINE)
+def analyze_batch():
+    """Analyze several symbols at once: {"symbols": ["AAPL", "MSFT"], "period": "1y", "lang": "en"}.
+
+    Price history for all symbols comes from one multi-ticker download while the
+    info lookups run on a bounded thread pool. Each symbol gets either the same
+    body as /api/analyze/<symbol> or {"error": ..., "status": ...}.
+
+    "translate": "async" and "history": "columns" work as on /api/analyze/<symbol>, with a
+    translation job per symbol. The body is JSON or, if the Accept header prefers it, MessagePack.
+    """
+    payload = request.get_json(silent=True) or {}
+    target_lang = payload.get('lang', request.args.get('lang', 'en'))
+    period = payload.get('period', '1y')
+    background_translation = payload.get('translate', request.args.get('translate')) == 'async'
+    mimetype = response_mimetype([m for m in available_mimetypes() if m in (JSON_MIME, MSGPACK_MIME)])
+    columnar = mimetype != JSON_MIME or payload.get('history', request.args.get('history')) == 'columns'
+    symbols = payload.get('symbols')
+    if not isinstance(symbols, list) or not symbols or not all(isinstance(s, str) and s.strip() for s in symbols):
+        error_msg = 'Expected a JSON body with a non-empty "symbols" list'
+        return encoded_response({'error': localized_error(error_msg, target_lang)}, 400, mimetype)
+
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols))
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        error_msg = f'At most {MAX_BATCH_SYMBOLS} symbols can be analyzed at once'
+        return encoded_response({'error': localized_error(error_msg, target_lang)}, 400, mimetype)
+
+    with ThreadPoolExecutor(max_workers=min(BATCH_INFO_WORKERS, len(symbols))) as executor:
+        info_futures = {symbol: executor.submit(with_context(get_company_data, symbol)) for symbol in symbols}
+        # The batched history download runs here while the pool fetches info
+        histories = get_stock_histories(symbols, period)
+        companies = {}
+        for symbol, future in info_futures.items():
             try:
-                company_data = translate_company_data(company_data, target_lang)
-                summary = translate_text(summary, target_lang)
-            except Exception as e:
-                print(f"Translation error: {str(e)}")
-                # Continue with untranslated data if translation fails
-        
-        analysis = {
-            'company_data': company_data,
-            'stock_history': hist_data,
-            'key_metrics': {
-                'profitability': float(company_data['Profit Margin'].strip('%')) if isinstance(company_data['Profit Margin'], str) else 0,
-                'pe_ratio': float(company_data['Trailing P/E']) if company_data['Trailing P/E'] != 'N/A' else 0,
-                'market_cap': company_data['Market Cap'],
-                'revenue_growth': float(company_data['Quarterly Revenue Growth  (yoy)'].strip('%')) if isinstance(company_data['Quarterly Revenue Growth  (yoy)'], str) else 0
-            },
-            'summary': summary
-        }
-        
-        return jsonify(analysis)
-    except Exception as e:
-        print(f"Error in analyze_company: {str(e)}")
-        error_msg = f'An error occurred while analyzing {symbol}: {str(e)}'
-        if target_lang != 'en':
-            error_msg = translate_text(error_msg, target_lang)
-        return jsonify({'error': error_msg}), 500
+                companies[symbol] = future.result()
+            except (DeadlineExceeded, CircuitOpenError) as e:
+                companies[symbol] = e
+
+    results = {}
+    ready = {}  # symbol -> (company_data, hist) of the symbols that can be analyzed
+    for symbol in symbols:
+        company_data = companies[symbol]
+        if isinstance(company_data, Exception):
+            results[symbol] = {'error': localized_error(str(company_data), target_lang),
+                               'status': unavailable_status(company_data)}
+            continue
+        if not company_data:
+            error_msg = f'Unable to fetch data for {symbol}. Please verify the company symbol.'
+            results[symbol] = {'error': localized_error(error_msg, target_lang), 'status': 404}
+            continue
+
+        hist = histories[symbol]
+        if hist is None:
+            # Missing from the batch download: one more try on its own
+            try:
+                hist = get_stock_data(symbol, period)
+            except (DeadlineExceeded, CircuitOpenError) as e:
+                results[symbol] = {'error': localized_error(str(e), target_lang), 'status': unavailable_status(e)}
+                continue
+        if hist is None:
+            error_msg = f"Unable to fetch historical data for {company_data.get('name', symbol)}"
+            results[symbol] = {'error': localized_error(error_msg, target_lang), 'status': 404}
+            continue
+        ready[symbol] = (company_data, hist)
+
+    # Score every summary in one table rather than one company at a time
+    summaries = {}
+    if ready:
+        try:
+            pairs = list(ready.values())
+            scored = generate_company_summaries([data for data, _ in pairs], [hist for _, hist in pairs])
+            summaries = dict(zip(ready, scored))
+        except Exception as e:
+            print(f"Error generating batch summaries: {str(e)}")
+
+    for symbol, (company_data, hist) in ready.items():
+        try:
+            analysis, status = build_analysis(company_data, hist, target_lang, background_translation, columnar,
+                                              summaries.get(symbol))
+        except Exception as e:
+            print(f"Error analyzing {symbol}: {str(e)}")
+            error_msg = f'An error occurred while analyzing {symbol}: {str(e)}'
+            analysis, status = {'error': localized_error(error_msg, target_lang)}, 500
+        if status != 200:
+            analysis['status'] = status
+        results[symbol] = analysis
+
+    results = {symbol: results[symbol] for symbol in symbols}
+    errors = sum(1 for result in results.values() if 'error' in result)
+    return encoded_response({'results': results, 'errors': errors}, 200, mimetype)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,175 @@
+"""Async serving mode for the analysis API, on aiohttp.web.
+
+A sync Flask worker is held for the whole of /api/analyze/<symbol>: the info
+lookup, then the history download. Here each request is a
+coroutine, so one worker process serves many requests at once:
+
+- company info and price history are loaded concurrently
+- yfinance blocks, so its calls (and translations, which may go upstream) run
+  on a bounded thread pool of BLOCKING_WORKERS threads; the caches of src/app.py
+  are shared, including their single-flight loading
+- searches are answered from the local symbol index; misses go upstream
+  through one aiohttp session shared by all requests
+
+Responses have the same bodies as src/app.py. Run it with:
+
+    python src/async_app.py --port 8000
+    gunicorn async_app:app --chdir src --worker-class aiohttp.GunicornWebWorker
+"""
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from aiohttp import web
+
+import app as flask_app
+from http_cache import response_cache, REQUEST_TIMEOUT
+from metrics import CONTENT_TYPE, begin_request, end_request, registry, stage
+from rate_limiter import limiter
+from resilience import (REQUEST_DEADLINE, CircuitOpenError, DeadlineExceeded, deadline, resilience,
+                        unavailable_status, with_context)
+from screener import screener
+from search_index import symbol_index
+from serialization import encode_json
+
+BLOCKING_WORKERS = int(os.environ.get('ASYNC_BLOCKING_WORKERS', 32))
+# Connections the shared client keeps open per process
+CLIENT_CONNECTIONS = 100
+
+client_key = web.AppKey('client', aiohttp.ClientSession)
+executor_key = web.AppKey('executor', ThreadPoolExecutor)
+
+def json_response(document, status=200):
+    with stage('serialization'):
+        body = encode_json(document)
+    return web.Response(body=body, status=status, content_type='application/json')
+
+async def run_blocking(request, func, *args):
+    """Run a blocking call on the app's thread pool, under the request's deadline."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app[executor_key], with_context(func, *args))
+
+async def error_response(request, message, target_lang, status):
+    message = await run_blocking(request, flask_app.localized_error, message, target_lang)
+    return json_response({'error': message}, status)
+
+async def search(request):
+    query = request.query.get('q', '')
+    if not query:
+        return json_response([])
+    results = flask_app.local_search(query)
+    if not results:
+        try:
+            with deadline(REQUEST_DEADLINE):
+                response = await response_cache.get_async(request.app[client_key], flask_app.search_url(query),
+                                                           flask_app.SEARCH_HEADERS)
+        except (DeadlineExceeded, CircuitOpenError) as e:
+            return json_response({'error': str(e)}, unavailable_status(e))
+        results = flask_app.parse_search_results(response.json())
+        symbol_index.add(results)
+    return json_response(results)
+
+async def analyze_company(request):
+    target_lang = request.query.get('lang', 'en')
+    columnar = request.query.get('history') == 'columns'
+    symbol = request.match_info['symbol'].strip().upper()
+    try:
+        with deadline(REQUEST_DEADLINE):
+            company_data, hist = await asyncio.gather(
+                run_blocking(request, flask_app.get_company_data, symbol),
+                run_blocking(request, flask_app.get_stock_data, symbol),
+            )
+        if not company_data:
+            error_msg = f'Unable to fetch data for {symbol}. Please verify the company symbol.'
+            return await error_response(request, error_msg, target_lang, 404)
+        if hist is None:
+            error_msg = f"Unable to fetch historical data for {company_data.get('name', symbol)}"
+            return await error_response(request, error_msg, target_lang, 404)
+
+        analysis, status = await run_blocking(request, flask_app.build_analysis,
+                                              company_data, hist, target_lang, False, columnar)
+        return json_response(analysis, status)
+    except (DeadlineExceeded, CircuitOpenError) as e:
+        print(f"Upstream unavailable for {symbol}: {str(e)}")
+        return await error_response(request, str(e), target_lang, unavailable_status(e))
+    except Exception as e:
+        print(f"Error in analyze_company: {str(e)}")
+        error_msg = f'An error occurred while analyzing {symbol}: {str(e)}'
+        return await error_response(request, error_msg, target_lang, 500)
+
+def finish_timing(request, state, status):
+    resource = request.match_info.route.resource
+    return end_request(state, request.method, resource.canonical if resource else 'unmatched', status)
+
+@web.middleware
+async def timing_middleware(request, handler):
+    """Request duration and Server-Timing, as metrics.instrument() does for Flask."""
+    state = begin_request()
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        finish_timing(request, state, e.status)
+        raise
+    except Exception:
+        finish_timing(request, state, 500)
+        raise
+    timing = finish_timing(request, state, response.status)
+    if request.path.startswith('/api/'):
+        response.headers['Server-Timing'] = timing
+    return response
+
+async def screen(request):
+    try:
+        # The first screen after a new scrape run rebuilds the table; keep that off the event loop
+        with stage('screen'):
+            document = await run_blocking(request, screener.screen, list(request.query.items()))
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+    return json_response(document)
+
+async def metrics(request):
+    return web.Response(body=registry.render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+async def rate_limits(request):
+    return json_response(limiter.stats())
+
+async def upstream_stats(request):
+    return json_response(resilience.stats())
+
+async def memory_cache_stats(request):
+    return json_response({cache.name: cache.stats() for cache in (flask_app.company_cache, flask_app.stock_cache)})
+
+async def client_context(app):
+    connector = aiohttp.TCPConnector(limit=CLIENT_CONNECTIONS)
+    async with aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as session:
+        app[client_key] = session
+        yield
+
+async def executor_context(app):
+    app[executor_key] = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix='async-app-blocking')
+    yield
+    app[executor_key].shutdown(wait=False)
+
+def create_app():
+    app = web.Application(middlewares=[timing_middleware])
+    app.cleanup_ctx.extend([client_context, executor_context])
+    app.router.add_get('/api/search', search)
+    app.router.add_get('/api/analyze/{symbol}', analyze_company)
+    app.router.add_get('/api/screen', screen)
+    app.router.add_get('/api/rate-limits', rate_limits)
+    app.router.add_get('/api/upstreams', upstream_stats)
+    app.router.add_get('/api/memory-cache', memory_cache_stats)
+    app.router.add_get('/metrics', metrics)
+    return app
+
+app = create_app()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    web.run_app(app, host=args.host, port=args.port)
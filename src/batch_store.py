@@ -0,0 +1,99 @@
+"""Append-only JSONL storage for scrape runs.
+
+Each finished symbol is appended as one line, {"symbol": ..., "data": {...}}, and
+the file is fsynced every few records, so a crash loses at most the last
+unsynced checkpoint. Restarting a run with the same file skips the symbols that
+already have data. compact() turns a run into the single company_data JSON file
+the analysis scripts read.
+"""
+import json
+import os
+
+DEFAULT_CHECKPOINT_EVERY = 25
+
+def read_results(path):
+    """Yield (symbol, data) for every complete line of a run file."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                # Torn write from a crash; repair() drops it before appending again
+                break
+            record = json.loads(line)
+            yield record['symbol'], record['data']
+
+def repair(path):
+    """Truncate a trailing partial line left behind by a crash mid-write."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        content = f.read()
+        end = content.rfind(b'\n') + 1
+        if end != len(content):
+            f.truncate(end)
+
+def completed_symbols(path):
+    """Symbols that already have non-empty data in a run file."""
+    return {symbol for symbol, data in read_results(path) if data}
+
+class BatchWriter:
+    """Stream scrape results to an append-only JSONL file with periodic fsync."""
+
+    def __init__(self, path, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        repair(path)
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.completed = completed_symbols(path)
+        self.file = open(path, 'a', encoding='utf-8')
+        self.pending = 0
+        self.written = 0
+
+    def write(self, symbol, data):
+        self.file.write(json.dumps({'symbol': symbol, 'data': data}) + '\n')
+        self.written += 1
+        if data:
+            self.completed.add(symbol)
+        self.pending += 1
+        if self.pending >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Flush buffered records and force them to disk."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.checkpoint()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def compact(path, out_path, order=None):
+    """Write a run as the company_data_<timestamp>.json format; the last record per symbol wins.
+
+    `order` lists symbols in the order they should appear (e.g. the universe order);
+    symbols not in it follow in the order they were first scraped.
+    """
+    results = {}
+    for symbol, data in read_results(path):
+        results[symbol] = data
+
+    if order is not None:
+        ordered = {symbol: results[symbol] for symbol in order if symbol in results}
+        ordered.update((symbol, data) for symbol, data in results.items() if symbol not in ordered)
+        results = ordered
+
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(results, f, indent=4)
+    os.replace(tmp_path, out_path)
+    return len(results)
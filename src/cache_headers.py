@@ -0,0 +1,82 @@
+"""HTTP validators, Cache-Control and compression for cacheable API responses.
+
+@cacheable(max_age, stale_while_revalidate) wraps a Flask view. For a 200 response:
+
+- a weak ETag is computed from the body; a request whose If-None-Match matches
+  gets 304 Not Modified without a body
+- Cache-Control is set to public with the given lifetimes, unless the view set
+  its own (e.g. no-cache while translations are still pending)
+- the body is compressed with brotli (when installed) or gzip, as allowed by
+  Accept-Encoding; compressed bodies are cached by content hash, so a repeated
+  response is compressed once
+
+Errors and streamed responses pass through unchanged. The ETag is weak because
+the compressed bodies differ byte for byte while carrying the same content.
+"""
+import functools
+import gzip
+import hashlib
+
+from flask import make_response, request
+
+from ttl_cache import TTLCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies fit in one packet anyway
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+compressed_bodies = TTLCache('compressed_bodies', ttl=60 * 60, max_entries=256)
+
+def body_etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def supported_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+def finalize(response, max_age, stale_while_revalidate=0):
+    """Add validators, caching policy and compression to a response of the current request."""
+    if response.status_code != 200 or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+
+    body = response.get_data()
+    etag = body_etag(body)
+    response.set_etag(etag, weak=True)
+    if 'Cache-Control' not in response.headers:
+        policy = f'public, max-age={max_age}'
+        if stale_while_revalidate:
+            policy += f', stale-while-revalidate={stale_while_revalidate}'
+        response.headers['Cache-Control'] = policy
+    response.vary.add('Accept-Encoding')
+
+    # Answers If-None-Match with 304 and drops the body
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = request.accept_encodings.best_match(supported_encodings())
+    if encoding:
+        response.set_data(compressed_bodies.get((etag, encoding), lambda: compress(body, encoding)))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def cacheable(max_age, stale_while_revalidate=0):
+    """Decorator applying finalize() to a view's response."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            return finalize(make_response(view(*args, **kwargs)), max_age, stale_while_revalidate)
+        return wrapper
+    return decorator
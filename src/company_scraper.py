@@ -1,61 +1,168 @@
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
+import asyncio
+import argparse
 import json
-from datetime import datetime
+import os
 import time
+from datetime import datetime
+from metrics import registry, stage
+from rate_limiter import limiter
+from resilience import deadline, resilience
+from http_cache import response_cache, MODES as CACHE_MODES
+import page_parser
+from batch_store import BatchWriter, compact, DEFAULT_CHECKPOINT_EVERY
+from snapshot_format import write_snapshot_for_json
+from history_store import HistoryStore, HISTORY_PATH
 
-def scrape_company_info(symbol):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
+YAHOO_FINANCE_URL = os.environ.get('YAHOO_FINANCE_URL', 'https://finance.yahoo.com')
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+DEFAULT_CONCURRENCY = 8
+PAGE_TIMEOUT = 30
+# Time budget for the three pages of one symbol, retries included
+SYMBOL_DEADLINE = 90
+PAGES = ('quote', 'statistics', 'profile')
+
+symbols_scraped = registry.counter('scraper_symbols_total', 'Symbols scraped: ok, partial or failed', ('outcome',))
+pages_scraped = registry.counter('scraper_pages_total', 'Pages scraped: ok, fetch_error or parse_error',
+                                 ('page', 'outcome'))
+symbol_seconds = registry.histogram('scraper_symbol_duration_seconds', 'Time to fetch and parse one symbol')
+
+def parse_quote_page(html, symbol, data, parser=None):
+    """Extract the current price from the quote page."""
+    (parser or page_parser.default_parser).parse_quote(html, symbol, data)
+
+def parse_statistics_page(html, data, parser=None):
+    """Extract every two-column row of the key-statistics tables."""
+    (parser or page_parser.default_parser).parse_statistics(html, data)
+
+def parse_profile_page(html, data, parser=None):
+    """Extract the business description and employee count from the profile page."""
+    (parser or page_parser.default_parser).parse_profile(html, data)
+
+def page_urls(symbol, base_url=None):
+    """Return the quote, key-statistics and profile URLs for a symbol."""
+    base_url = base_url or YAHOO_FINANCE_URL
+    return (
+        f"{base_url}/quote/{symbol}",
+        f"{base_url}/quote/{symbol}/key-statistics",
+        f"{base_url}/quote/{symbol}/profile",
+    )
+
+async def fetch_page(session, url):
+    """Download a single page through the response cache and return its body as text.
+
+    Failed downloads are retried by the response cache (see resilience.py).
+    """
+    response = await response_cache.get_async(session, url, HEADERS)
+    return response.text
+
+async def scrape_company_info_async(session, symbol, base_url=None):
+    """Fetch the three pages of a symbol concurrently and parse them in page order.
+
+    A page that still fails after its retries, or does not parse, is reported
+    and left out; the fields of the other pages are kept.
+    """
+    started = time.perf_counter()
     data = {}
-    
-    try:
-        # Get company overview
-        url = f"https://finance.yahoo.com/quote/{symbol}"
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Get current price
-        price_element = soup.find('fin-streamer', {'data-symbol': symbol, 'data-field': 'regularMarketPrice'})
-        if price_element:
-            data['current_price'] = price_element.text
-            
-        # Get key statistics
-        stats_url = f"https://finance.yahoo.com/quote/{symbol}/key-statistics"
-        response = requests.get(stats_url, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        tables = soup.find_all('table')
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 2:
-                    key = cols[0].text.strip()
-                    value = cols[1].text.strip()
-                    data[key] = value
-        
-        # Get additional info from profile page
-        profile_url = f"https://finance.yahoo.com/quote/{symbol}/profile"
-        response = requests.get(profile_url, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        description = soup.find('p', {'class': 'Mt(15px) Lh(1.6)'})
-        if description:
-            data['company_description'] = description.text.strip()
-            
-        employees = soup.find('span', string='Full Time Employees')
-        if employees and employees.find_next('span'):
-            data['employees'] = employees.find_next('span').text
-            
-    except Exception as e:
-        print(f"Error scraping {symbol}: {str(e)}")
-    
+    urls = page_urls(symbol, base_url)
+    parsers = (lambda html: parse_quote_page(html, symbol, data),
+               lambda html: parse_statistics_page(html, data),
+               lambda html: parse_profile_page(html, data))
+
+    with deadline(SYMBOL_DEADLINE):
+        pages = await asyncio.gather(*(fetch_page(session, url) for url in urls), return_exceptions=True)
+
+    parsed = 0
+    for name, url, page, parse in zip(PAGES, urls, pages, parsers):
+        if isinstance(page, BaseException):
+            pages_scraped.inc(name, 'fetch_error')
+            print(f"Error scraping {symbol}: {url}: {type(page).__name__}: {str(page)}")
+            continue
+        try:
+            with stage('parse'):
+                parse(page)
+        except Exception as e:
+            pages_scraped.inc(name, 'parse_error')
+            print(f"Error parsing {url}: {type(e).__name__}: {str(e)}")
+        else:
+            pages_scraped.inc(name, 'ok')
+            parsed += 1
+
+    symbols_scraped.inc('ok' if parsed == len(PAGES) else 'partial' if parsed else 'failed')
+    symbol_seconds.observe(time.perf_counter() - started)
     return data
 
+async def scrape_companies_async(symbols, concurrency=DEFAULT_CONCURRENCY, base_url=None, on_result=None,
+                                 collect=True):
+    """Scrape many symbols at once, with at most `concurrency` symbols in flight.
+
+    Request pacing is left to the shared per-host rate limiter. `on_result` is
+    called with (symbol, data) as soon as each symbol finishes. With
+    collect=False results are only handed to `on_result` and not kept in memory.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency * 3)
+    timeout = aiohttp.ClientTimeout(total=PAGE_TIMEOUT)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def worker(symbol):
+            async with semaphore:
+                data = await scrape_company_info_async(session, symbol, base_url)
+                if on_result:
+                    on_result(symbol, data)
+                return data if collect else None
+
+        results = await asyncio.gather(*(worker(symbol) for symbol in symbols))
+
+    return dict(zip(symbols, results)) if collect else None
+
+def scrape_companies(symbols, concurrency=DEFAULT_CONCURRENCY, base_url=None, on_result=None, collect=True):
+    """Synchronous entry point for scrape_companies_async."""
+    return asyncio.run(scrape_companies_async(symbols, concurrency, base_url, on_result, collect))
+
+def scrape_company_info(symbol):
+    """Scrape a single symbol through the async engine."""
+    return scrape_companies([symbol], concurrency=1)[symbol]
+
+def run_statistics():
+    """Symbol and page outcomes of the scrapes so far."""
+    symbols = {outcome: int(count) for (outcome,), count in symbols_scraped.snapshot().items()}
+    pages = {}
+    for (page, outcome), count in pages_scraped.snapshot().items():
+        pages.setdefault(page, {})[outcome] = int(count)
+    count, seconds = symbol_seconds.snapshot().get((), (0, 0.0))
+    return {
+        'symbols': symbols,
+        'pages': pages,
+        'mean_symbol_seconds': round(seconds / count, 3) if count else None,
+    }
+
 def main():
+    parser = argparse.ArgumentParser(description='Scrape company statistics from Yahoo Finance.')
+    parser.add_argument('--parser', choices=page_parser.available_parsers(),
+                        help='HTML parser backend (defaults to the fastest installed one)')
+    parser.add_argument('--cache-mode', choices=CACHE_MODES,
+                        help='Response cache mode; replay scrapes offline from recorded pages')
+    parser.add_argument('--snapshot-format', choices=('arrow', 'parquet'), default='arrow',
+                        help='Typed columnar snapshot written next to the JSON output')
+    parser.add_argument('--run-id', help='Identifier of the run; reuse it to resume an interrupted run')
+    parser.add_argument('--runs-dir', default='runs', help='Directory of append-only run files')
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help='Number of symbols between fsync checkpoints')
+    parser.add_argument('--history-db', default=HISTORY_PATH,
+                        help="Snapshot history database the run's changes are recorded in ('' to skip)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Maximum number of symbols scraped at once')
+    parser.add_argument('--metrics-file',
+                        help='Write run metrics in the Prometheus text format (e.g. for a textfile collector)')
+    args = parser.parse_args()
+    if args.parser:
+        page_parser.default_parser = page_parser.get_parser(args.parser)
+    if args.cache_mode:
+        response_cache.mode = args.cache_mode
+
     companies = {
         'AAPL': 'Apple Inc.',
         'MSFT': 'Microsoft Corporation',
@@ -63,20 +170,42 @@ def main():
         'NVDA': 'NVIDIA Corporation',
         'META': 'Meta Platforms'
     }
-    
-    all_data = {}
-    for symbol, name in companies.items():
-        print(f"Scraping data for {name}...")
-        company_data = scrape_company_info(symbol)
-        all_data[symbol] = company_data
-        time.sleep(2)  # Be nice to the server
-    
-    # Save the data
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    with open(f'company_data_{timestamp}.json', 'w') as f:
-        json.dump(all_data, f, indent=4)
-    
-    print("Data collection complete. Check the JSON file for results.")
+
+    # Results stream to runs/<run_id>.jsonl; rerunning with the same --run-id resumes it
+    run_id = args.run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_path = os.path.join(args.runs_dir, f'{run_id}.jsonl')
+
+    with BatchWriter(run_path, args.checkpoint_every) as writer:
+        pending = [symbol for symbol in companies if symbol not in writer.completed]
+        if writer.completed:
+            print(f"Resuming run {run_id}: {len(writer.completed)} done, {len(pending)} remaining")
+
+        def record(symbol, data):
+            writer.write(symbol, data)
+            print(f"Scraped data for {companies[symbol]} ({len(data)} fields)")
+
+        print(f"Scraping data for {len(pending)} companies ({args.concurrency} at a time)...")
+        scrape_companies(pending, args.concurrency, on_result=record, collect=False)
+
+    # Compact the run into the single JSON file the analysis scripts read
+    count = compact(run_path, f'company_data_{run_id}.json', order=list(companies))
+    write_snapshot_for_json(f'company_data_{run_id}.json', '.' + args.snapshot_format)
+    if args.history_db:
+        changed = HistoryStore(args.history_db).record_json(f'company_data_{run_id}.json', run_id)
+        if changed is not None:
+            print(f"Recorded {changed} changed fields in {args.history_db}")
+
+    print(f"Data collection complete. Saved {count} companies to company_data_{run_id}.json.")
+    print(f"Rate limiter state: {json.dumps(limiter.stats())}")
+    print(f"Upstream retries and circuit breakers: {json.dumps(resilience.stats())}")
+    print(f"Response cache ({response_cache.mode}): {json.dumps(response_cache.stats)}")
+    print(f"Run statistics: {json.dumps(run_statistics())}")
+    if args.metrics_file:
+        registry.add_stats('rate_limiter', 'Rate limiter state per upstream host', limiter.stats, 'host')
+        registry.add_stats('upstream', 'Retries and circuit breaker state per upstream host', resilience.stats, 'host')
+        registry.add_stats('http_cache', 'Response cache counters', lambda: response_cache.stats)
+        with open(args.metrics_file, 'w') as f:
+            f.write(registry.render())
 
 if __name__ == "__main__":
     main()
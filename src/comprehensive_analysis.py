@@ -1,48 +1,59 @@
+import argparse
 import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from datetime import datetime
+from snapshot_format import find_snapshot, read_snapshot
+from normalize import clean_numeric_column
+from history_store import HistoryStore
 
 # 한글 폰트 설정
 plt.rcParams['font.family'] = 'Malgun Gothic'
 plt.rcParams['axes.unicode_minus'] = False
 
-# JSON 데이터 로드
-with open('company_data_20241128_221849.json', 'r') as f:
-    data = json.load(f)
-
-def clean_numeric(value):
-    if isinstance(value, str):
-        value = value.replace('$', '').replace(',', '').replace('%', '')
-        if 'T' in value:
-            value = float(value.replace('T', '')) * 1e12
-        elif 'B' in value:
-            value = float(value.replace('B', '')) * 1e9
-        elif 'M' in value:
-            value = float(value.replace('M', '')) * 1e6
-        else:
-            try:
-                value = float(value)
-            except:
-                value = None
-    return value
-
-# 데이터 전처리 및 DataFrame 생성
-df = pd.DataFrame.from_dict(data, orient='index')
-
-# 주요 재무 지표 정리
+DATA_FILE = 'company_data_20241128_221849.json'
+
+# 분석에 사용하는 컬럼
+METRIC_COLUMNS = [
+    'Market Cap', 'Revenue  (ttm)', 'Operating Margin  (ttm)', 'Profit Margin',
+    'Return on Equity  (ttm)', 'Total Cash  (mrq)', 'Total Debt  (mrq)', 'Trailing P/E',
+    'Quarterly Revenue Growth  (yoy)', 'Revenue Per Share  (ttm)'
+]
+
+parser = argparse.ArgumentParser(description='빅테크 기업 종합 재무 분석')
+parser.add_argument('--history', action='store_true',
+                    help='스냅샷 이력 DB(HISTORY_DB_PATH)의 최신 데이터로 분석')
+parser.add_argument('--as-of', help='이력 DB에서 이 시점(YYYY-MM-DD 또는 ISO 시각)의 데이터로 분석')
+args = parser.parse_args()
+
+# 데이터 로드: 이력 DB를 지정하면 최신/특정 시점 데이터를 복원하고,
+# 아니면 타입 스냅샷(Arrow/Parquet)의 필요한 컬럼만 읽고, 없으면 JSON 사용
+snapshot_path = find_snapshot(DATA_FILE)
+if args.history or args.as_of:
+    data = HistoryStore().as_of(args.as_of, fields=METRIC_COLUMNS)
+    if not data:
+        parser.error('이력 DB에 해당 시점의 데이터가 없습니다')
+    df = pd.DataFrame.from_dict(data, orient='index')
+elif snapshot_path:
+    df = read_snapshot(snapshot_path, columns=METRIC_COLUMNS)
+else:
+    with open(DATA_FILE, 'r') as f:
+        data = json.load(f)
+    df = pd.DataFrame.from_dict(data, orient='index')
+
+# 주요 재무 지표 정리 (컬럼 단위 벡터 변환)
 financial_metrics = pd.DataFrame(index=df.index)
-financial_metrics['시가총액'] = df['Market Cap'].apply(clean_numeric)
-financial_metrics['매출액'] = df['Revenue  (ttm)'].apply(clean_numeric)
-financial_metrics['영업이익률'] = df['Operating Margin  (ttm)'].apply(lambda x: clean_numeric(x.replace('%', '')))
-financial_metrics['순이익률'] = df['Profit Margin'].apply(lambda x: clean_numeric(x.replace('%', '')))
-financial_metrics['ROE'] = df['Return on Equity  (ttm)'].apply(lambda x: clean_numeric(x.replace('%', '')))
-financial_metrics['현금성자산'] = df['Total Cash  (mrq)'].apply(clean_numeric)
-financial_metrics['부채'] = df['Total Debt  (mrq)'].apply(clean_numeric)
-financial_metrics['PER'] = df['Trailing P/E'].apply(clean_numeric)
-financial_metrics['매출성장률'] = df['Quarterly Revenue Growth  (yoy)'].apply(lambda x: clean_numeric(x.replace('%', '')))
+financial_metrics['시가총액'] = clean_numeric_column(df['Market Cap'])
+financial_metrics['매출액'] = clean_numeric_column(df['Revenue  (ttm)'])
+financial_metrics['영업이익률'] = clean_numeric_column(df['Operating Margin  (ttm)'])
+financial_metrics['순이익률'] = clean_numeric_column(df['Profit Margin'])
+financial_metrics['ROE'] = clean_numeric_column(df['Return on Equity  (ttm)'])
+financial_metrics['현금성자산'] = clean_numeric_column(df['Total Cash  (mrq)'])
+financial_metrics['부채'] = clean_numeric_column(df['Total Debt  (mrq)'])
+financial_metrics['PER'] = clean_numeric_column(df['Trailing P/E'])
+financial_metrics['매출성장률'] = clean_numeric_column(df['Quarterly Revenue Growth  (yoy)'])
 
 # 1. 종합 재무 분석 차트
 plt.figure(figsize=(15, 10))
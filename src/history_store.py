@@ -0,0 +1,249 @@
+"""Delta-encoded history of scrape runs.
+
+Every run is one partition in the `runs` table, but only fields whose value
+changed since the symbol's previous state are written to `changes`, so the
+database grows with the volume of change rather than with the number of runs.
+A NULL value records a field that disappeared. `changes` is keyed by
+(symbol, field, run_ts), which serves both kinds of query from the index:
+
+- as_of(ts): the latest change at or before ts for every (symbol, field)
+- history(symbol, field): the changes of one field over a time range
+
+Run timestamps are ISO strings ('2024-11-28T22:18:49') so they sort as text.
+Two runs may share a timestamp (custom run ids recorded in the same second).
+Their changes share that timestamp too, so the run recorded last takes
+precedence whatever its run id; runs() lists them by run id.
+
+    python history_store.py import company_data_*.json
+    python history_store.py history NVDA "Operating Margin  (ttm)"
+    python history_store.py as-of 2024-11-28 --symbol NVDA
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PATH = os.environ.get('HISTORY_DB_PATH', os.path.join(ROOT, 'data', 'history.sqlite'))
+
+RUN_ID_FORMAT = '%Y%m%d_%H%M%S'
+RUN_ID_RE = re.compile(r'(\d{8}_\d{6})')
+
+def run_time(run_id):
+    """ISO timestamp of a run id such as 20241128_221849, or None if it is not one."""
+    match = RUN_ID_RE.search(run_id)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), RUN_ID_FORMAT).isoformat()
+    except ValueError:
+        return None
+
+def normalize_time(value):
+    """Accept datetimes, ISO strings and bare dates; a bare date means the end of that day."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='seconds')
+    value = str(value).strip().replace(' ', 'T')
+    if len(value) == 10:
+        return value + 'T23:59:59'
+    return value
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                run_ts TEXT NOT NULL,
+                symbols TEXT NOT NULL,
+                changes INTEGER NOT NULL
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS runs_by_time ON runs (run_ts, run_id)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS changes (
+                symbol TEXT NOT NULL,
+                field TEXT NOT NULL,
+                run_ts TEXT NOT NULL,
+                value TEXT,
+                PRIMARY KEY (symbol, field, run_ts)
+            ) WITHOUT ROWID''')
+            self._conn = conn
+        return self._conn
+
+    def _state(self, symbols, ts):
+        """{symbol: {field: encoded value}} as of ts, including NULL tombstones."""
+        state = {}
+        for symbol in symbols:
+            rows = self.conn.execute(
+                'SELECT field, value, MAX(run_ts) FROM changes WHERE symbol = ? AND run_ts <= ? GROUP BY field',
+                (symbol, ts),
+            )
+            state[symbol] = {field: value for field, value, _ in rows}
+        return state
+
+    def record_run(self, run_id, data, ts=None):
+        """Store the deltas of one run; returns the number of changed fields, or None if already recorded.
+
+        Symbols without data (failed scrapes) and symbols missing from the run keep
+        their previous state. A run older than the latest one is merged in place: a
+        later change that becomes redundant is removed.
+        """
+        ts = normalize_time(ts) or run_time(run_id) or datetime.now().isoformat(timespec='seconds')
+        with self.lock:
+            if self.conn.execute('SELECT 1 FROM runs WHERE run_id = ?', (run_id,)).fetchone():
+                return None
+            scraped = {symbol: fields for symbol, fields in data.items() if fields}
+            previous = self._state(scraped, ts)
+
+            rows = []
+            for symbol, fields in scraped.items():
+                before = previous[symbol]
+                current = {field: json.dumps(value) for field, value in fields.items()}
+                for field, value in current.items():
+                    if before.get(field) != value:
+                        rows.append((symbol, field, ts, value))
+                for field, value in before.items():
+                    if value is not None and field not in current:
+                        rows.append((symbol, field, ts, None))
+
+            self.conn.executemany('INSERT OR REPLACE INTO changes VALUES (?, ?, ?, ?)', rows)
+            for symbol, field, _, value in rows:
+                following = self.conn.execute(
+                    'SELECT run_ts, value FROM changes WHERE symbol = ? AND field = ? AND run_ts > ? '
+                    'ORDER BY run_ts LIMIT 1', (symbol, field, ts),
+                ).fetchone()
+                if following is not None and following[1] == value:
+                    self.conn.execute('DELETE FROM changes WHERE symbol = ? AND field = ? AND run_ts = ?',
+                                      (symbol, field, following[0]))
+            self.conn.execute('INSERT INTO runs VALUES (?, ?, ?, ?)',
+                              (run_id, ts, json.dumps(list(scraped)), len(rows)))
+            self.conn.commit()
+        return len(rows)
+
+    def record_json(self, json_path, run_id=None):
+        """Record a company_data_<run id>.json export as a run."""
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        if run_id is None:
+            run_id = os.path.basename(json_path)
+            run_id = run_id[len('company_data_'):] if run_id.startswith('company_data_') else run_id
+            run_id = run_id[:-len('.json')] if run_id.endswith('.json') else run_id
+        return self.record_run(run_id, data)
+
+    def runs(self):
+        """[(run_id, run_ts, symbols, changes)] in time order; symbols lists the symbols scraped."""
+        with self.lock:
+            rows = self.conn.execute('SELECT * FROM runs ORDER BY run_ts, run_id').fetchall()
+        return [(run_id, run_ts, json.loads(symbols), changes) for run_id, run_ts, symbols, changes in rows]
+
+    def latest_run(self):
+        """(run_id, run_ts) of the most recent run, or None for an empty store."""
+        with self.lock:
+            return self.conn.execute('SELECT run_id, run_ts FROM runs ORDER BY run_ts DESC, run_id DESC LIMIT 1').fetchone()
+
+    def fields(self):
+        """Names of every field recorded in any run."""
+        with self.lock:
+            return [field for field, in self.conn.execute('SELECT DISTINCT field FROM changes')]
+
+    def as_of(self, ts=None, symbols=None, fields=None):
+        """Reconstruct {symbol: {field: value}} as it was at ts (default: latest run)."""
+        ts = normalize_time(ts) or '9999-12-31T23:59:59'
+        query = 'SELECT symbol, field, value, MAX(run_ts) FROM changes WHERE run_ts <= ?'
+        params = [ts]
+        for column, values in (('symbol', symbols), ('field', fields)):
+            if values is not None:
+                values = list(values)
+                query += f" AND {column} IN ({', '.join('?' * len(values))})"
+                params.extend(values)
+        query += ' GROUP BY symbol, field'
+
+        result = {}
+        with self.lock:
+            for symbol, field, value, _ in self.conn.execute(query, params):
+                if value is not None:
+                    result.setdefault(symbol, {})[field] = json.loads(value)
+            last_run = self.conn.execute(
+                'SELECT symbols FROM runs WHERE run_ts <= ? ORDER BY run_ts DESC, run_id DESC LIMIT 1', (ts,)
+            ).fetchone()
+
+        # Symbols in the order of the last run, then those it did not cover
+        order = json.loads(last_run[0]) if last_run else []
+        ordered = {symbol: result[symbol] for symbol in order if symbol in result}
+        ordered.update((symbol, fields) for symbol, fields in result.items() if symbol not in ordered)
+        return ordered
+
+    def history(self, symbol, field, start=None, end=None):
+        """[(run_ts, value)] for each change of one field in [start, end].
+
+        The first entry is the value in effect at `start`, so a flat series still
+        has a starting point; None marks a field that was missing.
+        """
+        start, end = normalize_time(start), normalize_time(end) or '9999-12-31T23:59:59'
+        with self.lock:
+            points = []
+            if start is not None:
+                row = self.conn.execute(
+                    'SELECT run_ts, value FROM changes WHERE symbol = ? AND field = ? AND run_ts <= ? '
+                    'ORDER BY run_ts DESC LIMIT 1', (symbol, field, start),
+                ).fetchone()
+                if row is not None:
+                    points.append(row)
+            points.extend(self.conn.execute(
+                'SELECT run_ts, value FROM changes WHERE symbol = ? AND field = ? AND run_ts > ? AND run_ts <= ? '
+                'ORDER BY run_ts', (symbol, field, start or '', end),
+            ))
+        return [(run_ts, None if value is None else json.loads(value)) for run_ts, value in points]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+def main():
+    parser = argparse.ArgumentParser(description='Delta-encoded history of scrape runs.')
+    parser.add_argument('--db', default=HISTORY_PATH, help='History database path')
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help='Record company_data JSON exports as runs')
+    import_parser.add_argument('files', nargs='+')
+    history_parser = commands.add_parser('history', help='Changes of one field of one symbol')
+    history_parser.add_argument('symbol')
+    history_parser.add_argument('field')
+    history_parser.add_argument('--start')
+    history_parser.add_argument('--end')
+    as_of_parser = commands.add_parser('as-of', help='Reconstruct the data at a point in time')
+    as_of_parser.add_argument('time', nargs='?', help='Date or ISO timestamp (default: latest)')
+    as_of_parser.add_argument('--symbol', action='append')
+    commands.add_parser('runs', help='List recorded runs')
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    if args.command == 'import':
+        # Oldest first, so most runs append to the end of each field's history
+        for path in sorted(args.files, key=lambda p: run_time(os.path.basename(p)) or ''):
+            changed = store.record_json(path)
+            print(f"{path}: " + ("already recorded" if changed is None else f"{changed} changed fields"))
+    elif args.command == 'history':
+        for run_ts, value in store.history(args.symbol, args.field, args.start, args.end):
+            print(f"{run_ts}  {value}")
+    elif args.command == 'as-of':
+        print(json.dumps(store.as_of(args.time, symbols=args.symbol), indent=4, ensure_ascii=False))
+    else:
+        for run_id, run_ts, symbols, changes in store.runs():
+            print(f"{run_id:<20} {run_ts}  {len(symbols):>6} symbols  {changes:>8} changes")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""Persistent HTTP response cache shared by the scraper and the Flask app.
+
+Responses are stored in SQLite keyed by URL. A fresh entry is served without
+touching the network; a stale one is revalidated with If-None-Match /
+If-Modified-Since so an unchanged page costs a 304 instead of a full download.
+The cache size is bounded by evicting the least recently used entries. The
+total size is kept in the database by triggers, so every process that shares
+the file sees the same figure without summing the table on each write.
+
+Modes (HTTP_CACHE_MODE):
+- 'normal': serve fresh entries, revalidate stale ones
+- 'refresh': always go upstream and record the result
+- 'replay': never go upstream; a miss raises CacheMiss
+- 'off': bypass the cache entirely
+
+yfinance handles cookies and crumbs itself, so its results are cached after
+decoding under synthetic keys such as yfinance://info/AAPL (see memoize).
+
+Upstream requests go through the retry policy and circuit breakers of
+resilience.py, with timeouts cut to the current deadline; 429 and 5xx answers
+are retried and, when they persist, raised as UpstreamStatusError.
+"""
+import json
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+
+import aiohttp
+import requests
+
+from rate_limiter import is_throttling_status, limiter, retry_after_seconds
+from resilience import UpstreamStatusError, acquire, acquire_async, resilience, timeout_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.environ.get('HTTP_CACHE_PATH', os.path.join(ROOT, '.cache', 'http_cache.sqlite'))
+CACHE_MODE = os.environ.get('HTTP_CACHE_MODE', 'normal')
+MAX_CACHE_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+MODES = ('normal', 'refresh', 'replay', 'off')
+
+# Freshness lifetime in seconds per endpoint; the first matching pattern wins
+DEFAULT_TTLS = [
+    (r'^https?://[^/]+/quote/[^/?]+/profile', 7 * 24 * 3600),
+    (r'^https?://[^/]+/quote/[^/?]+/key-statistics', 6 * 3600),
+    (r'^https?://[^/]+/quote/[^/?]+/?$', 60),
+    (r'/v1/finance/search', 24 * 3600),
+    (r'^yfinance://info/', 15 * 60),
+    (r'^yfinance://history/', 60 * 60),
+]
+DEFAULT_TTL = 300
+REQUEST_TIMEOUT = 30
+# Hits refresh an entry's LRU timestamp at most this often, to keep hits read-only
+TOUCH_INTERVAL = 60
+
+# Response headers worth keeping alongside the body
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Date')
+
+class CacheMiss(Exception):
+    """Raised in replay mode when a URL has not been recorded."""
+
+class CachedResponse:
+    """Minimal response object returned for both cached and fresh responses."""
+
+    def __init__(self, url, status, headers, body, from_cache=False):
+        self.url = url
+        self.status_code = status
+        self.headers = headers
+        self.content = body
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+class HTTPCache:
+    def __init__(self, path=CACHE_PATH, mode=CACHE_MODE, max_bytes=MAX_CACHE_BYTES, ttls=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (DEFAULT_TTLS if ttls is None else ttls)]
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+            # One row holding SUM(size); seeded once, then adjusted by the triggers
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache_size'").fetchone() is None:
+                conn.execute('CREATE TABLE cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)')
+                conn.execute('INSERT INTO cache_size SELECT 0, COALESCE(SUM(size), 0) FROM responses')
+                conn.execute('''CREATE TRIGGER responses_size_insert AFTER INSERT ON responses BEGIN
+                    UPDATE cache_size SET bytes = bytes + NEW.size WHERE id = 0; END''')
+                conn.execute('''CREATE TRIGGER responses_size_update AFTER UPDATE OF size ON responses BEGIN
+                    UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END''')
+                conn.execute('''CREATE TRIGGER responses_size_delete AFTER DELETE ON responses BEGIN
+                    UPDATE cache_size SET bytes = bytes - OLD.size WHERE id = 0; END''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return DEFAULT_TTL
+
+    def lookup(self, url):
+        """Return (status, headers, body, fetched_at) for a cached URL, or None."""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT status, headers, body, fetched_at, accessed_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, headers, body, fetched_at, accessed_at = row
+            if now - accessed_at > TOUCH_INTERVAL:
+                self.conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (now, url))
+                self.conn.commit()
+        return status, json.loads(headers), body, fetched_at
+
+    def store(self, url, status, headers, body):
+        now = time.time()
+        kept = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        with self.lock:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete would skip the size trigger
+            self.conn.execute(
+                'INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET '
+                'status = excluded.status, headers = excluded.headers, body = excluded.body, '
+                'size = excluded.size, fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at',
+                (url, status, json.dumps(kept), body, len(body), now, now),
+            )
+            self.stats['stored'] += 1
+            self._evict()
+            self.conn.commit()
+
+    def _revalidated(self, url, headers):
+        """Mark a stale entry fresh again after a 304, taking any new validators."""
+        kept = {name: headers[name] for name in ('ETag', 'Last-Modified') if name in headers}
+        with self.lock:
+            row = self.conn.execute('SELECT headers FROM responses WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                stored = json.loads(row[0])
+                stored.update(kept)
+                self.conn.execute('UPDATE responses SET headers = ?, fetched_at = ? WHERE url = ?',
+                                  (json.dumps(stored), time.time(), url))
+                self.conn.commit()
+            self.stats['revalidated'] += 1
+
+    def size(self):
+        """Total body bytes in the cache."""
+        return self.conn.execute('SELECT bytes FROM cache_size WHERE id = 0').fetchone()[0]
+
+    def _evict(self):
+        total = self.size()
+        if total <= self.max_bytes:
+            return
+        # Least recently used first, a few entries at a time off the accessed_at index
+        while total > self.max_bytes:
+            oldest = self.conn.execute('SELECT url, size FROM responses ORDER BY accessed_at LIMIT 32').fetchall()
+            if not oldest:
+                break
+            for url, size in oldest:
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                total -= size
+                self.stats['evicted'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM responses')
+            self.conn.commit()
+
+    def _count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def _cached(self, url, entry):
+        status, headers, body, _ = entry
+        return CachedResponse(url, status, headers, body, from_cache=True)
+
+    def _before_fetch(self, url):
+        """Resolve a request from the cache, or return the headers for a conditional GET.
+
+        Returns (response, entry, validators): response is set when the cache
+        answers on its own.
+        """
+        entry = self.lookup(url) if self.mode != 'off' else None
+        if self.mode == 'replay':
+            if entry is None:
+                raise CacheMiss(f"Not recorded in the response cache: {url}")
+            self._count('hits')
+            return self._cached(url, entry), entry, {}
+        if entry is not None and self.mode == 'normal' and time.time() - entry[3] < self.ttl_for(url):
+            self._count('hits')
+            return self._cached(url, entry), entry, {}
+
+        self._count('misses')
+        validators = {}
+        if entry is not None:
+            if 'ETag' in entry[1]:
+                validators['If-None-Match'] = entry[1]['ETag']
+            if 'Last-Modified' in entry[1]:
+                validators['If-Modified-Since'] = entry[1]['Last-Modified']
+        return None, entry, validators
+
+    def _after_fetch(self, url, entry, status, headers, body):
+        if status == 304 and entry is not None:
+            self._revalidated(url, headers)
+            return self._cached(url, entry)
+        if status == 200 and self.mode != 'off':
+            self.store(url, status, headers, body)
+        return CachedResponse(url, status, headers, body)
+
+    def get(self, url, headers=None):
+        """GET a URL through the cache with requests."""
+        response, entry, validators = self._before_fetch(url)
+        if response is not None:
+            return response
+
+        return resilience.call(url, self._fetch, url, entry, {**(headers or {}), **validators})
+
+    def _fetch(self, url, entry, headers):
+        acquire(url)
+        try:
+            upstream = requests.get(url, headers=headers, timeout=timeout_for(REQUEST_TIMEOUT))
+        except requests.RequestException as e:
+            limiter.report_error(url, e)
+            raise
+        limiter.report(url, upstream.status_code, retry_after_seconds(upstream.headers))
+        if is_throttling_status(upstream.status_code):
+            raise UpstreamStatusError(url, upstream.status_code)
+        return self._after_fetch(url, entry, upstream.status_code, upstream.headers, upstream.content)
+
+    async def get_async(self, session, url, headers=None):
+        """GET a URL through the cache with an aiohttp session."""
+        response, entry, validators = self._before_fetch(url)
+        if response is not None:
+            return response
+
+        return await resilience.call_async(url, self._fetch_async, session, url, entry,
+                                           {**(headers or {}), **validators})
+
+    async def _fetch_async(self, session, url, entry, headers):
+        await acquire_async(url)
+        timeout = aiohttp.ClientTimeout(total=timeout_for(REQUEST_TIMEOUT))
+        try:
+            async with session.get(url, headers=headers, timeout=timeout) as upstream:
+                status, upstream_headers = upstream.status, upstream.headers
+                limiter.report(url, status, retry_after_seconds(upstream_headers))
+                body = await upstream.read()
+        except Exception as e:
+            limiter.report_error(url, e)
+            raise
+        if is_throttling_status(status):
+            raise UpstreamStatusError(url, status)
+        return self._after_fetch(url, entry, status, upstream_headers, body)
+
+    def memoize(self, key, loader):
+        """Cache the result of loader() under a synthetic key using the key's TTL."""
+        response, _, _ = self._before_fetch(key)
+        if response is not None:
+            return pickle.loads(response.content)
+
+        value = loader()
+        if self.mode != 'off':
+            self.store(key, 200, {}, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        return value
+
+    def memoize_many(self, keys, loader):
+        """Batch form of memoize for {item: key}; loader(missing items) returns {item: value}.
+
+        Items the loader leaves out are not cached and are missing from the result.
+        """
+        values = {}
+        missing = []
+        for item, key in keys.items():
+            response, _, _ = self._before_fetch(key)
+            if response is not None:
+                values[item] = pickle.loads(response.content)
+            else:
+                missing.append(item)
+
+        if missing:
+            loaded = loader(missing)
+            for item, value in loaded.items():
+                if self.mode != 'off':
+                    self.store(keys[item], 200, {}, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                values[item] = value
+        return values
+
+response_cache = HTTPCache()
@@ -0,0 +1,233 @@
+"""Counters, latency histograms and per-request stage timings, served in the Prometheus text format.
+
+- stage(name) (or @timed(name)) times one stage of a request: upstream info,
+  history, summary, translation, serialization. The time goes into the
+  stage_duration_seconds histogram and, per request, into a Server-Timing
+  header (stages that run several times are summed).
+- begin_request()/end_request() wrap a request, record
+  http_request_duration_seconds and return the Server-Timing value;
+  instrument(app) does this for a Flask app and adds GET /metrics.
+- add_stats() exposes the stats() dicts the app already keeps (rate limiter,
+  circuit breakers, caches) as gauges read at scrape time.
+
+The hot path is a perf_counter pair and a few integer updates under a lock;
+nothing is formatted until /metrics is requested.
+"""
+import bisect
+import contextlib
+import contextvars
+import functools
+import re
+import threading
+import time
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; from a cache hit up to a request that used its whole deadline
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+_timings = contextvars.ContextVar('stage_timings', default=None)
+_NOT_NAME = re.compile(r'[^a-zA-Z0-9_]')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self):
+        """{labels: value}"""
+        with self.lock:
+            return dict(self.values)
+
+    def samples(self):
+        values = self.snapshot()
+        for labels, value in sorted(values.items()):
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.series = {}  # labels -> [per-bucket counts (last is +Inf), sum]
+
+    def observe(self, value, *labels):
+        position = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def snapshot(self):
+        """{labels: (count, sum)}"""
+        with self.lock:
+            return {labels: (sum(counts), total) for labels, (counts, total) in self.series.items()}
+
+    def samples(self):
+        with self.lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self.series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", _number(bound))])} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(round(total, 6))}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}'
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_stats(self, prefix, help, stats, label=None):
+        """Expose a stats() callable as gauges read at scrape time.
+
+        stats() returns {field: value}, or with `label` {label value: {field: value}}.
+        Numbers become `<prefix>_<field>`; a string such as a breaker state becomes
+        `<prefix>_<field>{<field>="open"} 1`. Other values are left out.
+        """
+        self.collectors.append((prefix, help, stats, label))
+
+    def _collected(self, prefix, help, stats, label):
+        try:
+            groups = stats() if label else {None: stats()}
+        except Exception as e:
+            print(f"Collecting {prefix} metrics failed: {str(e)}")
+            return
+        samples = {}
+        for key, fields in groups.items():
+            extra = [(label, key)] if label else []
+            for field, value in fields.items():
+                name = f'{prefix}_{_NOT_NAME.sub("_", field)}'
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    samples.setdefault(name, []).append(f'{name}{_labels((), (), extra)} {_number(value)}')
+                elif isinstance(value, str):
+                    series = _labels((), (), extra + [(_NOT_NAME.sub('_', field), value)])
+                    samples.setdefault(name, []).append(f'{name}{series} 1')
+        for name, lines in samples.items():
+            yield f'# HELP {name} {help}'
+            yield f'# TYPE {name} gauge'
+            yield from lines
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        for collector in self.collectors:
+            lines.extend(self._collected(*collector))
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+request_seconds = registry.histogram('http_request_duration_seconds', 'Time to produce an API response',
+                                     ('method', 'route', 'status'))
+stage_seconds = registry.histogram('stage_duration_seconds', 'Time spent in one stage of a request', ('stage',))
+upstream_seconds = registry.histogram('upstream_request_duration_seconds',
+                                      'Duration of one upstream attempt', ('host', 'outcome'))
+
+@contextlib.contextmanager
+def stage(name):
+    """Time a block as a stage of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+def timed(name):
+    """Decorator timing every call of a function as stage `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def begin_request():
+    """Start collecting stage timings for the current context; returns the state for end_request."""
+    return time.perf_counter(), _timings.set([])
+
+def end_request(state, method, route, status):
+    """Record the request and return its Server-Timing header value."""
+    started, token = state
+    elapsed = time.perf_counter() - started
+    request_seconds.observe(elapsed, method, route, str(status))
+    totals = {}
+    for name, seconds in _timings.get() or ():
+        totals[name] = totals.get(name, 0.0) + seconds
+    _timings.reset(token)
+    parts = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in totals.items()]
+    parts.append(f'total;dur={elapsed * 1000:.1f}')
+    return ', '.join(parts)
+
+def instrument(app):
+    """Time every request of a Flask app, add Server-Timing to /api/ responses, and serve GET /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_request_timing():
+        g.metrics_state = begin_request()
+
+    @app.after_request
+    def finish_request_timing(response):
+        state = g.pop('metrics_state', None)
+        if state is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            timing = end_request(state, request.method, route, response.status_code)
+            if request.path.startswith('/api/'):
+                response.headers['Server-Timing'] = timing
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    return app
@@ -0,0 +1,82 @@
+"""Vectorized conversion of scraped display strings to numbers.
+
+Replaces the per-cell clean_numeric helpers of the analysis scripts. Whole
+columns are converted at once: '$' and ',' and '%' are dropped, a trailing
+T/B/M/k suffix scales the value, and anything unparseable becomes NaN (the old
+helpers returned None). Columns that are already numeric, e.g. from a typed
+snapshot, pass through as float64.
+
+With pyarrow installed, string columns go through pyarrow.compute kernels;
+pandas string methods on object columns loop over the cells in Python and are
+no faster than the old helpers. Without pyarrow the pandas path is used.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+SUFFIX_MULTIPLIERS = {'T': 1e12, 'B': 1e9, 'M': 1e6, 'k': 1e3}
+NUMBER_PATTERN = r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$'
+
+def _clean_strings_arrow(text):
+    for char in '$,%':
+        text = pc.replace_substring(text, char, '')
+    text = pc.ascii_trim_whitespace(text)
+
+    # Position of the last character in SUFFIX_MULTIPLIERS, or len() when it is not a suffix
+    suffixes = pc.index_in(pc.utf8_slice_codeunits(text, -1), value_set=pa.array(list(SUFFIX_MULTIPLIERS)))
+    lookup = np.append(np.fromiter(SUFFIX_MULTIPLIERS.values(), dtype='float64'), 1.0)
+    multipliers = lookup[pc.fill_null(suffixes, len(SUFFIX_MULTIPLIERS)).to_numpy()]
+    has_suffix = multipliers != 1.0
+    if has_suffix.any():
+        text = pc.if_else(pa.array(has_suffix), pc.utf8_slice_codeunits(text, 0, -1), text)
+
+    # Placeholders ('--') and non-numbers (dates, words) become nulls; validating first
+    # is much cheaper than a cast that fails
+    valid = pc.match_substring_regex(text, NUMBER_PATTERN)
+    numbers = pc.cast(pc.if_else(valid, text, None), pa.float64())
+    return numbers.to_numpy(zero_copy_only=False) * multipliers
+
+def _clean_strings_pandas(values):
+    cleaned = values.str.replace(r'[$,%]', '', regex=True).str.strip()
+    last = cleaned.str[-1:].to_numpy()
+    conditions = [last == suffix for suffix in SUFFIX_MULTIPLIERS]
+    multipliers = np.select(conditions, list(SUFFIX_MULTIPLIERS.values()), default=1.0)
+    body = cleaned.where(multipliers == 1.0, cleaned.str[:-1])
+    return pd.to_numeric(body, errors='coerce').to_numpy(dtype='float64') * multipliers
+
+def clean_numeric_column(column):
+    """Convert a Series of display strings ("3.55T", "23.97%", "$1,234") to float64."""
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype('float64')
+
+    if pa is not None and isinstance(column.dtype, pd.StringDtype):
+        # Arrow-backed string columns hand their buffers over without a copy
+        return pd.Series(_clean_strings_arrow(pa.array(column.array)), index=column.index, name=column.name)
+
+    values = column.astype(object)
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == 'string':
+        if pa is not None:
+            numbers = _clean_strings_arrow(pa.array(values, type=pa.string(), from_pandas=True))
+        else:
+            numbers = _clean_strings_pandas(values)
+        return pd.Series(numbers, index=column.index, name=column.name)
+    if kind not in ('mixed', 'mixed-integer'):
+        return pd.to_numeric(values, errors='coerce').astype('float64')
+
+    # Strings mixed with numbers: convert the strings, coerce the rest directly
+    is_text = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    result = pd.to_numeric(values.where(~is_text, np.nan), errors='coerce').to_numpy(dtype='float64', copy=True)
+    if is_text.any():
+        result[is_text] = clean_numeric_column(values[is_text]).to_numpy()
+    return pd.Series(result, index=column.index, name=column.name)
+
+def clean_numeric_frame(frame, columns=None):
+    """Convert the given columns (default: all) of a DataFrame to float64."""
+    columns = list(frame.columns) if columns is None else columns
+    return pd.DataFrame({column: clean_numeric_column(frame[column]) for column in columns}, index=frame.index)
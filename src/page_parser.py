@@ -0,0 +1,142 @@
+"""Parser backends for the Yahoo Finance quote, key-statistics and profile pages.
+
+Every backend fills the scraper's data dict exactly like the original full-tree
+BeautifulSoup code did; they differ only in how much of the page they build:
+
+- 'html.parser': full BeautifulSoup tree, the reference implementation
+- 'strainer': BeautifulSoup + html.parser restricted by SoupStrainer
+- 'lxml': BeautifulSoup + lxml restricted by SoupStrainer (needs lxml)
+- 'selectolax': lexbor DOM queried directly (needs selectolax)
+"""
+import os
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+DESCRIPTION_CLASS = 'Mt(15px) Lh(1.6)'
+EMPLOYEES_LABEL = 'Full Time Employees'
+
+class SoupParser:
+    """BeautifulSoup parsing, optionally restricted to the nodes the scraper reads."""
+
+    def __init__(self, builder='html.parser', strained=False):
+        self.builder = builder
+        self.strained = strained
+        self.statistics_strainer = SoupStrainer('table') if strained else None
+        self.profile_strainer = SoupStrainer(['p', 'span']) if strained else None
+
+    def _soup(self, html, strainer):
+        return BeautifulSoup(html, self.builder, parse_only=strainer)
+
+    def parse_quote(self, html, symbol, data):
+        attrs = {'data-symbol': symbol, 'data-field': 'regularMarketPrice'}
+        strainer = SoupStrainer('fin-streamer', attrs) if self.strained else None
+        soup = self._soup(html, strainer)
+        price_element = soup.find('fin-streamer', attrs)
+        if price_element:
+            data['current_price'] = price_element.text
+
+    def parse_statistics(self, html, data):
+        soup = self._soup(html, self.statistics_strainer)
+        tables = soup.find_all('table')
+        for table in tables:
+            rows = table.find_all('tr')
+            for row in rows:
+                cols = row.find_all('td')
+                if len(cols) >= 2:
+                    key = cols[0].text.strip()
+                    value = cols[1].text.strip()
+                    data[key] = value
+
+    def parse_profile(self, html, data):
+        soup = self._soup(html, self.profile_strainer)
+        description = soup.find('p', {'class': DESCRIPTION_CLASS})
+        if description:
+            data['company_description'] = description.text.strip()
+
+        employees = soup.find('span', string=EMPLOYEES_LABEL)
+        if employees and employees.find_next('span'):
+            data['employees'] = employees.find_next('span').text
+
+def _node_string(node):
+    """Mirror BeautifulSoup's Tag.string: the text of a node with a single child."""
+    children = list(node.iter(include_text=True))
+    if len(children) != 1:
+        return None
+    child = children[0]
+    if child.tag == '-text':
+        return child.text_content
+    if child.tag.startswith('-') or child.tag.startswith('_'):
+        return None
+    return _node_string(child)
+
+class SelectolaxParser:
+    """Query the lexbor DOM directly without building Python objects for every node."""
+
+    def parse_quote(self, html, symbol, data):
+        tree = LexborHTMLParser(html)
+        for node in tree.css('fin-streamer'):
+            attrs = node.attributes
+            if attrs.get('data-symbol') == symbol and attrs.get('data-field') == 'regularMarketPrice':
+                data['current_price'] = node.text()
+                break
+
+    def parse_statistics(self, html, data):
+        tree = LexborHTMLParser(html)
+        for table in tree.css('table'):
+            for row in table.css('tr'):
+                cols = row.css('td')
+                if len(cols) >= 2:
+                    data[cols[0].text().strip()] = cols[1].text().strip()
+
+    def parse_profile(self, html, data):
+        tree = LexborHTMLParser(html)
+        for node in tree.css('p'):
+            if ' '.join((node.attributes.get('class') or '').split()) == DESCRIPTION_CLASS:
+                data['company_description'] = node.text().strip()
+                break
+
+        # find_next('span') is the next span in document order, which css() preserves
+        spans = tree.css('span')
+        for index, span in enumerate(spans):
+            if _node_string(span) == EMPLOYEES_LABEL:
+                if index + 1 < len(spans):
+                    data['employees'] = spans[index + 1].text()
+                break
+
+def available_parsers():
+    """Return the names of the backends usable in this environment, fastest first."""
+    names = []
+    if LexborHTMLParser is not None:
+        names.append('selectolax')
+    if lxml is not None:
+        names.append('lxml')
+    names.extend(['strainer', 'html.parser'])
+    return names
+
+def get_parser(name=None):
+    """Build a parser backend by name; None picks the fastest installed one."""
+    name = name or available_parsers()[0]
+    if name == 'html.parser':
+        return SoupParser('html.parser')
+    if name == 'strainer':
+        return SoupParser('html.parser', strained=True)
+    if name == 'lxml':
+        if lxml is None:
+            raise ImportError("The 'lxml' parser backend requires the lxml package")
+        return SoupParser('lxml', strained=True)
+    if name == 'selectolax':
+        if LexborHTMLParser is None:
+            raise ImportError("The 'selectolax' parser backend requires the selectolax package")
+        return SelectolaxParser()
+    raise ValueError(f"Unknown parser backend: {name}")
+
+default_parser = get_parser(os.environ.get('SCRAPER_PARSER'))
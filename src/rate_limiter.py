@@ -0,0 +1,183 @@
+import asyncio
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+YAHOO_FINANCE_HOST = 'finance.yahoo.com'
+YAHOO_QUERY_HOST = 'query2.finance.yahoo.com'
+TRANSLATION_HOST = 'translate.google.com'
+
+# Sustained requests per second and burst size for each upstream host
+DEFAULT_LIMITS = {
+    YAHOO_FINANCE_HOST: {'rate': 4.0, 'burst': 12},
+    YAHOO_QUERY_HOST: {'rate': 2.0, 'burst': 6},
+    TRANSLATION_HOST: {'rate': 2.0, 'burst': 8},
+}
+FALLBACK_LIMIT = {'rate': 2.0, 'burst': 4}
+
+MIN_RATE_FRACTION = 0.05
+RECOVERY_FRACTION = 0.1
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+# A bare 429 in an error message: not part of a larger number such as 4290 or 429.50
+THROTTLED_MESSAGE = re.compile(r'Too Many Requests|(?<![\d.])429(?![\d.])')
+
+def host_of(target):
+    """Return the host name of a URL, or the target itself if it already is a host."""
+    if '://' in target:
+        return urlparse(target).hostname or target
+    return target
+
+def is_throttling_status(status):
+    return status == 429 or (status is not None and 500 <= status < 600)
+
+def status_from_exception(exc):
+    """Best-effort HTTP status of an exception raised by requests, aiohttp or yfinance."""
+    status = getattr(exc, 'status', None) or getattr(exc, 'status_code', None)
+    response = getattr(exc, 'response', None)
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+    if status is None and THROTTLED_MESSAGE.search(str(exc)):
+        status = 429
+    return status if isinstance(status, int) else None
+
+class HostBucket:
+    """Token bucket for one upstream host with adaptive back-off.
+
+    The bucket hands out reservations rather than blocking, so the same state
+    serves threads and event loops alike: a caller gets the number of seconds to
+    wait and sleeps outside the lock. While tokens are available the wait is 0.
+    """
+
+    def __init__(self, host, rate, burst):
+        self.host = host
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.backoff = 0.0
+        self.backoff_until = 0.0
+        self.requests = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.throttled = 0
+        self.last_status = None
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        """Take a token and return how long the caller must wait before using it."""
+        self._refill(now)
+        self.tokens -= 1
+        wait = max(0.0, -self.tokens / self.rate, self.backoff_until - now)
+        self.requests += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total_wait += wait
+        return wait
+
+    def record(self, status, now, retry_after=None):
+        """Halve the rate and back off on 429/5xx, recover gradually on success."""
+        self.last_status = status
+        if is_throttling_status(status):
+            self.throttled += 1
+            self.rate = max(self.base_rate * MIN_RATE_FRACTION, self.rate / 2)
+            self.backoff = min(MAX_BACKOFF, self.backoff * 2 if self.backoff else INITIAL_BACKOFF)
+            delay = retry_after if retry_after is not None else self.backoff
+            self.backoff_until = max(self.backoff_until, now + delay)
+            # Drop queued burst capacity so the back-off takes effect immediately
+            self.tokens = min(self.tokens, 0.0)
+        elif status is not None and status < 400:
+            self._refill(now)
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_FRACTION)
+            self.backoff = 0.0
+
+    def stats(self, now):
+        self._refill(now)
+        return {
+            'rate': round(self.rate, 3),
+            'base_rate': self.base_rate,
+            'burst': self.burst,
+            'tokens': round(self.tokens, 3),
+            'backoff_remaining': round(max(0.0, self.backoff_until - now), 3),
+            'requests': self.requests,
+            'delayed': self.delayed,
+            'total_wait': round(self.total_wait, 3),
+            'throttled': self.throttled,
+            'last_status': self.last_status,
+        }
+
+class RateLimiter:
+    """Per-host token buckets shared by the scraper, the Flask apps and translation."""
+
+    def __init__(self, limits=None, fallback=None):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.fallback = fallback or FALLBACK_LIMIT
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            limit = self.limits.get(host, self.fallback)
+            bucket = self.buckets[host] = HostBucket(host, limit['rate'], limit['burst'])
+        return bucket
+
+    def configure(self, target, rate, burst):
+        """Set the sustained rate and burst size for a host, resetting its bucket."""
+        host = host_of(target)
+        with self.lock:
+            self.limits[host] = {'rate': rate, 'burst': burst}
+            self.buckets.pop(host, None)
+
+    def reserve(self, target):
+        """Reserve a request slot for a URL or host and return the wait in seconds."""
+        host = host_of(target)
+        with self.lock:
+            return self._bucket(host).reserve(time.monotonic())
+
+    def acquire(self, target):
+        """Block until a request to the target's host is allowed."""
+        wait = self.reserve(target)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, target):
+        """Event-loop friendly version of acquire."""
+        wait = self.reserve(target)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def report(self, target, status, retry_after=None):
+        """Feed the HTTP status of a finished request back into the host's bucket."""
+        host = host_of(target)
+        with self.lock:
+            self._bucket(host).record(status, time.monotonic(), retry_after)
+
+    def report_error(self, target, exc):
+        """Report a failed request; only throttling errors slow the host down."""
+        status = status_from_exception(exc)
+        self.report(target, status)
+        return status
+
+    def stats(self):
+        now = time.monotonic()
+        with self.lock:
+            return {host: bucket.stats(now) for host, bucket in self.buckets.items()}
+
+limiter = RateLimiter()
+
+def retry_after_seconds(headers):
+    """Parse a numeric Retry-After header, ignoring HTTP-date values."""
+    value = headers.get('Retry-After') if headers else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
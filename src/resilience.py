@@ -0,0 +1,305 @@
+"""Deadlines, retries with jittered backoff and per-host circuit breakers for upstream calls.
+
+- deadline(seconds) gives the current context (a request, a scraped symbol) one
+  time budget. Upstream calls size their timeouts from what is left of it with
+  timeout_for(), and a call that cannot fit in the budget raises DeadlineExceeded
+  instead of starting. Threads do not inherit the budget on their own: submit
+  work through with_context().
+- resilience.call(host, func) retries transient failures (connection errors,
+  timeouts, 429 and 5xx) with exponential backoff and full jitter. A backoff
+  that would end past the deadline is not slept; the last error is raised.
+- every host has a circuit breaker. FAILURE_THRESHOLD transient failures in a
+  row open it, and calls fail fast with CircuitOpenError for RESET_TIMEOUT
+  seconds. Then one trial call is let through: its success closes the breaker,
+  its failure opens it again.
+
+Other errors (a 404, a page that does not parse) are the host's answer and are
+neither retried nor counted against it. Breaker states and retry counters are
+served by stats(); the duration of every attempt goes to the
+upstream_request_duration_seconds histogram of metrics.py.
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import os
+import random
+import threading
+import time
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from metrics import upstream_seconds
+from rate_limiter import host_of, is_throttling_status, limiter, status_from_exception
+
+# Time budget of one API request; below gunicorn's 30 s worker timeout
+REQUEST_DEADLINE = float(os.environ.get('REQUEST_DEADLINE', 20))
+
+MAX_ATTEMPTS = 3
+BASE_DELAY = 0.25
+MAX_DELAY = 4.0
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+# Failures to reach a host or to hear back in time. requests' exceptions are all
+# OSErrors, including HTTPError and MissingSchema, so OSError itself is too broad.
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, asyncio.TimeoutError, requests.ConnectionError, requests.Timeout)
+if aiohttp is not None:
+    TRANSIENT_ERRORS += (aiohttp.ClientConnectionError,)
+
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """The time budget of the current request ran out."""
+
+class CircuitOpenError(ConnectionError):
+    """Raised without calling a host whose circuit breaker is open."""
+
+class UpstreamStatusError(Exception):
+    """A throttling or server error status, raised so that the request can be retried."""
+
+    def __init__(self, url, status):
+        super().__init__(f"{url} returned HTTP {status}")
+        self.url = url
+        self.status = status
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """Run the block with a time budget; a tighter budget set outside it still applies."""
+    expires = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(expires if outer is None else min(outer, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def with_deadline(seconds):
+    """Decorator running a function (e.g. a Flask view) under deadline(seconds)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with deadline(seconds):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def remaining():
+    """Seconds left of the current deadline, or None when there is none."""
+    expires = _deadline.get()
+    return None if expires is None else expires - time.monotonic()
+
+def timeout_for(default):
+    """A timeout of at most `default` seconds that ends by the deadline."""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded('Request deadline exceeded')
+    return min(default, left)
+
+def with_context(func, *args, **kwargs):
+    """A callable running func in a copy of the current context, deadline included.
+
+    For executors: pool.submit(with_context(get_stock_data, symbol)).
+    """
+    return functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+def unavailable_status(exc):
+    """HTTP status for a call cut short: 504 past the deadline, 503 while a breaker is open."""
+    return 504 if isinstance(exc, DeadlineExceeded) else 503
+
+def is_transient(exc):
+    if isinstance(exc, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return True
+    # HTTP errors by their status: 429 and 5xx are retried, a 404 is the host's answer
+    return is_throttling_status(status_from_exception(exc))
+
+def backoff_delay(attempt):
+    """Full jitter: uniform between 0 and the exponential backoff of the attempt."""
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, host, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_running = False
+        self.counters = {'calls': 0, 'successes': 0, 'failures': 0, 'retries': 0, 'gave_up': 0,
+                         'deadline_exceeded': 0, 'rejected': 0, 'opened': 0}
+
+    def allow(self, now):
+        """Whether a call may go to the host now; an open breaker admits one trial after reset_timeout."""
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self.trial_running = False
+        if self.state == self.OPEN or (self.state == self.HALF_OPEN and self.trial_running):
+            self.counters['rejected'] += 1
+            return False
+        if self.state == self.HALF_OPEN:
+            self.trial_running = True
+        self.counters['calls'] += 1
+        return True
+
+    def record_success(self):
+        self.counters['successes'] += 1
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trial_running = False
+
+    def record_failure(self, now):
+        self.counters['failures'] += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.counters['opened'] += 1
+            self.state = self.OPEN
+            self.opened_at = now
+            self.trial_running = False
+
+    def release(self):
+        """Give back a half-open trial that ended without an answer from the host."""
+        self.trial_running = False
+
+    def stats(self, now):
+        return {
+            **self.counters,
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'retry_in': round(max(0.0, self.opened_at + self.reset_timeout - now), 3)
+            if self.state == self.OPEN else 0.0,
+        }
+
+class Resilience:
+    """Retry policy and circuit breakers for every upstream host, shared by all callers."""
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT):
+        self.max_attempts = max_attempts
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def _breaker(self, host):
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def _admit(self, host):
+        left = remaining()
+        with self.lock:
+            breaker = self._breaker(host)
+            if left is not None and left <= 0:
+                breaker.counters['deadline_exceeded'] += 1
+                raise DeadlineExceeded(f'Request deadline exceeded before calling {host}')
+            if not breaker.allow(time.monotonic()):
+                raise CircuitOpenError(f'Circuit breaker for {host} is open')
+
+    def _succeeded(self, host, started):
+        upstream_seconds.observe(time.perf_counter() - started, host, 'ok')
+        with self.lock:
+            self._breaker(host).record_success()
+
+    def _failed(self, host, exc, attempt, attempts, started):
+        """Record a failed attempt; returns the backoff before the next one, or None to give up."""
+        upstream_seconds.observe(time.perf_counter() - started, host, 'error')
+        with self.lock:
+            breaker = self._breaker(host)
+            if isinstance(exc, (DeadlineExceeded, CircuitOpenError)):
+                breaker.release()
+                return None
+            if not is_transient(exc):
+                # The host answered; the error is about the request
+                breaker.record_success()
+                return None
+            breaker.record_failure(time.monotonic())
+            if attempt + 1 >= attempts or breaker.state == CircuitBreaker.OPEN:
+                breaker.counters['gave_up'] += 1
+                return None
+            delay = backoff_delay(attempt)
+            left = remaining()
+            if left is not None and delay >= left:
+                breaker.counters['deadline_exceeded'] += 1
+                return None
+            breaker.counters['retries'] += 1
+            return delay
+
+    def call(self, target, func, *args, attempts=None, **kwargs):
+        """Call func(*args, **kwargs) for a URL or host, retrying transient failures."""
+        host = host_of(target)
+        attempts = attempts or self.max_attempts
+        for attempt in range(attempts):
+            self._admit(host)
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(host, e, attempt, attempts, started)
+                if delay is None:
+                    raise
+                print(f"Retrying {host} in {delay:.2f}s after: {str(e)}")
+                time.sleep(delay)
+            else:
+                self._succeeded(host, started)
+                return result
+
+    async def call_async(self, target, func, *args, attempts=None, **kwargs):
+        """call() for a coroutine function."""
+        host = host_of(target)
+        attempts = attempts or self.max_attempts
+        for attempt in range(attempts):
+            self._admit(host)
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(host, e, attempt, attempts, started)
+                if delay is None:
+                    raise
+                print(f"Retrying {host} in {delay:.2f}s after: {str(e)}")
+                await asyncio.sleep(delay)
+            else:
+                self._succeeded(host, started)
+                return result
+
+    def stats(self):
+        now = time.monotonic()
+        with self.lock:
+            return {host: breaker.stats(now) for host, breaker in self.breakers.items()}
+
+resilience = Resilience()
+
+def _check_wait(target, wait):
+    left = remaining()
+    if left is not None and wait >= left:
+        raise DeadlineExceeded(f'Rate limit wait of {wait:.1f}s for {host_of(target)} exceeds the deadline')
+
+def acquire(target):
+    """limiter.acquire that raises DeadlineExceeded rather than wait past the deadline."""
+    wait = limiter.reserve(target)
+    if wait > 0:
+        _check_wait(target, wait)
+        time.sleep(wait)
+    return wait
+
+async def acquire_async(target):
+    """Event-loop friendly version of acquire."""
+    wait = limiter.reserve(target)
+    if wait > 0:
+        _check_wait(target, wait)
+        await asyncio.sleep(wait)
+    return wait
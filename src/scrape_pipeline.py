@@ -0,0 +1,279 @@
+"""Pipelined scraper for whole index universes.
+
+Fetch workers on the event loop download the three pages of each symbol and put
+them on a bounded queue. Parse workers take pages off the queue and run the HTML
+extraction in a process pool, so parsing uses every core and never blocks the
+event loop. When parsing falls behind, the queue fills up and the fetch workers
+wait on it instead of downloading further ahead.
+
+    python scrape_pipeline.py ../data/universes/big_tech.txt --fetch-concurrency 32
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import aiohttp
+
+import page_parser
+from batch_store import BatchWriter, compact, DEFAULT_CHECKPOINT_EVERY
+from snapshot_format import write_snapshot_for_json
+from history_store import HistoryStore, HISTORY_PATH
+from company_scraper import (fetch_page, page_urls, PAGES, PAGE_TIMEOUT, SYMBOL_DEADLINE, pages_scraped,
+                             symbol_seconds, symbols_scraped)
+from http_cache import response_cache, MODES as CACHE_MODES
+from rate_limiter import limiter
+from resilience import deadline
+
+DEFAULT_FETCH_CONCURRENCY = 16
+DEFAULT_QUEUE_SIZE = 64
+
+def load_universe(path):
+    """Read ticker symbols from a file.
+
+    Accepts one symbol per line (blank lines and '#' comments are skipped) or a
+    CSV file with a 'symbol' / 'Symbol' column.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    if not lines:
+        return []
+
+    header = [column.strip().lower() for column in lines[0].split(',')]
+    if 'symbol' in header:
+        column = header.index('symbol')
+        symbols = [row[column].strip() for row in csv.reader(lines[1:]) if len(row) > column]
+    else:
+        symbols = [line.split(',')[0].strip() for line in lines]
+
+    # Keep the file order but drop duplicates
+    return list(dict.fromkeys(symbol.upper() for symbol in symbols if symbol))
+
+def _init_parse_worker(parser_name):
+    page_parser.default_parser = page_parser.get_parser(parser_name)
+
+def parse_pages(symbol, pages):
+    """Run the page extractions for one symbol; executed in a worker process.
+
+    Pages that failed to download are None and skipped. Returns the data and,
+    for each page, the parse error as a string or None.
+    """
+    parser = page_parser.default_parser
+    data = {}
+    extractions = (lambda html: parser.parse_quote(html, symbol, data),
+                   lambda html: parser.parse_statistics(html, data),
+                   lambda html: parser.parse_profile(html, data))
+    errors = []
+    for page, extract in zip(pages, extractions):
+        error = None
+        if page is not None:
+            try:
+                extract(page)
+            except Exception as e:
+                error = f"{type(e).__name__}: {str(e)}"
+        errors.append(error)
+    return data, errors
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+
+    def mark(self, started, elapsed):
+        self.items += 1
+        self.busy += elapsed
+        self.started = started if self.started is None else min(self.started, started)
+        self.finished = time.monotonic()
+
+    def summary(self):
+        wall = (self.finished - self.started) if self.started is not None else 0.0
+        return {
+            'items': self.items,
+            'errors': self.errors,
+            'wall_seconds': round(wall, 3),
+            'items_per_second': round(self.items / wall, 2) if wall else 0.0,
+            'mean_item_seconds': round(self.busy / self.items, 4) if self.items else 0.0,
+        }
+
+class PipelineStats:
+    def __init__(self):
+        self.fetch = StageStats('fetch')
+        self.parse = StageStats('parse')
+        self.queue_samples = 0
+        self.queue_depth_total = 0
+        self.queue_depth_max = 0
+        self.backpressure_waits = 0
+        self.backpressure_seconds = 0.0
+        self.started = time.monotonic()
+        self.finished = None
+
+    def sample_queue(self, queue):
+        depth = queue.qsize()
+        self.queue_samples += 1
+        self.queue_depth_total += depth
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+
+    def summary(self):
+        finished = self.finished or time.monotonic()
+        return {
+            'wall_seconds': round(finished - self.started, 3),
+            'fetch': self.fetch.summary(),
+            'parse': self.parse.summary(),
+            'queue': {
+                'max_depth': self.queue_depth_max,
+                'mean_depth': round(self.queue_depth_total / self.queue_samples, 2) if self.queue_samples else 0.0,
+                'backpressure_waits': self.backpressure_waits,
+                'backpressure_seconds': round(self.backpressure_seconds, 3),
+            },
+        }
+
+async def run_pipeline(symbols, on_result, fetch_concurrency=DEFAULT_FETCH_CONCURRENCY, parse_workers=None,
+                       queue_size=DEFAULT_QUEUE_SIZE, base_url=None, parser_name=None):
+    """Scrape `symbols`, calling on_result(symbol, data) per symbol, and return PipelineStats."""
+    parse_workers = parse_workers or os.cpu_count() or 1
+    stats = PipelineStats()
+    pages_queue = asyncio.Queue(maxsize=queue_size)
+    symbols_iter = iter(symbols)
+    loop = asyncio.get_running_loop()
+
+    async def fetcher(session):
+        for symbol in symbols_iter:
+            started = time.monotonic()
+            urls = page_urls(symbol, base_url)
+            with deadline(SYMBOL_DEADLINE):
+                pages = await asyncio.gather(*(fetch_page(session, url) for url in urls), return_exceptions=True)
+            # A page that failed is left out; the others are still parsed
+            for i, (url, page) in enumerate(zip(urls, pages)):
+                if isinstance(page, BaseException):
+                    print(f"Error scraping {symbol}: {url}: {type(page).__name__}: {str(page)}")
+                    pages[i] = None
+            if any(page is None for page in pages):
+                stats.fetch.errors += 1
+            stats.fetch.mark(started, time.monotonic() - started)
+
+            # A full queue means the parsers are behind: wait here instead of fetching more
+            if pages_queue.full():
+                stats.backpressure_waits += 1
+                waited = time.monotonic()
+                await pages_queue.put((symbol, pages, started))
+                stats.backpressure_seconds += time.monotonic() - waited
+            else:
+                pages_queue.put_nowait((symbol, pages, started))
+            stats.sample_queue(pages_queue)
+
+    async def parser(executor):
+        while True:
+            item = await pages_queue.get()
+            stats.sample_queue(pages_queue)
+            if item is None:
+                pages_queue.task_done()
+                return
+            symbol, pages, fetch_started = item
+            started = time.monotonic()
+            data, errors = {}, [None] * len(pages)
+            if any(page is not None for page in pages):
+                try:
+                    data, errors = await loop.run_in_executor(executor, parse_pages, symbol, pages)
+                except Exception as e:
+                    errors = [f"{type(e).__name__}: {str(e)}"] * len(pages)
+
+            parsed = 0
+            for name, page, error in zip(PAGES, pages, errors):
+                if page is None:
+                    pages_scraped.inc(name, 'fetch_error')
+                elif error is not None:
+                    pages_scraped.inc(name, 'parse_error')
+                    print(f"Error parsing {symbol} {name} page: {error}")
+                else:
+                    pages_scraped.inc(name, 'ok')
+                    parsed += 1
+            if any(page is not None and error is not None for page, error in zip(pages, errors)):
+                stats.parse.errors += 1
+            symbols_scraped.inc('ok' if parsed == len(PAGES) else 'partial' if parsed else 'failed')
+            symbol_seconds.observe(time.monotonic() - fetch_started)
+            stats.parse.mark(started, time.monotonic() - started)
+            on_result(symbol, data)
+            pages_queue.task_done()
+
+    connector = aiohttp.TCPConnector(limit=fetch_concurrency * 3)
+    timeout = aiohttp.ClientTimeout(total=PAGE_TIMEOUT)
+    with ProcessPoolExecutor(parse_workers, initializer=_init_parse_worker, initargs=(parser_name,)) as executor:
+        # Two parse tasks per process keep every worker busy while results travel back
+        parsers = [asyncio.create_task(parser(executor)) for _ in range(parse_workers * 2)]
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await asyncio.gather(*(fetcher(session) for _ in range(fetch_concurrency)))
+        for _ in parsers:
+            await pages_queue.put(None)
+        await asyncio.gather(*parsers)
+
+    stats.finished = time.monotonic()
+    return stats
+
+def print_stats(stats):
+    summary = stats.summary()
+    print(f"Pipeline finished in {summary['wall_seconds']:.2f}s")
+    for stage in ('fetch', 'parse'):
+        s = summary[stage]
+        print(f"  {stage:<6} {s['items']:>7} symbols  {s['items_per_second']:>8.2f}/s  "
+              f"{s['mean_item_seconds'] * 1000:>8.1f} ms/symbol  {s['errors']} errors")
+    q = summary['queue']
+    print(f"  queue  max depth {q['max_depth']}, mean depth {q['mean_depth']}, "
+          f"fetchers blocked {q['backpressure_waits']} times for {q['backpressure_seconds']:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape a whole ticker universe from Yahoo Finance.')
+    parser.add_argument('universe', help='File with one symbol per line, or a CSV with a symbol column')
+    parser.add_argument('--fetch-concurrency', type=int, default=DEFAULT_FETCH_CONCURRENCY,
+                        help='Number of symbols being downloaded at once')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='Parser processes (defaults to the number of CPUs)')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='Downloaded symbols that may wait for a parser before fetching pauses')
+    parser.add_argument('--parser', choices=page_parser.available_parsers(),
+                        help='HTML parser backend (defaults to the fastest installed one)')
+    parser.add_argument('--cache-mode', choices=CACHE_MODES,
+                        help='Response cache mode; replay scrapes offline from recorded pages')
+    parser.add_argument('--snapshot-format', choices=('arrow', 'parquet'), default='arrow',
+                        help='Typed columnar snapshot written next to the JSON output')
+    parser.add_argument('--run-id', help='Identifier of the run; reuse it to resume an interrupted run')
+    parser.add_argument('--runs-dir', default='runs', help='Directory of append-only run files')
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help='Number of symbols between fsync checkpoints')
+    parser.add_argument('--history-db', default=HISTORY_PATH,
+                        help="Snapshot history database the run's changes are recorded in ('' to skip)")
+    args = parser.parse_args()
+    if args.cache_mode:
+        response_cache.mode = args.cache_mode
+
+    symbols = load_universe(args.universe)
+    run_id = args.run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_path = os.path.join(args.runs_dir, f'{run_id}.jsonl')
+
+    with BatchWriter(run_path, args.checkpoint_every) as writer:
+        pending = [symbol for symbol in symbols if symbol not in writer.completed]
+        print(f"Scraping {len(pending)} of {len(symbols)} symbols from {args.universe} (run {run_id})...")
+        stats = asyncio.run(run_pipeline(
+            pending, writer.write, args.fetch_concurrency, args.parse_workers,
+            args.queue_size, parser_name=args.parser,
+        ))
+
+    count = compact(run_path, f'company_data_{run_id}.json', order=symbols)
+    write_snapshot_for_json(f'company_data_{run_id}.json', '.' + args.snapshot_format)
+    if args.history_db:
+        changed = HistoryStore(args.history_db).record_json(f'company_data_{run_id}.json', run_id)
+        if changed is not None:
+            print(f"Recorded {changed} changed fields in {args.history_db}")
+    print(f"Saved {count} companies to company_data_{run_id}.json.")
+    print_stats(stats)
+    print(f"Rate limiter state: {json.dumps(limiter.stats())}")
+
+if __name__ == "__main__":
+    main()
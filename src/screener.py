@@ -0,0 +1,262 @@
+"""Stock screener over an in-memory metrics table built from the scrape snapshots.
+
+The table holds one float64 NumPy array per metric (those generate_company_summary
+reports, plus the trailing P/E) and, for each metric, the row ids sorted by
+value in both directions and every row's rank: the position of its value in
+the sorted values. A range condition is two binary searches in the sorted
+values, giving a range of ranks. A screen takes the rows of its narrowest
+condition and keeps those whose ranks fall in the ranges of the others.
+Sorting by a metric reuses its index: a large result is read off the sorted
+row ids, a small one is sorted by rank. Equal values keep snapshot order.
+
+Percentages are in points as scraped ('23.97%' -> 23.97), like the
+metrics_summary of generate_company_summary. A missing value matches no
+condition and sorts last in both directions.
+
+The data is the latest run of the history database (HISTORY_DB_PATH) or, when
+it has none, the newest company_data_*.json export. A newer run is picked up
+on the first screen after RELOAD_INTERVAL seconds.
+
+    GET /api/screen?profit_margin=gt:20&revenue_growth=gt:10&pe_ratio=lt:30&sort=-roe&limit=20
+"""
+import glob
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from history_store import HISTORY_PATH, HistoryStore, run_time
+from normalize import clean_numeric_column
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_GLOBS = [os.path.join(ROOT, 'company_data_*.json'), os.path.join(ROOT, 'data', 'company_data_*.json')]
+
+# Screen field -> snapshot fields it is read from, by preference. Yahoo appends
+# footnote numbers to some labels ('Forward Annual Dividend Yield 4'); they are ignored.
+SCREEN_FIELDS = {
+    'profit_margin': ('Profit Margin',),
+    'revenue_growth': ('Quarterly Revenue Growth  (yoy)',),
+    'operating_margin': ('Operating Margin  (ttm)',),
+    'roe': ('Return on Equity  (ttm)',),
+    'price_change_pct': ('52 Week Change', '52-Week Change'),
+    'dividend_yield': ('Forward Annual Dividend Yield',),
+    'pe_ratio': ('Trailing P/E',),
+}
+OPERATORS = ('gt', 'gte', 'lt', 'lte', 'eq', 'between')
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+RELOAD_INTERVAL = 60
+
+_FOOTNOTE = re.compile(r'\s+\d+$')
+
+def source_column(frame, names):
+    """float64 values of the first of `names` present for each row, NaN where none is."""
+    values = np.full(len(frame), np.nan)
+    matches = [(names.index(_FOOTNOTE.sub('', column)), column) for column in frame.columns
+               if _FOOTNOTE.sub('', column) in names]
+    for _, column in sorted(matches):
+        converted = clean_numeric_column(frame[column]).to_numpy(dtype='float64')
+        missing = np.isnan(values)
+        values[missing] = converted[missing]
+    return values
+
+class MetricsTable:
+    def __init__(self, symbols, columns, as_of=None):
+        self.symbols = list(symbols)
+        self.as_of = as_of
+        self.columns = {}      # field -> values by row
+        self.sorted = {}       # field -> the present values, ascending
+        self.orders = {}       # field -> row ids by ascending value, missing values last
+        self.desc_orders = {}  # field -> row ids by descending value, missing values last
+        self.ranks = {}        # field -> position of each row's value in sorted[field]; len() if missing
+        for field, values in columns.items():
+            values = np.asarray(values, dtype='float64')
+            order = np.argsort(values, kind='stable')
+            present = np.count_nonzero(~np.isnan(values))
+            self.columns[field] = values
+            self.sorted[field] = values[order[:present]]
+            self.orders[field] = order
+            self.desc_orders[field] = np.argsort(-values, kind='stable')
+            ranks = np.full(len(values), present, dtype=np.intp)
+            ranks[order[:present]] = np.searchsorted(self.sorted[field], self.sorted[field], 'left')
+            self.ranks[field] = ranks
+
+    @classmethod
+    def from_companies(cls, data, as_of=None):
+        """Build the table from {symbol: {field: display string}}, as a scrape run stores it."""
+        frame = pd.DataFrame.from_dict(data, orient='index')
+        columns = {field: source_column(frame, names) for field, names in SCREEN_FIELDS.items()}
+        return cls(frame.index, columns, as_of)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _slice(self, field, op, value):
+        """[start, stop) of the ranks of the values of a field that satisfy the condition."""
+        values = self.sorted[field]
+        if op == 'gt':
+            return np.searchsorted(values, value, 'right'), len(values)
+        if op == 'gte':
+            return np.searchsorted(values, value, 'left'), len(values)
+        if op == 'lt':
+            return 0, np.searchsorted(values, value, 'left')
+        if op == 'lte':
+            return 0, np.searchsorted(values, value, 'right')
+        if op == 'eq':
+            return np.searchsorted(values, value, 'left'), np.searchsorted(values, value, 'right')
+        low, high = value
+        return np.searchsorted(values, low, 'left'), np.searchsorted(values, high, 'right')
+
+    def select(self, conditions=()):
+        """Row ids (in no particular order) matching every (field, op, value) condition, or None for all rows."""
+        if not conditions:
+            return None
+        slices = sorted((self._slice(field, op, value) + (field,) for field, op, value in conditions),
+                        key=lambda bounds: bounds[1] - bounds[0])
+        start, stop, field = slices[0]
+        # Equal values are never split by a bound, so the first condition's rows are a slice of the order
+        rows = self.orders[field][start:stop]
+        for start, stop, field in slices[1:]:
+            if not len(rows):
+                break
+            ranks = self.ranks[field][rows]
+            rows = rows[(ranks >= start) & (ranks < stop)]
+        return rows
+
+    def ordered(self, rows, sort=None, descending=False):
+        """rows sorted by a field (missing values last), or in snapshot order without one."""
+        if sort is None:
+            return np.arange(len(self)) if rows is None else np.sort(rows)
+        order = self.desc_orders[sort] if descending else self.orders[sort]
+        if rows is None:
+            return order
+        if len(rows) > len(order) // 8:
+            # Reading the whole index is cheaper than sorting a large share of it
+            selected = np.zeros(len(order), dtype=bool)
+            selected[rows] = True
+            return order[selected[order]]
+        rows = np.sort(rows)
+        ranks = self.ranks[sort][rows]
+        if descending:
+            ranks = np.where(ranks < len(self.sorted[sort]), -ranks, len(self.sorted[sort]))
+        return rows[np.argsort(ranks, kind='stable')]
+
+    def records(self, row_ids):
+        """Result documents of the given rows; missing values are None."""
+        records = [{'symbol': self.symbols[row_id]} for row_id in row_ids]
+        for field, values in self.columns.items():
+            for record, value in zip(records, np.round(values[row_ids], 4).tolist()):
+                record[field] = None if value != value else value
+        return records
+
+def parse_number(field, text):
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"{field}: '{text}' is not a number") from None
+
+def parse_screen_args(args):
+    """(conditions, sort, descending, offset, limit) from query arguments given as (name, value) pairs.
+
+    A condition is written field=op:value, e.g. profit_margin=gt:20 or
+    pe_ratio=between:0,30; sort=-roe sorts by ROE, highest first.
+    """
+    conditions, sort, descending, offset, limit = [], None, False, 0, DEFAULT_LIMIT
+    for name, text in args:
+        if name in SCREEN_FIELDS:
+            op, _, operand = text.partition(':')
+            if op not in OPERATORS:
+                raise ValueError(f"{name}: unknown operator '{op}', expected one of {', '.join(OPERATORS)}")
+            if op == 'between':
+                bounds = operand.split(',')
+                if len(bounds) != 2:
+                    raise ValueError(f"{name}: between takes two values, e.g. between:0,30")
+                value = tuple(parse_number(name, bound) for bound in bounds)
+            else:
+                value = parse_number(name, operand)
+            conditions.append((name, op, value))
+        elif name == 'sort':
+            descending = text.startswith('-')
+            sort = text.lstrip('-')
+            if sort not in SCREEN_FIELDS:
+                raise ValueError(f"Cannot sort by '{sort}', expected one of {', '.join(SCREEN_FIELDS)}")
+        elif name in ('offset', 'limit'):
+            if not text.isdigit():
+                raise ValueError(f"{name} must be a non-negative integer")
+            if name == 'offset':
+                offset = int(text)
+            else:
+                limit = min(int(text), MAX_LIMIT)
+    return conditions, sort, descending, offset, limit
+
+class Screener:
+    """The metrics table of the latest scrape run, reloaded when a newer one appears."""
+
+    def __init__(self, history_path=HISTORY_PATH, snapshot_globs=SNAPSHOT_GLOBS, reload_interval=RELOAD_INTERVAL):
+        self.history_path = history_path
+        self.snapshot_globs = snapshot_globs
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        self.store = None
+        self.version = None
+        self.checked = None
+        self._table = MetricsTable([], {field: [] for field in SCREEN_FIELDS})
+
+    def _stored_fields(self):
+        """The fields of the history store that SCREEN_FIELDS reads, footnoted labels included."""
+        names = {name for names in SCREEN_FIELDS.values() for name in names}
+        return [field for field in self.store.fields() if _FOOTNOTE.sub('', field) in names]
+
+    def _source(self):
+        """(version, loader) of the newest data; version changes when a newer run is recorded."""
+        if os.path.exists(self.history_path):
+            if self.store is None:
+                self.store = HistoryStore(self.history_path)
+            latest = self.store.latest_run()
+            if latest:
+                return latest, lambda: MetricsTable.from_companies(
+                    self.store.as_of(fields=self._stored_fields()), as_of=latest[1])
+        paths = sorted(path for pattern in self.snapshot_globs for path in glob.glob(pattern))
+        if not paths:
+            return None, None
+        path = max(paths, key=lambda path: (run_time(os.path.basename(path)) or '', path))
+        version = (path, os.path.getmtime(path))
+
+        def load():
+            with open(path, 'r') as f:
+                companies = json.load(f)
+            return MetricsTable.from_companies(companies, as_of=run_time(os.path.basename(path)))
+        return version, load
+
+    def table(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.checked is None or now - self.checked >= self.reload_interval:
+                self.checked = now
+                version, load = self._source()
+                if version is not None and version != self.version:
+                    started = time.perf_counter()
+                    self._table = load()
+                    self.version = version
+                    print(f"Screener loaded {len(self._table)} companies as of {self._table.as_of} "
+                          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return self._table
+
+    def screen(self, args):
+        """The /api/screen document for query arguments given as (name, value) pairs."""
+        conditions, sort, descending, offset, limit = parse_screen_args(args)
+        table = self.table()
+        rows = table.ordered(table.select(conditions), sort, descending)
+        return {
+            'as_of': table.as_of,
+            'total': int(len(rows)),
+            'offset': offset,
+            'limit': limit,
+            'results': table.records(rows[offset:offset + limit]),
+        }
+
+screener = Screener()
@@ -0,0 +1,231 @@
+"""In-memory search index over ticker symbols and company names for typeahead.
+
+Built from a ticker master file (TICKER_MASTER_PATH, CSV with the columns
+symbol, name, name_ko, exchange, type; several Korean names are separated by
+'|'). Rows are ranked in file order, so list the most searched companies first.
+
+- symbols: a sorted list searched by prefix with bisect
+- Latin names: words are indexed in a sorted token list, and every word of
+  the query must be the start of a word of the name ('coca co' finds Coca-Cola)
+- Korean (and other CJK) names: written without spaces and typed from any
+  syllable, so they are indexed by character unigrams and bigrams and matched
+  as substrings ('하이닉스' finds SK하이닉스)
+
+Results are ordered by match quality (exact symbol, exact name, symbol prefix,
+name prefix, word prefix, substring) and then by rank. Companies the upstream
+search returns for a query the index could not answer are added with add(),
+and appended to LEARNED_PATH so that the next start knows them too. Every
+worker process keeps its own index, so the file is locked while a worker
+appends, and symbols another worker already wrote are skipped.
+"""
+import bisect
+import csv
+import heapq
+import os
+import re
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MASTER_PATH = os.environ.get('TICKER_MASTER_PATH', os.path.join(ROOT, 'data', 'tickers.csv'))
+LEARNED_PATH = os.environ.get('TICKER_LEARNED_PATH', os.path.join(ROOT, '.cache', 'tickers_learned.csv'))
+
+FIELDS = ['symbol', 'name', 'name_ko', 'exchange', 'type']
+DEFAULT_LIMIT = 10
+
+# Match quality, best first
+EXACT_SYMBOL, EXACT_NAME, SYMBOL_PREFIX, NAME_PREFIX, WORD_PREFIX, SUBSTRING = range(6)
+
+_WORD = re.compile(r'[0-9a-z]+')
+_CJK = re.compile(r'[ᄀ-ᇿ㄰-㆏가-힣一-鿿぀-ヿ]')
+_NOT_WORD = re.compile(r'[\W_]+')
+
+def is_cjk(text):
+    return _CJK.search(text) is not None
+
+def squash(text):
+    """Lowercase text without spaces or punctuation, for substring matching."""
+    return _NOT_WORD.sub('', text.lower())
+
+def ngrams(text):
+    return {text[i:i + n] for n in (1, 2) for i in range(len(text) - n + 1)}
+
+class SearchIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []        # id -> {'symbol', 'name', 'name_ko', 'exchange', 'type'}
+        self.ranks = []          # id -> rank, lower first
+        self.by_symbol = {}      # symbol -> id
+        self.symbols = []        # sorted (symbol, id)
+        self.tokens = []         # sorted unique words of the names
+        self.postings = {}       # word -> ids
+        self.gram_postings = {}  # CJK unigram/bigram -> ids
+        self.squashed = []       # id -> [squashed names], for prefix and substring checks
+
+    @classmethod
+    def from_files(cls, master_path=MASTER_PATH, learned_path=LEARNED_PATH):
+        index = cls()
+        for path in (master_path, learned_path):
+            if path and os.path.exists(path):
+                with open(path, newline='', encoding='utf-8') as f:
+                    index._add_rows(csv.DictReader(f), ordered=False)
+        # One sort after the bulk load rather than an insort per row
+        index.symbols.sort()
+        index.tokens.sort()
+        return index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, rows, persist=True):
+        """Add companies not indexed yet; returns how many were new.
+
+        With persist, new rows are appended to LEARNED_PATH.
+        """
+        with self.lock:
+            added = self._add_rows(rows)
+        if added and persist and LEARNED_PATH:
+            self._persist(added)
+        return len(added)
+
+    def _add_rows(self, rows, ordered=True):
+        """Index the rows whose symbols are new; returns their entries.
+
+        Without ordered, symbols and tokens are appended unsorted, for the caller to sort.
+        """
+        added = []
+        for row in rows:
+            symbol = (row.get('symbol') or '').strip().upper()
+            name = (row.get('name') or '').strip()
+            if not symbol or not name or symbol in self.by_symbol:
+                continue
+            entry = {field: (row.get(field) or '').strip() for field in FIELDS}
+            entry['symbol'] = symbol
+            self._insert(entry, ordered)
+            added.append(entry)
+        return added
+
+    def _insert(self, entry, ordered):
+        insert = bisect.insort if ordered else list.append
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        self.ranks.append(entry_id)
+        self.by_symbol[entry['symbol']] = entry_id
+        insert(self.symbols, (entry['symbol'], entry_id))
+
+        names = [entry['name']] + [name for name in entry['name_ko'].split('|') if name]
+        self.squashed.append([squash(name) for name in names])
+        for name in names:
+            for word in _WORD.findall(name.lower()):
+                if word not in self.postings:
+                    self.postings[word] = set()
+                    insert(self.tokens, word)
+                self.postings[word].add(entry_id)
+            if is_cjk(name):
+                for gram in ngrams(squash(name)):
+                    self.gram_postings.setdefault(gram, set()).add(entry_id)
+
+    @staticmethod
+    def _persist(entries):
+        """Append the entries whose symbols LEARNED_PATH does not list yet."""
+        if os.path.dirname(LEARNED_PATH):
+            os.makedirs(os.path.dirname(LEARNED_PATH), exist_ok=True)
+        with open(LEARNED_PATH, 'a+', newline='', encoding='utf-8') as f:
+            # Other workers append to the same file; the lock is released when it is closed
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            known = {(row.get('symbol') or '').strip().upper() for row in csv.DictReader(f)}
+            entries = [entry for entry in entries if entry['symbol'] not in known]
+            if not entries:
+                return
+            f.seek(0, os.SEEK_END)
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            if f.tell() == 0:
+                writer.writeheader()
+            writer.writerows(entries)
+
+    def _symbol_matches(self, prefix):
+        for i in range(bisect.bisect_left(self.symbols, (prefix,)), len(self.symbols)):
+            symbol, entry_id = self.symbols[i]
+            if not symbol.startswith(prefix):
+                break
+            yield entry_id, EXACT_SYMBOL if symbol == prefix else SYMBOL_PREFIX
+
+    def _word_matches(self, words):
+        """Ids whose names have a word starting with each query word."""
+        matched = None
+        for word in words:
+            ids = set()
+            for i in range(bisect.bisect_left(self.tokens, word), len(self.tokens)):
+                token = self.tokens[i]
+                if not token.startswith(word):
+                    break
+                ids |= self.postings[token]
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                return set()
+        return matched or set()
+
+    def _substring_matches(self, text):
+        grams = ngrams(text[:2]) if len(text) < 3 else {text[i:i + 2] for i in range(len(text) - 1)}
+        postings = sorted((self.gram_postings.get(gram, set()) for gram in grams), key=len)
+        if not postings:
+            return set()
+        candidates = set.intersection(*postings)
+        return {entry_id for entry_id in candidates
+                if any(text in name for name in self.squashed[entry_id])}
+
+    def _ranked(self, query, limit):
+        """[(id, quality)] of the best matches for a query."""
+        query = query.strip()
+        if not query:
+            return []
+        quality = {}
+
+        def found(entry_id, level):
+            if level < quality.get(entry_id, SUBSTRING + 1):
+                quality[entry_id] = level
+
+        for entry_id, level in self._symbol_matches(query.upper()):
+            found(entry_id, level)
+
+        text = squash(query)
+        if is_cjk(query):
+            candidates, otherwise = self._substring_matches(text), SUBSTRING
+        else:
+            candidates, otherwise = self._word_matches(_WORD.findall(query.lower())), WORD_PREFIX
+        for entry_id in candidates:
+            names = self.squashed[entry_id]
+            if text in names:
+                found(entry_id, EXACT_NAME)
+            elif text and any(name.startswith(text) for name in names):
+                found(entry_id, NAME_PREFIX)
+            else:
+                found(entry_id, otherwise)
+
+        best = heapq.nsmallest(limit, quality, key=lambda entry_id: (quality[entry_id], self.ranks[entry_id]))
+        return [(entry_id, quality[entry_id]) for entry_id in best]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Best matches for a typeahead query, as copies of the index rows."""
+        with self.lock:
+            return [dict(self.entries[entry_id]) for entry_id, _ in self._ranked(query, limit)]
+
+    def resolve(self, query):
+        """The symbol a free-text query names, or None.
+
+        Only an exact symbol, an exact name or the start of a name count: 'AAP'
+        is a ticker of its own, not a typo for AAPL.
+        """
+        with self.lock:
+            ranked = self._ranked(query, 1)
+            if ranked and ranked[0][1] in (EXACT_SYMBOL, EXACT_NAME, NAME_PREFIX):
+                return self.entries[ranked[0][0]]['symbol']
+        return None
+
+symbol_index = SearchIndex.from_files()
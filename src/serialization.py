@@ -0,0 +1,110 @@
+"""Columnar price history and response encodings for the analysis endpoints.
+
+history_columns() turns a formatted history DataFrame into one array per field
+(Date, Open, High, Low, Close, Volume) with whole-column NumPy conversions
+instead of a Python object per row. The row layout the endpoints have always
+returned is rebuilt from those columns by history_records().
+
+Responses are encoded according to the Accept header:
+- application/json (default): orjson when installed, which writes NumPy arrays
+  directly; the standard json module otherwise
+- application/x-msgpack: the same document as MessagePack, with the history
+  in columns (needs msgpack)
+- application/vnd.apache.arrow.stream: the history as an Arrow IPC stream, and
+  the rest of the document as JSON in the schema metadata under b'analysis'
+  (needs pyarrow)
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+JSON_MIME = 'application/json'
+MSGPACK_MIME = 'application/x-msgpack'
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close']
+HISTORY_FIELDS = ['Date', *PRICE_FIELDS, 'Volume']
+
+def format_dates(index):
+    """'YYYY-MM-DD' strings for a DatetimeIndex, in the index's own time zone."""
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[D]').astype(str)
+
+def history_columns(hist):
+    """{'Date': [...], 'Open': array, ..., 'Volume': array} for a formatted history frame.
+
+    Prices are float64 arrays and volumes int64; a missing volume raises
+    ValueError, as int() did on the row-by-row path.
+    """
+    columns = {'Date': np.asarray(hist.index, dtype=str)}
+    for field in PRICE_FIELDS:
+        columns[field] = hist[field].to_numpy(dtype='float64')
+    volume = hist['Volume'].to_numpy(dtype='float64')
+    if np.isnan(volume).any():
+        raise ValueError('Volume has missing values')
+    columns['Volume'] = volume.astype('int64')
+    return columns
+
+def history_records(columns):
+    """Row layout of history_columns(): [{'Date': ..., 'Open': ..., ...}, ...]."""
+    values = [columns[field].tolist() for field in HISTORY_FIELDS]
+    return [dict(zip(HISTORY_FIELDS, row)) for row in zip(*values)]
+
+def _to_builtin(value):
+    """Fallback for values the encoders cannot write themselves."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+def encode_json(document):
+    if orjson is not None:
+        return orjson.dumps(document, default=_to_builtin,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(document, default=_to_builtin).encode('utf-8')
+
+def encode_msgpack(document):
+    return msgpack.packb(document, default=_to_builtin, use_bin_type=True)
+
+def encode_arrow(document, history_key='stock_history'):
+    """Arrow IPC stream of document[history_key] (in columns); the rest goes in the metadata."""
+    columns = document.get(history_key) or {field: [] for field in HISTORY_FIELDS}
+    rest = {key: value for key, value in document.items() if key != history_key}
+    table = pa.table({field: pa.array(columns[field]) for field in HISTORY_FIELDS})
+    table = table.replace_schema_metadata({b'analysis': encode_json(rest)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def available_mimetypes():
+    """Encodings this process can produce, JSON first so it wins ties."""
+    mimetypes = [JSON_MIME]
+    if msgpack is not None:
+        mimetypes.append(MSGPACK_MIME)
+    if pa is not None:
+        mimetypes.append(ARROW_MIME)
+    return mimetypes
+
+ENCODERS = {JSON_MIME: encode_json, MSGPACK_MIME: encode_msgpack, ARROW_MIME: encode_arrow}
@@ -0,0 +1,337 @@
+"""Key-value cache shared by every worker process of the web apps.
+
+gunicorn runs several workers, so a per-process cache (lru_cache, TTLCache)
+starts cold in each of them and is lost on restart. SharedCache stores values
+outside the process with a TTL per entry, in one of two backends chosen by
+SHARED_CACHE_URL:
+
+- sqlite:///path/to/file.sqlite (default .cache/shared_cache.sqlite): a local
+  file opened by all workers, memory-mapped for reads and bounded by
+  SHARED_CACHE_MAX_BYTES with least-recently-used eviction
+- redis://host:6379/0: any server speaking the Redis protocol; size and
+  eviction are the server's maxmemory settings (use allkeys-lru)
+
+Values are pickled and zlib-compressed when that makes them smaller. A cache
+that cannot be reached counts as a miss, so requests still go upstream; after a
+failure the backend is skipped for BACKEND_RETRY_SECONDS instead of paying a
+connection timeout on every request.
+"""
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_URL = 'sqlite:///' + os.path.join(ROOT, '.cache', 'shared_cache.sqlite')
+SHARED_CACHE_URL = os.environ.get('SHARED_CACHE_URL', DEFAULT_URL)
+MAX_CACHE_BYTES = int(os.environ.get('SHARED_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+COMPRESS_MIN_BYTES = 512
+BACKEND_RETRY_SECONDS = 10
+# Reads refresh an entry's LRU timestamp at most this often, to keep hits read-only
+TOUCH_INTERVAL = 60
+
+_RAW, _ZLIB = b'p', b'z'
+
+def dumps(value):
+    """Serialize a value: a one-byte format tag, then a pickle, compressed when that helps."""
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return _ZLIB + packed
+    return _RAW + data
+
+def loads(blob):
+    if blob[:1] == _ZLIB:
+        return pickle.loads(zlib.decompress(blob[1:]))
+    return pickle.loads(blob[1:])
+
+class SQLiteBackend:
+    def __init__(self, path, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.evicted = 0
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA mmap_size={self.max_bytes * 2}')
+            conn.execute('''CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires_at)')
+            # One row holding SUM(size); seeded once, then adjusted by the triggers
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache_size'").fetchone() is None:
+                conn.execute('CREATE TABLE cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)')
+                conn.execute('INSERT INTO cache_size SELECT 0, COALESCE(SUM(size), 0) FROM entries')
+                conn.execute('''CREATE TRIGGER entries_size_insert AFTER INSERT ON entries BEGIN
+                    UPDATE cache_size SET bytes = bytes + NEW.size WHERE id = 0; END''')
+                conn.execute('''CREATE TRIGGER entries_size_update AFTER UPDATE OF size ON entries BEGIN
+                    UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END''')
+                conn.execute('''CREATE TRIGGER entries_size_delete AFTER DELETE ON entries BEGIN
+                    UPDATE cache_size SET bytes = bytes - OLD.size WHERE id = 0; END''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT value, expires_at, accessed_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at, accessed_at = row
+            if expires_at <= now:
+                self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self.conn.commit()
+                return None
+            if now - accessed_at > TOUCH_INTERVAL:
+                self.conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+                self.conn.commit()
+        return value
+
+    def set(self, key, blob, ttl):
+        now = time.time()
+        with self.lock:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete would skip the size trigger
+            self.conn.execute(
+                'INSERT INTO entries VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                'value = excluded.value, size = excluded.size, expires_at = excluded.expires_at, '
+                'accessed_at = excluded.accessed_at',
+                (key, blob, len(blob), now + ttl, now))
+            self._evict(now)
+            self.conn.commit()
+
+    def delete(self, key):
+        with self.lock:
+            self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self.conn.commit()
+
+    def size(self):
+        """Total value bytes in the cache."""
+        return self.conn.execute('SELECT bytes FROM cache_size WHERE id = 0').fetchone()[0]
+
+    def _evict(self, now):
+        # Expired entries first, off the expires_at index
+        self.conn.execute('DELETE FROM entries WHERE expires_at <= ?', (now,))
+        total = self.size()
+        # Then least recently used first, a few entries at a time off the accessed_at index
+        while total > self.max_bytes:
+            oldest = self.conn.execute('SELECT key, size FROM entries ORDER BY accessed_at LIMIT 32').fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                total -= size
+                self.evicted += 1
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM entries')
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            entries = self.conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            size = self.size()
+        return {'backend': 'sqlite', 'entries': entries, 'bytes': size,
+                'max_bytes': self.max_bytes, 'evicted': self.evicted}
+
+class RedisError(Exception):
+    """An error reply from the server."""
+
+class RedisBackend:
+    """Minimal client for the Redis protocol (RESP2): enough for GET/SET/DEL.
+
+    Each thread keeps its own connection; a dropped connection is reopened on the
+    next command.
+    """
+
+    def __init__(self, host='localhost', port=6379, db=0, password=None, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.local = threading.local()
+
+    @classmethod
+    def from_url(cls, url):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or 'localhost', parsed.port or 6379, db, parsed.password)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.local.sock = sock
+        self.local.reader = sock.makefile('rb')
+        if self.password:
+            self._call('AUTH', self.password)
+        if self.db:
+            self._call('SELECT', self.db)
+
+    def _call(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self.local.sock.sendall(b''.join(parts))
+        return self._reply()
+
+    def _reply(self):
+        line = self.local.reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by the cache server')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest
+        if kind == b'-':
+            raise RedisError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self.local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(rest)
+            return None if count < 0 else [self._reply() for _ in range(count)]
+        raise RedisError(f'Unexpected reply: {line!r}')
+
+    def command(self, *args):
+        if getattr(self.local, 'sock', None) is None:
+            self._connect()
+        try:
+            return self._call(*args)
+        except (OSError, ConnectionError):
+            self.local.sock.close()
+            self.local.sock = None
+            raise
+
+    def get(self, key):
+        return self.command('GET', key)
+
+    def set(self, key, blob, ttl):
+        self.command('SET', key, blob, 'PX', max(1, int(ttl * 1000)))
+
+    def delete(self, key):
+        self.command('DEL', key)
+
+    def clear(self):
+        self.command('FLUSHDB')
+
+    def stats(self):
+        return {'backend': 'redis', 'entries': self.command('DBSIZE'), 'server': f'{self.host}:{self.port}/{self.db}'}
+
+def backend_from_url(url, max_bytes=MAX_CACHE_BYTES):
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative/path and sqlite:////absolute/path, as in SQLAlchemy
+        return SQLiteBackend(url[len('sqlite:///'):], max_bytes)
+    if parsed.scheme in ('redis', 'tcp'):
+        return RedisBackend.from_url(url)
+    raise ValueError(f"Unsupported shared cache URL: {url}")
+
+class SharedCache:
+    def __init__(self, backend, namespace='pcs'):
+        self.backend = backend
+        self.namespace = namespace
+        self.stats_lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'errors': 0, 'skipped': 0}
+        self.down_until = 0.0
+
+    def _count(self, name):
+        with self.stats_lock:
+            self.counters[name] += 1
+
+    def _available(self):
+        if time.monotonic() < self.down_until:
+            self._count('skipped')
+            return False
+        return True
+
+    def _failed(self, action, key, exc):
+        self._count('errors')
+        self.down_until = time.monotonic() + BACKEND_RETRY_SECONDS
+        print(f"Shared cache {action} failed for {key}: {str(exc)}")
+
+    def _key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def get(self, key, default=None):
+        if not self._available():
+            return default
+        try:
+            blob = self.backend.get(self._key(key))
+        except Exception as e:
+            self._failed('read', key, e)
+            return default
+        if blob is None:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return loads(blob)
+
+    def set(self, key, value, ttl):
+        if not self._available():
+            return
+        try:
+            self.backend.set(self._key(key), dumps(value), ttl)
+            self._count('stores')
+        except Exception as e:
+            self._failed('write', key, e)
+
+    def delete(self, key):
+        try:
+            self.backend.delete(self._key(key))
+        except Exception as e:
+            self._failed('delete', key, e)
+
+    def get_or_load(self, key, loader, ttl):
+        """Return the cached value for key, or call loader() and cache a non-None result."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def stats(self):
+        with self.stats_lock:
+            stats = dict(self.counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        try:
+            stats.update(self.backend.stats())
+        except Exception as e:
+            stats['backend_error'] = str(e)
+        return stats
+
+shared_cache = SharedCache(backend_from_url(SHARED_CACHE_URL))
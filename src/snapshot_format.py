@@ -0,0 +1,160 @@
+"""Typed columnar snapshots of scraped company data.
+
+The scraper stores every metric as a display string ("3.55T", "23.97%",
+"9/28/2024"). This module parses those strings once, when a run is written, into
+typed columns and saves them as Arrow IPC (memory-mappable) or Parquet. Each
+column carries its unit in the field metadata:
+
+- 'number': plain numbers, with T/B/M/k suffixes expanded (3.55T -> 3.55e12)
+- 'percent': percentage points (23.97% -> 23.97)
+- 'date': calendar dates (9/28/2024)
+- 'text': everything else, kept as strings
+
+Readers load only the columns they ask for. The JSON export stays the primary
+format for backwards compatibility.
+
+    python snapshot_format.py company_data_20241128_221849.json
+"""
+import json
+import os
+import re
+import sys
+from collections import Counter
+from datetime import date
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+SUFFIXES = {'T': 1e12, 'B': 1e9, 'M': 1e6, 'k': 1e3}
+NUMBER_RE = re.compile(r'^([-+]?\d*\.?\d+)([TBMk]?)$')
+DATE_RE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+MISSING = ('', '--', 'N/A', 'n/a')
+SNAPSHOT_EXTENSIONS = ('.arrow', '.parquet')
+
+def parse_value(value):
+    """Return (typed value, unit) for a scraped display string."""
+    if not isinstance(value, str):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value), 'number'
+        return None, None
+
+    text = value.strip()
+    if text in MISSING:
+        return None, None
+
+    match = DATE_RE.match(text)
+    if match:
+        month, day, year = (int(part) for part in match.groups())
+        try:
+            return date(year, month, day), 'date'
+        except ValueError:
+            return text, 'text'
+
+    unit = 'percent' if text.endswith('%') else 'number'
+    cleaned = text.replace('$', '').replace(',', '').rstrip('%')
+    match = NUMBER_RE.match(cleaned)
+    if match:
+        return float(match.group(1)) * SUFFIXES.get(match.group(2), 1), unit
+    return text, 'text'
+
+def column_units(data):
+    """Pick each field's unit as the most common unit among its parsed values."""
+    seen = {}
+    for company in data.values():
+        for field, value in company.items():
+            _, unit = parse_value(value)
+            counts = seen.setdefault(field, Counter())
+            if unit is not None:
+                counts[unit] += 1
+    return {field: (counts.most_common(1)[0][0] if counts else 'text') for field, counts in seen.items()}
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Typed snapshots require the pyarrow package")
+
+def build_table(data):
+    """Convert {symbol: {field: display string}} into a typed Arrow table."""
+    _require_pyarrow()
+    units = column_units(data)
+    symbols = list(data)
+    arrays = [pa.array(symbols, pa.string())]
+    fields = [pa.field('symbol', pa.string())]
+
+    arrow_types = {'number': pa.float64(), 'percent': pa.float64(), 'date': pa.date32(), 'text': pa.string()}
+    for field, unit in units.items():
+        values = []
+        for symbol in symbols:
+            value, value_unit = parse_value(data[symbol].get(field))
+            if unit == 'text':
+                raw = data[symbol].get(field)
+                values.append(None if raw is None or str(raw).strip() in MISSING else str(raw))
+            else:
+                # Values that do not fit the column's unit become nulls
+                values.append(value if value_unit == unit else None)
+        arrays.append(pa.array(values, arrow_types[unit]))
+        fields.append(pa.field(field, arrow_types[unit], metadata={'unit': unit}))
+
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+def write_snapshot(data, path):
+    """Write scraped data as a typed .arrow (IPC file) or .parquet snapshot."""
+    table = build_table(data)
+    tmp_path = path + '.tmp'
+    if path.endswith('.parquet'):
+        pq.write_table(table, tmp_path)
+    else:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+def read_snapshot(path, columns=None):
+    """Read a snapshot into a DataFrame indexed by symbol, loading only `columns`."""
+    _require_pyarrow()
+    wanted = None if columns is None else ['symbol'] + [c for c in columns if c != 'symbol']
+    if path.endswith('.parquet'):
+        table = pq.read_table(path, columns=wanted, memory_map=True)
+    else:
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        if wanted is not None:
+            table = table.select(wanted)
+    return table.to_pandas().set_index('symbol').rename_axis(None)
+
+def snapshot_units(path):
+    """Return {column: unit} from a snapshot's schema metadata."""
+    _require_pyarrow()
+    if path.endswith('.parquet'):
+        schema = pq.read_schema(path)
+    else:
+        with pa.memory_map(path, 'r') as source:
+            schema = pa.ipc.open_file(source).schema
+    return {field.name: field.metadata[b'unit'].decode() for field in schema if field.metadata}
+
+def find_snapshot(json_path):
+    """Return the typed snapshot written next to a company_data JSON file, if any."""
+    if pa is None:
+        return None
+    base = json_path[:-len('.json')] if json_path.endswith('.json') else json_path
+    for extension in SNAPSHOT_EXTENSIONS:
+        if os.path.exists(base + extension):
+            return base + extension
+    return None
+
+def write_snapshot_for_json(json_path, extension='.arrow'):
+    """Write the typed snapshot for a company_data JSON file; skipped without pyarrow."""
+    if pa is None:
+        print("pyarrow is not installed; skipping the typed snapshot")
+        return None
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    return write_snapshot(data, json_path[:-len('.json')] + extension)
+
+if __name__ == '__main__':
+    for json_path in sys.argv[1:]:
+        print(f"Wrote {write_snapshot_for_json(json_path)}")
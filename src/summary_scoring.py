@@ -0,0 +1,272 @@
+"""Scoring of company summaries, one company or many at once.
+
+The thresholds and wording of the analysis summary live here.
+generate_company_summary in app.py is the one-row case of company_summaries;
+/api/analyze/batch scores all its symbols as one table.
+
+score_companies takes a columnar table (a DataFrame or {column: values}) of N
+companies and works out every insight band, the overall score and the overall
+rating with whole-column NumPy operations over the thresholds below: a band is
+a binary search of a metric in its thresholds (np.digitize), the score a sum
+of comparisons.
+company_summaries turns the result into one summary document per row.
+
+The table has the metrics_summary columns (percentages in points, like
+'23.97%' -> 23.97), pe_ratio, sector, industry and, optionally, `valid`.
+Rows that are not valid get the "Insufficient data" summary. Without a `valid`
+column a row is valid when none of its metrics other than price_change_pct is
+NaN; a NaN price change (a NaN close) is scored as a decline.
+summary_columns builds the table from company_data dicts and stock histories
+and marks a row invalid where a field is missing or does not convert with
+float(), the way the per-company if/elif version used to fail on it.
+
+    summaries = company_summaries(summary_columns(companies, histories))
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+from normalize import NUMBER_PATTERN
+
+METRICS = ['profit_margin', 'revenue_growth', 'operating_margin', 'roe', 'price_change_pct', 'dividend_yield']
+
+# company_data field -> table column; percentages have '%' stripped before conversion
+PERCENT_FIELDS = {
+    'Profit Margin': 'profit_margin',
+    'Quarterly Revenue Growth  (yoy)': 'revenue_growth',
+    'Operating Margin  (ttm)': 'operating_margin',
+    'Return on Equity  (ttm)': 'roe',
+    'Forward Annual Dividend Yield': 'dividend_yield',
+}
+
+# Metric -> (thresholds, insight per band). Band i holds the values above the
+# first i thresholds, so a value equal to a threshold stays in the band below.
+INSIGHT_BANDS = {
+    'profit_margin': ((10, 20), (
+        "Lower profit margins compared to industry standards",
+        "Good profitability",
+        "Highly profitable with strong profit margins",
+    )),
+    'revenue_growth': ((0, 10, 20), (
+        "Declining revenue",
+        "Moderate revenue growth",
+        "Solid revenue growth",
+        "Exceptional revenue growth",
+    )),
+    'operating_margin': ((15, 25), (
+        "Room for operational improvement",
+        "Good operational efficiency",
+        "Excellent operational efficiency",
+    )),
+    'roe': ((10, 20), (
+        "Below average return on equity",
+        "Decent return on equity",
+        "Strong return on equity",
+    )),
+    'price_change_pct': ((0, 20), (
+        "Declining stock value ({:.1f}% past year)",
+        "Positive stock performance (+{:.1f}% past year)",
+        "Strong stock performance (+{:.1f}% past year)",
+    )),
+}
+DIVIDEND_INSIGHT = "Pays dividend with {:.2f}% yield"
+SECTOR_INSIGHT = "Operating in {} sector, {} industry"
+
+# One point for each metric above its threshold
+SCORE_THRESHOLDS = {
+    'profit_margin': 15,
+    'revenue_growth': 10,
+    'operating_margin': 20,
+    'roe': 15,
+    'price_change_pct': 10,
+}
+# Overall rating by score: below 2, from 2, from 4
+OVERALL_BANDS = ((2, 4), (
+    "Shows some challenges, careful analysis recommended",
+    "Solid company with good potential",
+    "Strong performer with excellent fundamentals",
+))
+
+INSUFFICIENT_INSIGHTS = ["Insufficient data to generate complete analysis"]
+INSUFFICIENT_OVERALL = "Limited data available"
+
+# Below this many strings pyarrow's fixed cost outweighs converting them one by one
+ARROW_MIN_CELLS = 64
+
+def _parse_strings_arrow(text, strip):
+    """(values, parsed) of a list of strings; parsed is False where the fast path declined."""
+    array = pa.array(text, pa.string())
+    if strip:
+        array = pc.utf8_trim(array, strip)
+    # Arrow's cast rounds like float(), but accepts less; the rest is left to float()
+    parsed = pc.match_substring_regex(array, NUMBER_PATTERN).to_numpy(zero_copy_only=False)
+    values = pc.cast(pc.if_else(pa.array(parsed), array, None), pa.float64())
+    return values.to_numpy(zero_copy_only=False), parsed
+
+def parse_column(cells, strip=''):
+    """(float64 values, valid) of float(cell.strip(strip)) for each cell; float(cell) without strip.
+
+    valid is False where that expression raises, e.g. for 'N/A', None or a
+    missing field (pass None). The values are NaN there.
+    """
+    values = np.full(len(cells), np.nan)
+    valid = np.zeros(len(cells), dtype=bool)
+    pending = range(len(cells))
+    if pa is not None and len(cells) >= ARROW_MIN_CELLS:
+        text = [i for i, cell in enumerate(cells) if type(cell) is str]
+        if text:
+            converted, parsed = _parse_strings_arrow([cells[i] for i in text], strip)
+            text = np.array(text)
+            values[text[parsed]] = converted[parsed]
+            valid[text[parsed]] = True
+            pending = np.flatnonzero(~valid).tolist()
+    for i in pending:
+        cell = cells[i]
+        try:
+            values[i] = float(cell.strip(strip) if strip else cell)
+            valid[i] = True
+        except (AttributeError, TypeError, ValueError):
+            pass
+    return values, valid
+
+def price_changes(histories):
+    """(percent change from the first to the last close, valid) of each stock history.
+
+    An empty history changes by 0; None or a history without a Close column is not valid.
+    """
+    starts = np.full(len(histories), np.nan)
+    ends = np.full(len(histories), np.nan)
+    empty = np.zeros(len(histories), dtype=bool)
+    valid = np.ones(len(histories), dtype=bool)
+    for i, hist in enumerate(histories):
+        if hist is None or not hasattr(hist, 'empty'):
+            valid[i] = False
+        elif hist.empty:
+            empty[i] = True
+        elif 'Close' not in hist:
+            valid[i] = False
+        else:
+            closes = hist['Close'].to_numpy()
+            starts[i], ends[i] = closes[0], closes[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = (ends - starts) / starts * 100
+    changes[empty] = 0
+    return changes, valid
+
+def summary_columns(companies, histories):
+    """Scoring table, as {column: values}, of company_data dicts (from get_company_data) and their stock histories."""
+    table = {}
+    valid = np.ones(len(companies), dtype=bool)
+    for field, column in PERCENT_FIELDS.items():
+        table[column], parsed = parse_column([company.get(field) for company in companies], '%')
+        valid &= parsed
+    table['pe_ratio'], parsed = parse_column([company.get('Trailing P/E') for company in companies])
+    valid &= parsed
+    table['price_change_pct'], parsed = price_changes(histories)
+    valid &= parsed
+
+    for field, column in (('Sector', 'sector'), ('Industry', 'industry')):
+        table[column] = np.empty(len(companies), dtype=object)
+        table[column][:] = [company.get(field) for company in companies]
+    for i, company in enumerate(companies):
+        # Industry is only shown, and so only required, for a known sector
+        if 'Sector' not in company or (company['Sector'] != 'N/A' and 'Industry' not in company):
+            valid[i] = False
+    table['valid'] = valid
+    return table
+
+def summary_table(companies, histories):
+    """summary_columns as a DataFrame indexed by symbol."""
+    table = summary_columns(companies, histories)
+    # object Series, so that pandas keeps a None sector as None rather than NaN
+    for column in ('sector', 'industry'):
+        table[column] = pd.Series(table[column], dtype=object)
+    frame = pd.DataFrame(table, columns=METRICS + ['pe_ratio', 'sector', 'industry', 'valid'])
+    frame.index = [company.get('symbol') for company in companies]
+    return frame
+
+# Thresholds and labels as arrays, built once for the lookups below
+_THRESHOLDS = {column: np.array(thresholds, dtype='float64') for column, (thresholds, _) in INSIGHT_BANDS.items()}
+_LABELS = {column: np.array(labels, dtype=object) for column, (_, labels) in INSIGHT_BANDS.items()}
+_OVERALL_THRESHOLDS = np.array(OVERALL_BANDS[0])
+_OVERALL_LABELS = np.array(OVERALL_BANDS[1], dtype=object)
+
+def _band(values, thresholds):
+    """Number of thresholds each value is above; NaN is above none.
+
+    np.digitize(values, thresholds, right=True), without its argument checks,
+    which cost more than the search itself for a single company.
+    """
+    bands = np.searchsorted(thresholds, values, 'left')
+    bands[np.isnan(values)] = 0
+    return bands
+
+def score_companies(table):
+    """{'valid', each metric in INSIGHT_BANDS -> band, 'dividend', 'overall_score', 'overall'} as arrays."""
+    metrics = {column: np.asarray(table[column], dtype='float64') for column in METRICS}
+    if 'valid' in table:
+        valid = np.asarray(table['valid'], dtype=bool)
+    else:
+        valid = np.ones(len(metrics['profit_margin']), dtype=bool)
+        for column in METRICS:
+            if column != 'price_change_pct':
+                valid &= ~np.isnan(metrics[column])
+        if 'pe_ratio' in table:
+            valid &= ~np.isnan(np.asarray(table['pe_ratio'], dtype='float64'))
+
+    scores = {'valid': valid}
+    for column, thresholds in _THRESHOLDS.items():
+        scores[column] = _band(metrics[column], thresholds)
+    scores['dividend'] = metrics['dividend_yield'] > 0
+    overall_score = np.zeros(len(valid), dtype=np.intp)
+    for column, threshold in SCORE_THRESHOLDS.items():
+        overall_score += metrics[column] > threshold
+    scores['overall_score'] = overall_score
+    # A score equal to a threshold reaches the band above it
+    scores['overall'] = np.searchsorted(_OVERALL_THRESHOLDS, overall_score, 'right')
+    return scores
+
+def company_summaries(table):
+    """{'insights', 'overall', 'metrics_summary'} of every row of the table, in order."""
+    scores = score_companies(table)
+    valid = scores['valid']
+    metrics = {column: np.asarray(table[column], dtype='float64').tolist() for column in METRICS}
+    # Labels of every row at once; only price changes and dividend yields are formatted per row
+    labels = {column: _LABELS[column][scores[column]]
+              for column in ('profit_margin', 'revenue_growth', 'operating_margin', 'roe')}
+    price_labels = _LABELS['price_change_pct'][scores['price_change_pct']]
+    overall = _OVERALL_LABELS[scores['overall']]
+    sectors = list(table['sector']) if 'sector' in table else ['N/A'] * len(valid)
+    industries = list(table['industry']) if 'industry' in table else ['N/A'] * len(valid)
+    dividends = scores['dividend']
+
+    summaries = []
+    for i in range(len(valid)):
+        if not valid[i]:
+            summaries.append({
+                'insights': list(INSUFFICIENT_INSIGHTS),
+                'overall': INSUFFICIENT_OVERALL,
+                'metrics_summary': dict.fromkeys(METRICS, 0),
+            })
+            continue
+        insights = []
+        if sectors[i] != 'N/A':
+            insights.append(SECTOR_INSIGHT.format(sectors[i], industries[i]))
+        insights.extend((labels['profit_margin'][i], labels['revenue_growth'][i],
+                         labels['operating_margin'][i], labels['roe'][i],
+                         price_labels[i].format(metrics['price_change_pct'][i])))
+        if dividends[i]:
+            insights.append(DIVIDEND_INSIGHT.format(metrics['dividend_yield'][i]))
+        summaries.append({
+            'insights': insights,
+            'overall': overall[i],
+            'metrics_summary': {column: metrics[column][i] for column in METRICS},
+        })
+    if not valid.all():
+        print(f"Insufficient data to score {np.count_nonzero(~valid)} of {len(valid)} companies")
+    return summaries
@@ -0,0 +1,330 @@
+"""Batched machine translation with a persistent, content-addressed store.
+
+translate_many() collects every string of a response, drops duplicates and
+strings already translated, and sends the rest upstream in as few requests as
+possible. Each result is stored under (sha256 of the text, target language),
+so a sector name or company description is translated once per language and
+then served from disk by every request and worker process.
+
+Backends (TRANSLATOR):
+- 'google': googletrans, which takes one string per request; a batch is sent as
+  one text of numbered segments and split on the numbers on the way back. A
+  reply without every number in order is translated again one text at a time
+- 'stub': deterministic '[ko] text' output without network access, for tests
+  and offline runs
+
+TranslationJobs runs the same batches on a background pool, so a response can
+go out in the source language and the translations be fetched when ready.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import timed
+from rate_limiter import limiter, TRANSLATION_HOST
+from resilience import acquire, resilience
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_PATH = os.environ.get('TRANSLATION_STORE_PATH', os.path.join(ROOT, '.cache', 'translations.sqlite'))
+TRANSLATOR = os.environ.get('TRANSLATOR', 'google')
+
+# googletrans rejects texts over 5000 characters
+MAX_BATCH_CHARS = 4500
+# Line before each text of a batch; the numbers show where each translation starts
+SEGMENT_MARKER = '[[{}]]'
+SEGMENT_RE = re.compile(r'^\s*\[\[\s*(\d+)\s*\]\]\s*$', re.MULTILINE)
+TRANSLATION_WORKERS = int(os.environ.get('TRANSLATION_WORKERS', 4))
+# Finished jobs are kept this long for clients that poll late
+JOB_RETENTION_SECONDS = 3600
+
+def text_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class StubTranslator:
+    """Offline translator that tags each text with the target language."""
+
+    def __init__(self):
+        self.requests = 0
+        self.texts = 0
+
+    def translate_batch(self, texts, target_lang):
+        self.requests += 1
+        self.texts += len(texts)
+        return [f'[{target_lang}] {text}' for text in texts]
+
+class GoogleTranslator:
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def _translate(self, text, target_lang):
+        return resilience.call(TRANSLATION_HOST, self._translate_once, text, target_lang)
+
+    def _translate_once(self, text, target_lang):
+        acquire(TRANSLATION_HOST)
+        try:
+            translated = self.translator.translate(text, dest=target_lang).text
+        except Exception as e:
+            limiter.report_error(TRANSLATION_HOST, e)
+            raise
+        limiter.report(TRANSLATION_HOST, 200)
+        return translated
+
+    def translate_batch(self, texts, target_lang):
+        results = []
+        for chunk in self._chunks(texts):
+            translated = None
+            if len(chunk) > 1:
+                batch = '\n'.join(f'{SEGMENT_MARKER.format(i)}\n{text}' for i, text in enumerate(chunk))
+                translated = self._segments(self._translate(batch, target_lang), len(chunk))
+            if translated is None:
+                # One text, or the segments did not survive; translate one by one
+                translated = [self._translate(text, target_lang) for text in chunk]
+            results.extend(text.strip() for text in translated)
+        return results
+
+    @staticmethod
+    def _segments(reply, count):
+        """The count translations of a batch reply, or None unless markers 0..count-1 come back in order."""
+        parts = SEGMENT_RE.split(reply)
+        # [text before the first marker, number, text, number, text, ...]
+        if parts[0].strip() or parts[1::2] != [str(i) for i in range(count)]:
+            return None
+        segments = parts[2::2]
+        if not all(segment.strip() for segment in segments):
+            return None
+        return segments
+
+    @staticmethod
+    def _chunks(texts):
+        chunk, size = [], 0
+        for text in texts:
+            length = len(text) + len(SEGMENT_MARKER.format(len(chunk))) + 2
+            if chunk and size + length > MAX_BATCH_CHARS:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(text)
+            size += length
+        if chunk:
+            yield chunk
+
+def translator_from_name(name):
+    if name == 'stub':
+        return StubTranslator()
+    if name == 'google':
+        return GoogleTranslator()
+    raise ValueError(f"Unknown translator: {name}")
+
+class TranslationService:
+    def __init__(self, translator, path=STORE_PATH):
+        self.translator = translator
+        self.path = path
+        self.lock = threading.Lock()
+        self.flights = {}  # (hash, lang) -> Event set when another caller has stored it
+        self.stats = {'requested': 0, 'stored_hits': 0, 'coalesced': 0, 'translated': 0,
+                      'upstream_batches': 0, 'errors': 0}
+        self._conn = None
+
+    def _count(self, stat, amount=1):
+        # Job threads translate concurrently with requests
+        with self.lock:
+            self.stats[stat] += amount
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (text_hash, lang)
+            ) WITHOUT ROWID''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS translation_jobs (
+                job_id TEXT PRIMARY KEY,
+                lang TEXT NOT NULL,
+                fields TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )''')
+            self._conn = conn
+        return self._conn
+
+    def _lookup(self, hashes, target_lang):
+        found = {}
+        hashes = list(hashes)
+        with self.lock:
+            for start in range(0, len(hashes), 500):
+                part = hashes[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT text_hash, translated FROM translations WHERE lang = ? "
+                    f"AND text_hash IN ({', '.join('?' * len(part))})", [target_lang, *part],
+                )
+                found.update(rows)
+        return found
+
+    def _stored(self, hashes, target_lang):
+        """_lookup that counts an unreadable store as an error and finds nothing in it."""
+        try:
+            return self._lookup(hashes, target_lang)
+        except (sqlite3.Error, OSError) as e:
+            self._count('errors')
+            print(f"Translation store error: {str(e)}")
+            return {}
+
+    @timed('translation')
+    def translate_many(self, texts, target_lang):
+        """Translate a list of texts in as few upstream requests as possible.
+
+        Non-string and empty items are returned unchanged; so is a text whose
+        translation failed, and that failure is not stored. A store that cannot
+        be read or written counts as an error too: texts it should have served
+        come back unchanged, and new translations are returned without being kept.
+        """
+        if target_lang == 'en':
+            return list(texts)
+        wanted = {text_key(text): text for text in texts if isinstance(text, str) and text.strip()}
+        self._count('requested', len(wanted))
+        translated = self._stored(wanted, target_lang)
+        self._count('stored_hits', len(translated))
+
+        # Claim the missing texts; texts another request is translating right now are waited for
+        claimed, waiting = [], []
+        with self.lock:
+            for text_hash in wanted:
+                if text_hash in translated:
+                    continue
+                flight = self.flights.get((text_hash, target_lang))
+                if flight is None:
+                    self.flights[(text_hash, target_lang)] = threading.Event()
+                    claimed.append(text_hash)
+                else:
+                    waiting.append(flight)
+                    self.stats['coalesced'] += 1
+
+        if claimed:
+            try:
+                results = self.translator.translate_batch([wanted[h] for h in claimed], target_lang)
+                self._count('upstream_batches')
+                self._count('translated', len(claimed))
+                translated.update(zip(claimed, results))
+                now = time.time()
+                try:
+                    with self.lock:
+                        self.conn.executemany('INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)',
+                                              [(h, target_lang, result, now) for h, result in zip(claimed, results)])
+                        self.conn.commit()
+                except (sqlite3.Error, OSError) as e:
+                    self._count('errors')
+                    print(f"Translation store error: {str(e)}")
+            except Exception as e:
+                self._count('errors')
+                print(f"Translation error: {str(e)}")
+            finally:
+                with self.lock:
+                    for text_hash in claimed:
+                        self.flights.pop((text_hash, target_lang)).set()
+
+        if waiting:
+            for flight in waiting:
+                flight.wait()
+            missing = [h for h in wanted if h not in translated]
+            translated.update(self._stored(missing, target_lang))
+
+        return [translated.get(text_key(text), text) if isinstance(text, str) and text.strip() else text
+                for text in texts]
+
+    def translate(self, text, target_lang):
+        return self.translate_many([text], target_lang)[0]
+
+    def lookup_many(self, texts, target_lang):
+        """Stored translations for texts, without going upstream; None where there is none yet."""
+        found = self._stored({text_key(text) for text in texts if isinstance(text, str)}, target_lang)
+        return [found.get(text_key(text)) if isinstance(text, str) else None for text in texts]
+
+    def translate_fields(self, data, fields, target_lang):
+        """Copy of `data` with the given fields translated in one batch."""
+        if not data:
+            return data
+        present = [field for field in fields if field in data]
+        translated = dict(data)
+        translated.update(zip(present, self.translate_many([data[field] for field in present], target_lang)))
+        return translated
+
+class TranslationJobs:
+    """Background translation of {field path: text} mappings.
+
+    Jobs are rows in the translation store, so any worker process can report on a
+    job; the translations themselves are read from the store by text hash.
+    """
+
+    def __init__(self, service, workers=TRANSLATION_WORKERS):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='translation-job')
+
+    def submit(self, fields, target_lang):
+        """Start translating {path: text} and return the job id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.service.lock:
+            conn = self.service.conn
+            conn.execute('DELETE FROM translation_jobs WHERE created_at < ?', (now - JOB_RETENTION_SECONDS,))
+            conn.execute('INSERT INTO translation_jobs VALUES (?, ?, ?, ?, ?)',
+                         (job_id, target_lang, json.dumps(fields), 'pending', now))
+            conn.commit()
+        self.executor.submit(self._run, job_id, fields, target_lang)
+        return job_id
+
+    def _run(self, job_id, fields, target_lang):
+        try:
+            texts = list(fields.values())
+            self.service.translate_many(texts, target_lang)
+            # A failed translation is not stored, so anything missing from the store failed
+            failed = any(result is None for text, result in zip(texts, self.service.lookup_many(texts, target_lang))
+                         if isinstance(text, str) and text.strip())
+        except Exception as e:
+            print(f"Translation job {job_id} error: {str(e)}")
+            failed = True
+        try:
+            with self.service.lock:
+                self.service.conn.execute('UPDATE translation_jobs SET status = ? WHERE job_id = ?',
+                                          ('failed' if failed else 'done', job_id))
+                self.service.conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error recording translation job {job_id}: {str(e)}")
+
+    def get(self, job_id):
+        """{'job_id', 'lang', 'status', 'fields': {path: translation}} or None for an unknown job.
+
+        'fields' holds the translations available so far; a failed job lists
+        only the fields that were translated.
+        """
+        with self.service.lock:
+            row = self.service.conn.execute(
+                'SELECT lang, fields, status FROM translation_jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        lang, fields, status = row
+        fields = json.loads(fields)
+        paths = list(fields)
+        stored = self.service.lookup_many([fields[path] for path in paths], lang)
+        return {
+            'job_id': job_id,
+            'lang': lang,
+            'status': status,
+            'fields': {path: text for path, text in zip(paths, stored) if text is not None},
+        }
+
+translation_service = TranslationService(translator_from_name(TRANSLATOR))
+translation_jobs = TranslationJobs(translation_service)
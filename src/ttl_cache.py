@@ -0,0 +1,135 @@
+"""In-process TTL cache with stale-while-revalidate and single-flight loading.
+
+Sits in front of the upstream lookups of the Flask app:
+
+- a fresh entry (younger than `ttl`) is returned directly
+- a stale entry (up to `stale_ttl` past its ttl) is returned as well, and one
+  background refresh is started for it
+- on a miss, the first caller runs the loader and concurrent callers for the
+  same key wait for its result instead of going upstream themselves
+
+Loader results of None are returned but not cached, so failed lookups are
+retried by the next request. Loader exceptions reach every waiting caller.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared by all caches; refreshes are short upstream calls
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ttl-cache-refresh')
+
+class _Flight:
+    """One in-progress load that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    def __init__(self, name, ttl, stale_ttl=0, max_entries=1024):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (value, stored_at)
+        self.flights = {}
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0,
+                         'refreshes': 0, 'refresh_errors': 0, 'evictions': 0}
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() at most once per key at a time."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = now - stored_at
+                if age < self.ttl:
+                    self.counters['hits'] += 1
+                    self.entries.move_to_end(key)
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self.counters['stale_hits'] += 1
+                    self.entries.move_to_end(key)
+                    if key not in self.flights:
+                        self.flights[key] = _Flight()
+                        self.counters['refreshes'] += 1
+                        _refresh_executor.submit(self._load, key, loader, self.flights[key], True)
+                    return value
+
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+                self.counters['misses'] += 1
+            else:
+                self.counters['coalesced'] += 1
+
+        if leader:
+            self._load(key, loader, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _load(self, key, loader, flight, refresh=False):
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            if refresh:
+                print(f"Background refresh of {self.name} {key!r} failed: {str(e)}")
+        except BaseException:
+            # SystemExit, KeyboardInterrupt, a worker timeout: raised here, waiters get an error
+            flight.error = RuntimeError(f"Loading {self.name} {key!r} was interrupted")
+            raise
+        finally:
+            with self.lock:
+                if flight.error is None and flight.value is not None:
+                    self._store(key, flight.value)
+                elif refresh:
+                    self.counters['refresh_errors'] += 1
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+            flight.done.set()
+
+    def _store(self, key, value):
+        self.entries[key] = (value, time.monotonic())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def put(self, key, value):
+        """Store a value loaded elsewhere, e.g. by a batch request."""
+        if value is not None:
+            with self.lock:
+                self._store(key, value)
+
+    def peek(self, key):
+        """Return the value for key if it is fresh, without loading or counting."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                return entry[0]
+            return None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = sum(self.counters[name] for name in ('hits', 'stale_hits', 'misses', 'coalesced'))
+            return {
+                **self.counters,
+                'entries': len(self.entries),
+                'in_flight': len(self.flights),
+                'hit_rate': round((lookups - self.counters['misses']) / lookups, 4) if lookups else 0.0,
+                'ttl_seconds': self.ttl,
+                'stale_seconds': self.stale_ttl,
+            }
@@ -0,0 +1,175 @@
+"""summary_scoring against the per-company if/elif summary it replaced, row for row."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import summary_scoring
+from summary_scoring import company_summaries, summary_columns, summary_table
+
+# The reference divides by a zero first close like the old code did, with a warning
+pytestmark = pytest.mark.filterwarnings('ignore::RuntimeWarning')
+
+PERCENT_FIELDS = list(summary_scoring.PERCENT_FIELDS)
+# On and just around every threshold, so that > and >= would disagree
+EDGE_VALUES = [f'{t + d:.2f}%' for t in (0, 10, 15, 20, 25) for d in (-0.01, 0, 0.01)] + ['N/A', 'nan%', '-0.00%']
+
+def reference_summary(company_data, stock_history):
+    """generate_company_summary as it was written before summary_scoring."""
+    try:
+        profit_margin = float(company_data['Profit Margin'].strip('%'))
+        pe_ratio = float(company_data['Trailing P/E']) if company_data['Trailing P/E'] != 0 else 0
+        revenue_growth = float(company_data['Quarterly Revenue Growth  (yoy)'].strip('%'))
+        operating_margin = float(company_data['Operating Margin  (ttm)'].strip('%'))
+        roe = float(company_data['Return on Equity  (ttm)'].strip('%'))
+
+        if not stock_history.empty:
+            start_price = stock_history['Close'].iloc[0]
+            end_price = stock_history['Close'].iloc[-1]
+            price_change_pct = ((end_price - start_price) / start_price) * 100
+        else:
+            price_change_pct = 0
+
+        insights = []
+        if company_data['Sector'] != 'N/A':
+            insights.append(f"Operating in {company_data['Sector']} sector, {company_data['Industry']} industry")
+        if profit_margin > 20:
+            insights.append("Highly profitable with strong profit margins")
+        elif profit_margin > 10:
+            insights.append("Good profitability")
+        else:
+            insights.append("Lower profit margins compared to industry standards")
+        if revenue_growth > 20:
+            insights.append("Exceptional revenue growth")
+        elif revenue_growth > 10:
+            insights.append("Solid revenue growth")
+        elif revenue_growth > 0:
+            insights.append("Moderate revenue growth")
+        else:
+            insights.append("Declining revenue")
+        if operating_margin > 25:
+            insights.append("Excellent operational efficiency")
+        elif operating_margin > 15:
+            insights.append("Good operational efficiency")
+        else:
+            insights.append("Room for operational improvement")
+        if roe > 20:
+            insights.append("Strong return on equity")
+        elif roe > 10:
+            insights.append("Decent return on equity")
+        else:
+            insights.append("Below average return on equity")
+        if price_change_pct > 20:
+            insights.append(f"Strong stock performance (+{price_change_pct:.1f}% past year)")
+        elif price_change_pct > 0:
+            insights.append(f"Positive stock performance (+{price_change_pct:.1f}% past year)")
+        else:
+            insights.append(f"Declining stock value ({price_change_pct:.1f}% past year)")
+        dividend_yield = float(company_data['Forward Annual Dividend Yield'].strip('%'))
+        if dividend_yield > 0:
+            insights.append(f"Pays dividend with {dividend_yield:.2f}% yield")
+
+        overall_score = 0
+        if profit_margin > 15: overall_score += 1
+        if revenue_growth > 10: overall_score += 1
+        if operating_margin > 20: overall_score += 1
+        if roe > 15: overall_score += 1
+        if price_change_pct > 10: overall_score += 1
+        if overall_score >= 4:
+            overall = "Strong performer with excellent fundamentals"
+        elif overall_score >= 2:
+            overall = "Solid company with good potential"
+        else:
+            overall = "Shows some challenges, careful analysis recommended"
+        return {
+            'insights': insights,
+            'overall': overall,
+            'metrics_summary': {
+                'profit_margin': profit_margin, 'revenue_growth': revenue_growth,
+                'operating_margin': operating_margin, 'roe': roe,
+                'price_change_pct': price_change_pct, 'dividend_yield': dividend_yield,
+            },
+        }
+    except Exception:
+        return {
+            'insights': ["Insufficient data to generate complete analysis"],
+            'overall': "Limited data available",
+            'metrics_summary': dict.fromkeys(summary_scoring.METRICS, 0),
+        }
+
+def synthetic_companies(count, seed=0):
+    """(company_data dicts, histories) as load_company_data makes them, with edge cases mixed in."""
+    rng = np.random.default_rng(seed)
+    sectors = [('Technology', 'Semiconductors'), ('Healthcare', 'Biotechnology'), ('N/A', 'N/A')]
+    companies, histories = [], []
+    for i in range(count):
+        sector, industry = sectors[i % len(sectors)]
+        company = {'symbol': f'S{i:04d}', 'Sector': sector, 'Industry': industry,
+                   'Trailing P/E': float(rng.normal(25, 15))}
+        for field in PERCENT_FIELDS:
+            company[field] = f'{rng.normal(12, 15):.2f}%'
+            if rng.random() < 0.1:
+                company[field] = EDGE_VALUES[rng.integers(len(EDGE_VALUES))]
+        edge = rng.random()
+        if edge < 0.03:
+            company['Trailing P/E'] = 'N/A'
+        elif edge < 0.06:
+            del company['Industry']
+        elif edge < 0.09:
+            company['Sector'] = None
+
+        closes = (100 * np.exp(np.cumsum(rng.normal(0, 0.015, 30)))).round(2)
+        hist = pd.DataFrame({'Close': closes})
+        edge = rng.random()
+        if edge < 0.03:
+            hist = hist.iloc[:0]
+        elif edge < 0.06:
+            hist = None
+        elif edge < 0.09:
+            hist.loc[0, 'Close'] = 0.0
+        elif edge < 0.12:
+            hist.loc[0, 'Close'] = np.nan
+        elif edge < 0.18:
+            # Exactly 10% and 20% up, on the score and insight thresholds
+            hist.loc[len(hist) - 1, 'Close'] = hist.loc[0, 'Close'] * (1.1 if edge < 0.15 else 1.2)
+        companies.append(company)
+        histories.append(hist)
+    return companies, histories
+
+def same(a, b):
+    """Equality that treats NaN as equal to NaN."""
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and a != a:
+        return isinstance(b, float) and b != b
+    return a == b
+
+@pytest.mark.parametrize('use_arrow', [True, False])
+def test_batch_matches_reference(use_arrow, monkeypatch):
+    if use_arrow and summary_scoring.pa is None:
+        pytest.skip('pyarrow is not installed')
+    if not use_arrow:
+        monkeypatch.setattr(summary_scoring, 'pa', None)
+    companies, histories = synthetic_companies(2000)
+    summaries = company_summaries(summary_columns(companies, histories))
+    for company, hist, summary in zip(companies, histories, summaries):
+        assert same(summary, reference_summary(company, hist)), company['symbol']
+
+def test_single_rows_match_reference():
+    companies, histories = synthetic_companies(300, seed=1)
+    for company, hist in zip(companies, histories):
+        summary = company_summaries(summary_columns([company], [hist]))[0]
+        assert same(summary, reference_summary(company, hist)), company['symbol']
+
+def test_dataframe_table():
+    companies, histories = synthetic_companies(100, seed=2)
+    table = summary_table(companies, histories)
+    assert list(table.index) == [company['symbol'] for company in companies]
+    assert all(same(summary, reference_summary(company, hist))
+               for company, hist, summary in zip(companies, histories, company_summaries(table)))